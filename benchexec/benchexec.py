@@ -12,13 +12,15 @@ and either call "instance.start()" or "benchexec.benchexec.main(instance)".
 
 import argparse
 import datetime
+import glob
 import logging
 import os
+import re
 import sys
 
 from benchexec import __version__
 from benchexec import BenchExecException
-from benchexec.model import Benchmark
+from benchexec.model import Benchmark, get_benchmark_name
 from benchexec.outputhandler import OutputHandler
 from benchexec import util
 
@@ -249,6 +251,55 @@ class BenchExec(object):
                 to a single run
             """,
         )
+        parser.add_argument(
+            "--core-class",
+            dest="core_class",
+            choices=["performance", "efficiency"],
+            default=None,
+            help="""
+                On CPUs with different classes of cores (hybrid CPUs),
+                use only cores of the given class for all runs
+                (Applied only if the number of CPU cores is limited).
+            """,
+        )
+
+        parser.add_argument(
+            "--pipeline-run-sets",
+            dest="pipeline_run_sets",
+            action="store_true",
+            help="""
+                Execute the runs of all run sets with one shared pool of parallel runs
+                instead of waiting for all runs of a run set to finish
+                before starting the next run set
+                (cputime, walltime, and energy of each run set are then summed up
+                from its runs).
+            """,
+        )
+
+        parser.add_argument(
+            "--order-by-history",
+            dest="history_result_files",
+            action="append",
+            metavar="RESULT_XML",
+            help="""
+                Start runs in order of their CPU time in the given result file
+                of a previous execution, longest first,
+                to reduce the total time of the benchmark.
+                This option can be specified several times.
+            """,
+        )
+
+        parser.add_argument(
+            "--default-predicted-cputime",
+            dest="default_predicted_cputime",
+            type=util.parse_timespan_value,
+            metavar="SECONDS",
+            help="""
+                CPU time to assume for ordering runs that are not present
+                in the results given with --order-by-history
+                (default: the CPU-time limit).
+            """,
+        )
 
         parser.add_argument(
             "--no-compress-results",
@@ -321,6 +372,19 @@ class BenchExec(object):
             help="Commit message if --commit is used.",
         )
 
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="""
+                Continue the latest previous execution of the benchmark
+                whose results are present in the output path
+                (or the one given with --startTime),
+                keeping the results of all runs that were already finished
+                and executing only the remaining runs.
+            """,
+        )
+
         parser.add_argument(
             "--startTime",
             dest="start_time",
@@ -357,6 +421,8 @@ class BenchExec(object):
         logging.debug("This is benchexec %s.", __version__)
         from . import localexecution as executor
 
+        # before any tool-info module or other process is started
+        executor.init_cgroups()
         return executor
 
     def execute_benchmark(self, benchmark_file):
@@ -366,13 +432,18 @@ class BenchExec(object):
         @param benchmark_file: the name of a benchmark-definition XML file
         @return: a result value from the executor module
         """
+        start_time = self.config.start_time
+        if self.config.resume and not start_time:
+            start_time = self.find_previous_start_time(benchmark_file)
         benchmark = Benchmark(
             benchmark_file,
             self.config,
-            self.config.start_time or util.read_local_time(),
+            start_time or util.read_local_time(),
         )
         try:
-            self.check_existing_results(benchmark)
+            if not self.config.resume:
+                self.check_existing_results(benchmark)
+            benchmark.expand_runs_in_background()
 
             self.executor.init(self.config, benchmark)
             output_handler = OutputHandler(
@@ -406,6 +477,39 @@ class BenchExec(object):
                 logging.warning("Could not add files to git repository: %s", e)
         return result
 
+    def find_previous_start_time(self, benchmark_file):
+        """
+        Find the start time of the latest previous execution of a benchmark
+        for which output files exist in the output path.
+        @return: the start time as datetime.datetime or None
+        """
+        output_base_name = self.config.output_path + get_benchmark_name(
+            benchmark_file, self.config
+        )
+        instance_pattern = re.compile(
+            re.escape(output_base_name)
+            + r"\.(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.(results|logfiles)\b"
+        )
+        instances = set()
+        for file in glob.iglob(glob.escape(output_base_name) + ".*"):
+            match = instance_pattern.match(file)
+            if match:
+                instances.add(match.group(1))
+        if not instances:
+            logging.info(
+                "No previous results of %s found in %r, starting from scratch.",
+                benchmark_file,
+                self.config.output_path,
+            )
+            return None
+
+        instance = max(instances)  # lexicographic order is chronological
+        logging.info("Resuming execution of %s from %s.", benchmark_file, instance)
+        start_time = datetime.datetime.strptime(
+            instance, util.TIMESTAMP_FILENAME_FORMAT
+        )
+        return start_time.astimezone()  # interpret as local time
+
     def check_existing_results(self, benchmark):
         """
         Check and abort if the target directory for the benchmark results
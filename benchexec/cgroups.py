@@ -85,20 +85,6 @@ As a temporary workaround, you can also run
 "sudo chmod o+wt {1}"
 Note that this will grant permissions to more users than typically desired and it will only last until the next reboot."""
 
-_ERROR_MSG_CGROUPS_V2 = """
-Required cgroups are not available because this system is using cgroupsv2 exclusively.
-
-This version of BenchExec does not yet support cgroupsv2.
-Please check at https://github.com/sosy-lab/benchexec/issues/133
-whether a new version of BenchExec with support for cgroupsv2 is available
-and update if applicable.
-
-Alternatively, you could try switching back to cgroupsv1
-with the kernel command-line parameter systemd.unified_cgroup_hierarchy=0
-or use BenchExec without the features that need cgroups
-(i.e., disable cpu-time limit, memory limit, and core limit).
-"""
-
 _ERROR_MSG_OTHER = """
 Required cgroups are not available.
 If you are using BenchExec within a container, please make "/sys/fs/cgroup" available."""
@@ -141,6 +127,15 @@ def find_my_cgroups(cgroup_paths=None, fallback=True):
     logging.debug(
         "Analyzing /proc/mounts and /proc/self/cgroup for determining cgroups."
     )
+    try:
+        version = _get_cgroup_version()
+    except BenchExecException:
+        version = None  # no cgroups at all, handled like missing subsystems
+    if version == CGROUPS_V2:
+        from benchexec import cgroupsv2
+
+        return cgroupsv2.find_my_cgroups(cgroup_paths)
+
     if cgroup_paths is None:
         my_cgroups = dict(_find_own_cgroups())
     else:
@@ -215,8 +210,8 @@ def _parse_proc_pid_cgroup(content):
             yield (subsystem, path)
 
 
-def kill_all_tasks_in_cgroup(cgroup, ensure_empty=True):
-    tasksFile = os.path.join(cgroup, "tasks")
+def kill_all_tasks_in_cgroup(cgroup, ensure_empty=True, tasks_file="tasks"):
+    tasksFile = os.path.join(cgroup, tasks_file)
 
     i = 0
     while True:
@@ -243,7 +238,19 @@ def kill_all_tasks_in_cgroup(cgroup, ensure_empty=True):
                 if task is None or not ensure_empty:
                     return  # No process was hanging, exit
             # wait for the process to exit, this might take some time
-            time.sleep(i * 0.5)
+            _wait_until_no_tasks(tasksFile, i * 0.5)
+
+
+def _wait_until_no_tasks(tasks_file, timeout):
+    """Wait until the given tasks file is empty, but at most timeout seconds."""
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while time.monotonic() < deadline:
+        with open(tasks_file, "rt") as tasks:
+            if not tasks.read(1):
+                return
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay *= 2
 
 
 def remove_cgroup(cgroup):
@@ -290,6 +297,14 @@ def _register_process_with_cgrulesengd(pid):
 
 
 class Cgroup(object):
+    """
+    The cgroups of a process or run on a system with cgroups v1,
+    where each subsystem can be in a separate hierarchy.
+    cgroupsv2.CgroupV2 provides the same interface for cgroups v2.
+    """
+
+    version = CGROUPS_V1
+
     def __init__(self, cgroupsPerSubsystem):
         assert set(cgroupsPerSubsystem.keys()) <= ALL_KNOWN_SUBSYSTEMS
         assert all(cgroupsPerSubsystem.values())
@@ -396,11 +411,17 @@ class Cgroup(object):
             paths = " ".join(map(util.escape_string_shell, paths))
             sys.exit(_ERROR_MSG_PERMISSIONS.format(permission_hint, paths))
 
-        elif _get_cgroup_version() == CGROUPS_V2:
-            sys.exit(_ERROR_MSG_CGROUPS_V2)
         else:
             sys.exit(_ERROR_MSG_OTHER)  # e.g., subsystem not mounted
 
+    def prepare_child_cgroups(self):
+        """
+        Prepare this cgroup of the current process such that child cgroups
+        can be created even after further processes were started in it.
+        This is only necessary for cgroups v2.
+        """
+        pass
+
     def create_fresh_child_cgroup(self, *subsystems):
         """
         Create child cgroups of the current cgroup for at least the given subsystems.
@@ -494,6 +515,9 @@ class Cgroup(object):
         for cgroup in self.paths:
             kill_all_tasks_in_cgroup_recursively(cgroup, delete=True)
 
+    def _get_file_name(self, subsystem, option):
+        return os.path.join(self.per_subsystem[subsystem], f"{subsystem}.{option}")
+
     def has_value(self, subsystem, option):
         """
         Check whether the given value exists in the given subsystem.
@@ -502,9 +526,7 @@ class Cgroup(object):
         Only call this method if the given subsystem is available.
         """
         assert subsystem in self
-        return os.path.isfile(
-            os.path.join(self.per_subsystem[subsystem], f"{subsystem}.{option}")
-        )
+        return os.path.isfile(self._get_file_name(subsystem, option))
 
     def get_value(self, subsystem, option):
         """
@@ -513,7 +535,7 @@ class Cgroup(object):
         Only call this method if the given subsystem is available.
         """
         assert subsystem in self, f"Subsystem {subsystem} is missing"
-        return util.read_file(self.per_subsystem[subsystem], f"{subsystem}.{option}")
+        return util.read_file(self._get_file_name(subsystem, option))
 
     def get_file_lines(self, subsystem, option):
         """
@@ -522,9 +544,7 @@ class Cgroup(object):
         Only call this method if the given subsystem is available.
         """
         assert subsystem in self
-        with open(
-            os.path.join(self.per_subsystem[subsystem], f"{subsystem}.{option}")
-        ) as f:
+        with open(self._get_file_name(subsystem, option)) as f:
             for line in f:
                 yield line
 
@@ -537,7 +557,7 @@ class Cgroup(object):
         """
         assert subsystem in self
         return util.read_key_value_pairs_from_file(
-            self.per_subsystem[subsystem], f"{subsystem}.{filename}"
+            self._get_file_name(subsystem, filename)
         )
 
     def set_value(self, subsystem, option, value):
@@ -547,9 +567,7 @@ class Cgroup(object):
         Only call this method if the given subsystem is available.
         """
         assert subsystem in self
-        util.write_file(
-            str(value), self.per_subsystem[subsystem], f"{subsystem}.{option}"
-        )
+        util.write_file(str(value), self._get_file_name(subsystem, option))
 
     def remove(self):
         """
@@ -562,6 +580,44 @@ class Cgroup(object):
         del self.paths
         del self.per_subsystem
 
+    def reset(self, parent):
+        """
+        Prepare this cgroup for being used by another run, such that it behaves like
+        a fresh child cgroup of the given parent: Reset all counters and the limits
+        that BenchExec sets. The cgroup must not contain any processes.
+        @param parent: the Cgroup instance from which this cgroup was created
+        @return whether the cgroup was reset successfully and can be reused
+        """
+        try:
+            if CPUACCT in self.per_subsystem:
+                self.set_value(CPUACCT, "usage", "0")
+
+            if MEMORY in self.per_subsystem:
+                # Memory of previous runs (e.g., page cache) is still charged
+                # to the cgroup and would be included in later measurements.
+                self.set_value(MEMORY, "force_empty", "0")
+                # The limit for RAM+swap needs to be raised first
+                # because it may not be smaller than the limit for RAM.
+                for limit in ["memsw.limit_in_bytes", "limit_in_bytes"]:
+                    if self.has_value(MEMORY, limit):
+                        self.set_value(MEMORY, limit, "-1")
+                for counter in ["memsw.max_usage_in_bytes", "max_usage_in_bytes"]:
+                    if self.has_value(MEMORY, counter):
+                        self.set_value(MEMORY, counter, "0")
+                # re-enable the kernel-side OOM killer as in a fresh cgroup
+                self.set_value(MEMORY, "oom_control", "0")
+
+            if BLKIO in self.per_subsystem:
+                self.set_value(BLKIO, "reset_stats", "1")
+
+            if CPUSET in self.per_subsystem:
+                for option in ["cpus", "mems"]:
+                    self.set_value(CPUSET, option, parent.get_value(CPUSET, option))
+        except OSError as e:
+            logging.debug("Cannot reset cgroup %s for reuse: %s", self, e)
+            return False
+        return True
+
     def read_cputime(self):
         """
         Read the cputime usage of this cgroup. CPUACCT cgroup needs to be available.
@@ -570,6 +626,147 @@ class Cgroup(object):
         # convert nano-seconds to seconds
         return float(self.get_value(CPUACCT, "usage")) / 1_000_000_000
 
+    def read_usage_per_cpu(self):
+        """
+        Read the cputime usage of this cgroup per CPU core.
+        CPUACCT cgroup needs to be available.
+        @return a dict from cores to cputime usage in seconds (only non-zero values)
+        """
+        usage = {}
+        for (core, coretime) in enumerate(
+            self.get_value(CPUACCT, "usage_percpu").split(" ")
+        ):
+            try:
+                coretime = int(coretime)
+                if coretime != 0:
+                    # convert nanoseconds to seconds
+                    usage[core] = coretime / 1_000_000_000
+            except (OSError, ValueError) as e:
+                logging.debug(
+                    "Could not read CPU time for core %s from kernel: %s", core, e
+                )
+        return usage
+
+    def read_max_mem_usage(self):
+        """
+        Read the peak memory usage of this cgroup in bytes, or None if not available.
+        MEMORY cgroup needs to be available.
+        """
+        # This measurement reads the maximum number of bytes of RAM+Swap the process used.
+        # For more details, c.f. the kernel documentation:
+        # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
+        memUsageFile = "memsw.max_usage_in_bytes"
+        if not self.has_value(MEMORY, memUsageFile):
+            memUsageFile = "max_usage_in_bytes"
+        if not self.has_value(MEMORY, memUsageFile):
+            logging.warning("Memory-usage is not available due to missing files.")
+            return None
+        try:
+            return int(self.get_value(MEMORY, memUsageFile))
+        except OSError as e:
+            if e.errno == errno.ENOTSUP:
+                # kernel responds with operation unsupported if this is disabled
+                logging.critical(
+                    "Kernel does not track swap memory usage, cannot measure memory usage."
+                    " Please set swapaccount=1 on your kernel command line."
+                )
+                return None
+            raise e
+
+    def read_io_stat(self):
+        """
+        Read the number of bytes read and written by this cgroup,
+        or None if not available. BLKIO cgroup needs to be available.
+        @return a tuple of bytes read and bytes written
+        """
+        blkio_bytes_file = "throttle.io_service_bytes"
+        if not self.has_value(BLKIO, blkio_bytes_file):
+            return None
+        bytes_read = 0
+        bytes_written = 0
+        for blkio_line in self.get_file_lines(BLKIO, blkio_bytes_file):
+            try:
+                dev_no, io_type, bytes_amount = blkio_line.split(" ")
+                if io_type == "Read":
+                    bytes_read += int(bytes_amount)
+                elif io_type == "Write":
+                    bytes_written += int(bytes_amount)
+            except ValueError:
+                pass  # There are irrelevant lines in this file with a different structure
+        return bytes_read, bytes_written
+
+    def has_swap_accounting(self):
+        """
+        Check whether the kernel accounts swap memory for this cgroup.
+        MEMORY cgroup needs to be available.
+        """
+        return self.has_value(MEMORY, "memsw.max_usage_in_bytes")
+
+    def set_memory_limit(self, memlimit):
+        """
+        Limit the memory (RAM and swap) of this cgroup.
+        MEMORY cgroup needs to be available.
+        @param memlimit: the memory limit in bytes
+        @return the effective memory limit in bytes as reported by the kernel
+        """
+        limit = "limit_in_bytes"
+        self.set_value(MEMORY, limit, memlimit)
+
+        swap_limit = "memsw.limit_in_bytes"
+        # We need swap limit because otherwise the kernel just starts swapping
+        # out our process if the limit is reached.
+        # Some kernels might not have this feature,
+        # which is ok if there is actually no swap.
+        if not self.has_value(MEMORY, swap_limit):
+            if systeminfo.has_swap():
+                sys.exit(
+                    'Kernel misses feature for accounting swap memory, but machine has swap. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
+                )
+        else:
+            try:
+                self.set_value(MEMORY, swap_limit, memlimit)
+            except OSError as e:
+                if e.errno == errno.ENOTSUP:
+                    # kernel responds with operation unsupported if this is disabled
+                    sys.exit(
+                        'Memory limit specified, but kernel does not allow limiting swap memory. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
+                    )
+                raise e
+
+        return int(self.get_value(MEMORY, limit))
+
+    def disable_swap(self):
+        """
+        Prevent that the processes in this cgroup are swapped out.
+        MEMORY cgroup needs to be available.
+        """
+        try:
+            # Note that this disables swapping completely according to
+            # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
+            # (unlike setting the global swappiness to 0).
+            # Our process might get killed because of this.
+            self.set_value(MEMORY, "swappiness", "0")
+        except OSError as e:
+            logging.warning("Could not disable swapping for benchmarked process: %s", e)
+
+    def read_memory_limits(self):
+        """
+        Read the limits for memory (and RAM plus swap) that apply to this cgroup,
+        including those of parent cgroups. MEMORY cgroup needs to be available.
+        @return a list of limits in bytes
+        """
+        # We use the entries hierarchical_*_limit in memory.stat and not memory.*limit_in_bytes
+        # because the former may be lower if memory.use_hierarchy is enabled.
+        return [
+            int(value)
+            for key, value in self.get_key_value_pairs(MEMORY, "stat")
+            if key == "hierarchical_memory_limit" or key == "hierarchical_memsw_limit"
+        ]
+
+    def read_allowed_cpus(self):
+        """Get the list of all CPU cores allowed by this cgroup."""
+        return util.parse_int_list(self.get_value(CPUSET, "cpus"))
+
     def read_allowed_memory_banks(self):
         """Get the list of all memory banks allowed by this cgroup."""
         return util.parse_int_list(self.get_value(CPUSET, "mems"))
@@ -0,0 +1,487 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains the support for cgroups v2 (the unified hierarchy),
+c.f. https://www.kernel.org/doc/html/latest/admin-guide/cgroup-v2.html
+All subsystems are in a single hierarchy, such that each run has a single cgroup.
+The subsystem names of cgroups v1 are used for the corresponding controllers
+in order to provide the same interface as the class cgroups.Cgroup.
+"""
+
+import atexit
+import errno
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchexec import systeminfo
+from benchexec import util
+from benchexec.cgroups import (
+    ALL_KNOWN_SUBSYSTEMS,
+    BLKIO,
+    CGROUP_NAME_PREFIX,
+    CGROUPS_V2,
+    CPUACCT,
+    CPUSET,
+    FREEZER,
+    MEMORY,
+    Cgroup,
+    kill_all_tasks_in_cgroup,
+)
+
+CGROUP_PROCESS_NAME_PREFIX = "benchexec_process_"
+"""Prefix of the cgroup into which BenchExec moves its own process,
+because cgroups with processes cannot enable controllers for child cgroups.
+This cgroup is removed again when BenchExec terminates."""
+
+_process_cgroups = []
+"""List of (parent cgroup, process cgroup) for each cgroup that BenchExec created
+for its own process."""
+
+_enable_controllers_lock = threading.Lock()
+
+# Controllers that need to be enabled for each subsystem,
+# CPU-time measurements and freezing are available without controller.
+_CONTROLLER_OF_SUBSYSTEM = {
+    BLKIO: "io",
+    CPUACCT: None,
+    FREEZER: None,
+}
+
+# Prefixes of the files for each subsystem
+_FILE_PREFIX_OF_SUBSYSTEM = {
+    BLKIO: "io",
+    CPUACCT: "cpu",
+    FREEZER: "cgroup",
+}
+
+_KILL_TIMEOUT = 1  # seconds to wait until processes killed with cgroup.kill are gone
+
+_ERROR_MSG = """
+Required cgroups are not available.
+On systems with cgroups v2, BenchExec needs a cgroup that is delegated to the current user
+and in which the controllers {0} are available.
+Currently, BenchExec uses the cgroup {1}.
+On systems with systemd, such a cgroup can be created by starting BenchExec with
+"systemd-run --user --scope --slice=benchexec -p Delegate=yes benchexec ..."
+If you are using BenchExec within a container, please make "/sys/fs/cgroup" available."""
+
+
+def _remove_process_cgroups():
+    """
+    Move the processes of BenchExec back from the cgroups that were created for them
+    and remove these cgroups. For this the controllers that were enabled for child
+    cgroups are disabled again, i.e., the original state of the parent cgroup
+    is restored. If this fails (e.g., because BenchExec is killed), the cgroup is left
+    behind and is removed together with its parent, e.g., by systemd.
+    """
+    while _process_cgroups:
+        parent, cgroup = _process_cgroups.pop()
+        try:
+            # Processes can only be moved back into a cgroup
+            # without enabled controllers for child cgroups.
+            controllers = util.read_file(parent, "cgroup.subtree_control").split()
+            if controllers:
+                util.write_file(
+                    " ".join("-" + controller for controller in controllers),
+                    parent,
+                    "cgroup.subtree_control",
+                )
+            for pid in util.read_file(cgroup, "cgroup.procs").split():
+                util.write_file(pid, parent, "cgroup.procs")
+            os.rmdir(cgroup)
+            logging.debug("Removed cgroup %s of BenchExec process.", cgroup)
+        except OSError as e:
+            logging.debug("Could not remove cgroup %s of BenchExec: %s", cgroup, e)
+
+
+def find_my_cgroups(cgroup_paths=None):
+    """
+    Return a CgroupV2 object with the cgroup of the current process,
+    c.f. cgroups.find_my_cgroups().
+    @param cgroup_paths: If given, use this instead of reading /proc/self/cgroup.
+    """
+    mount = _find_cgroup_mount()
+    if mount is None:
+        return CgroupV2(None, set())
+
+    if cgroup_paths is None:
+        try:
+            with open("/proc/self/cgroup", "rt") as ownCgroupsFile:
+                cgroup_paths = list(ownCgroupsFile)
+        except OSError:
+            logging.exception("Cannot read /proc/self/cgroup")
+            cgroup_paths = []
+
+    for line in cgroup_paths:
+        # the line for cgroups v2 is "0::path"
+        hierarchy_id, _, path = line.strip().split(":", 2)
+        if hierarchy_id == "0":
+            cgroup = os.path.normpath(mount + path)
+            for parent, process_cgroup in _process_cgroups:
+                if cgroup == process_cgroup:
+                    # BenchExec moved itself into this cgroup,
+                    # but runs need to be created in the original cgroup.
+                    cgroup = parent
+            return CgroupV2(cgroup, _read_available_subsystems(cgroup))
+    return CgroupV2(None, set())
+
+
+def _find_cgroup_mount():
+    try:
+        with open("/proc/mounts", "rt") as mountsFile:
+            for mount in mountsFile:
+                mount = mount.split(" ")
+                if mount[2] == "cgroup2":
+                    return mount[1]
+    except OSError:
+        logging.exception("Cannot read /proc/mounts")
+    return None
+
+
+def _read_available_subsystems(cgroup):
+    """Return the subsystems that can be used in the given cgroup."""
+    try:
+        controllers = set(util.read_file(cgroup, "cgroup.controllers").split())
+    except OSError:
+        return set()
+    subsystems = {CPUACCT}
+    if os.path.exists(os.path.join(cgroup, "cgroup.freeze")):
+        subsystems.add(FREEZER)
+    for subsystem in ALL_KNOWN_SUBSYSTEMS:
+        if _CONTROLLER_OF_SUBSYSTEM.get(subsystem, subsystem) in controllers:
+            subsystems.add(subsystem)
+    return subsystems
+
+
+class CgroupV2(Cgroup):
+    """
+    The cgroup of a process or run on a system with cgroups v2.
+    This provides the same interface as cgroups.Cgroup,
+    but all subsystems share the same cgroup.
+    """
+
+    version = CGROUPS_V2
+
+    def __init__(self, path, subsystems):
+        super(CgroupV2, self).__init__({subsystem: path for subsystem in subsystems})
+        self.path = path
+
+    def _get_file_name(self, subsystem, option):
+        prefix = _FILE_PREFIX_OF_SUBSYSTEM.get(subsystem, subsystem)
+        return os.path.join(self.path, f"{prefix}.{option}")
+
+    def handle_errors(self, critical_cgroups):
+        """
+        If there were errors in calls to require_subsystem() and critical_cgroups
+        is not empty, terminate the program with an error message that explains how to
+        fix the problem.
+
+        @param critical_cgroups: set of unusable but required cgroups
+        """
+        if not critical_cgroups:
+            return
+        assert critical_cgroups.issubset(self.unusable_subsystems)
+        controllers = sorted(
+            _CONTROLLER_OF_SUBSYSTEM.get(subsystem, subsystem) or subsystem
+            for subsystem in critical_cgroups
+        )
+        sys.exit(_ERROR_MSG.format(", ".join(controllers), self.path))
+
+    def create_fresh_child_cgroup(self, *subsystems):
+        """
+        Create a child cgroup of the current cgroup for at least the given subsystems.
+        @return: A CgroupV2 instance representing the new child cgroup.
+        """
+        assert set(subsystems).issubset(self.per_subsystem.keys())
+        self._enable_controllers(subsystems)
+        cgroup = tempfile.mkdtemp(prefix=CGROUP_NAME_PREFIX, dir=self.path)
+        return CgroupV2(cgroup, set(subsystems))
+
+    def prepare_child_cgroups(self):
+        """
+        Make all subsystems of this cgroup available in child cgroups,
+        which moves the BenchExec process into a child cgroup if necessary.
+        This needs to be called before BenchExec starts any helper processes,
+        because processes other than BenchExec in this cgroup prevent this.
+        Subsystems that cannot be made available are reported later on
+        by require_subsystem().
+        """
+        for subsystem in sorted(self.per_subsystem):
+            try:
+                self._enable_controllers([subsystem])
+            except OSError as e:
+                logging.debug(
+                    "Cannot enable subsystem %s for child cgroups of %s: %s",
+                    subsystem,
+                    self.path,
+                    e,
+                )
+
+    def _enable_controllers(self, subsystems):
+        """Make the controllers of the given subsystems available in child cgroups."""
+        controllers = {
+            _CONTROLLER_OF_SUBSYSTEM.get(subsystem, subsystem)
+            for subsystem in subsystems
+        }
+        controllers.discard(None)
+        with _enable_controllers_lock:
+            enabled = set(util.read_file(self.path, "cgroup.subtree_control").split())
+            missing = controllers - enabled
+            if not missing:
+                return
+
+            # Controllers can only be enabled for child cgroups
+            # if there are no processes in this cgroup.
+            processes = set(self.get_all_tasks())
+            if processes:
+                if processes != {os.getpid()}:
+                    raise OSError(
+                        errno.EBUSY,
+                        f"Cgroup {self.path} contains processes other than BenchExec",
+                    )
+                cgroup = tempfile.mkdtemp(
+                    prefix=CGROUP_PROCESS_NAME_PREFIX, dir=self.path
+                )
+                util.write_file(str(os.getpid()), cgroup, "cgroup.procs")
+                logging.debug("Moved BenchExec process to cgroup %s.", cgroup)
+                if not _process_cgroups:
+                    atexit.register(_remove_process_cgroups)
+                _process_cgroups.append((self.path, cgroup))
+
+            util.write_file(
+                " ".join("+" + controller for controller in sorted(missing)),
+                self.path,
+                "cgroup.subtree_control",
+            )
+
+    def add_task(self, pid):
+        """
+        Add a process to the cgroup represented by this instance.
+        """
+        util.write_file(str(pid), self.path, "cgroup.procs")
+
+    def get_all_tasks(self, subsystem=None):
+        """
+        Return a generator of all PIDs currently in this cgroup.
+        """
+        with open(os.path.join(self.path, "cgroup.procs"), "r") as tasksFile:
+            for line in tasksFile:
+                yield int(line)
+
+    def kill_all_tasks(self):
+        """
+        Kill all tasks in this cgroup and all its children cgroups forcefully.
+        Additionally, the children cgroups will be deleted.
+        """
+        if os.path.exists(os.path.join(self.path, "cgroup.kill")):
+            # Kills all processes in this cgroup and its children atomically.
+            util.write_file("1", self.path, "cgroup.kill")
+            self._wait_until_empty()
+        else:
+            # Freezing prevents that processes create new processes
+            # while we are killing them.
+            util.write_file("1", self.path, "cgroup.freeze")
+            for dirpath, dirs, _files in os.walk(self.path, topdown=False):
+                for subCgroup in dirs:
+                    kill_all_tasks_in_cgroup(
+                        os.path.join(dirpath, subCgroup),
+                        ensure_empty=False,
+                        tasks_file="cgroup.procs",
+                    )
+            kill_all_tasks_in_cgroup(
+                self.path, ensure_empty=False, tasks_file="cgroup.procs"
+            )
+            util.write_file("0", self.path, "cgroup.freeze")
+
+        # Check for emptiness and kill what is left (if anything),
+        # and remove child cgroups.
+        for dirpath, dirs, _files in os.walk(self.path, topdown=False):
+            for subCgroup in dirs:
+                subCgroup = os.path.join(dirpath, subCgroup)
+                kill_all_tasks_in_cgroup(subCgroup, tasks_file="cgroup.procs")
+                _remove_cgroup(subCgroup)
+        kill_all_tasks_in_cgroup(self.path, tasks_file="cgroup.procs")
+
+    def _wait_until_empty(self):
+        deadline = time.monotonic() + _KILL_TIMEOUT
+        while time.monotonic() < deadline:
+            for key, value in util.read_key_value_pairs_from_file(
+                self.path, "cgroup.events"
+            ):
+                if key == "populated" and int(value) == 0:
+                    return
+            time.sleep(0.001)
+        logging.warning(
+            "Cgroup %s still contains processes %s seconds after killing them.",
+            self.path,
+            _KILL_TIMEOUT,
+        )
+
+    def remove(self):
+        """
+        Remove the cgroup this instance represents from the system.
+        This instance is afterwards not usable anymore!
+        """
+        _remove_cgroup(self.path)
+
+        del self.paths
+        del self.per_subsystem
+
+    def reset(self, parent):
+        """
+        Prepare this cgroup for being used by another run,
+        which is not possible with cgroups v2 because counters like memory.peak
+        cannot be reset.
+        @return False
+        """
+        return False
+
+    def read_cputime(self):
+        """
+        Read the cputime usage of this cgroup.
+        @return cputime usage in seconds
+        """
+        for key, value in self.get_key_value_pairs(CPUACCT, "stat"):
+            if key == "usage_usec":
+                # convert micro-seconds to seconds
+                return int(value) / 1_000_000
+        raise ValueError(f"Missing usage_usec in cpu.stat of {self.path}")
+
+    def read_usage_per_cpu(self):
+        """
+        Read the cputime usage of this cgroup per CPU core,
+        which is not available with cgroups v2.
+        @return an empty dict
+        """
+        return {}
+
+    def read_max_mem_usage(self):
+        """
+        Read the peak memory usage of this cgroup in bytes, or None if not available.
+        MEMORY cgroup needs to be available.
+        """
+        # Swap is disabled for runs, so this is the peak of RAM and swap.
+        if not self.has_value(MEMORY, "peak"):
+            logging.warning(
+                "Memory-usage is not available due to missing files "
+                "(memory.peak requires Linux 5.19 or newer)."
+            )
+            return None
+        return int(self.get_value(MEMORY, "peak"))
+
+    def read_io_stat(self):
+        """
+        Read the number of bytes read and written by this cgroup,
+        or None if not available. BLKIO cgroup needs to be available.
+        @return a tuple of bytes read and bytes written
+        """
+        if not self.has_value(BLKIO, "stat"):
+            return None
+        bytes_read = 0
+        bytes_written = 0
+        for io_line in self.get_file_lines(BLKIO, "stat"):
+            # each line is "dev_no key=value key=value ..."
+            for entry in io_line.split()[1:]:
+                key, _, value = entry.partition("=")
+                if key == "rbytes":
+                    bytes_read += int(value)
+                elif key == "wbytes":
+                    bytes_written += int(value)
+        return bytes_read, bytes_written
+
+    def has_swap_accounting(self):
+        """
+        Check whether the kernel accounts swap memory for this cgroup.
+        MEMORY cgroup needs to be available.
+        """
+        return self.has_value(MEMORY, "swap.max")
+
+    def set_memory_limit(self, memlimit):
+        """
+        Limit the memory (RAM and swap) of this cgroup.
+        MEMORY cgroup needs to be available.
+        @param memlimit: the memory limit in bytes
+        @return the effective memory limit in bytes as reported by the kernel
+        """
+        self.set_value(MEMORY, "max", memlimit)
+
+        # We need to disable swap because otherwise the kernel just starts swapping
+        # out our process if the limit is reached.
+        # Some kernels might not have this feature,
+        # which is ok if there is actually no swap.
+        if self.has_swap_accounting():
+            self.set_value(MEMORY, "swap.max", "0")
+        elif systeminfo.has_swap():
+            sys.exit(
+                'Kernel misses feature for accounting swap memory, but machine has swap. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
+            )
+
+        # Let the kernel kill all processes of the run if one of them is killed
+        # because of the limit, instead of leaving the remaining ones running.
+        if self.has_value(MEMORY, "oom.group"):
+            self.set_value(MEMORY, "oom.group", "1")
+
+        return int(self.get_value(MEMORY, "max"))
+
+    def disable_swap(self):
+        """
+        Prevent that the processes in this cgroup are swapped out.
+        MEMORY cgroup needs to be available.
+        """
+        if self.has_swap_accounting():
+            try:
+                self.set_value(MEMORY, "swap.max", "0")
+            except OSError as e:
+                logging.warning(
+                    "Could not disable swapping for benchmarked process: %s", e
+                )
+
+    def read_memory_limits(self):
+        """
+        Read the memory limits that apply to this cgroup,
+        including those of parent cgroups. MEMORY cgroup needs to be available.
+        @return a list of limits in bytes
+        """
+        limits = []
+        path = self.path
+        # the root cgroup has no memory.max
+        while os.path.isfile(os.path.join(path, "memory.max")):
+            value = util.read_file(path, "memory.max")
+            if value != "max":
+                limits.append(int(value))
+            path = os.path.dirname(path)
+        return limits
+
+    def read_allowed_cpus(self):
+        """Get the list of all CPU cores allowed by this cgroup."""
+        return util.parse_int_list(self.get_value(CPUSET, "cpus.effective"))
+
+    def read_allowed_memory_banks(self):
+        """Get the list of all memory banks allowed by this cgroup."""
+        return util.parse_int_list(self.get_value(CPUSET, "mems.effective"))
+
+
+def _remove_cgroup(cgroup):
+    if not os.path.exists(cgroup):
+        logging.warning("Cannot remove CGroup %s, because it does not exist.", cgroup)
+        return
+    try:
+        os.rmdir(cgroup)
+    except OSError:
+        # sometimes this fails because the cgroup is still busy, we try again once
+        time.sleep(0.1)
+        try:
+            os.rmdir(cgroup)
+        except OSError as e:
+            logging.warning(
+                "Failed to remove cgroup %s: error %s (%s)", cgroup, e.errno, e.strerror
+            )
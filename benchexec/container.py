@@ -8,6 +8,8 @@
 """Utility functions for implementing a container using Linux namespaces
 and for appropriately configuring such a container."""
 
+import collections
+import concurrent.futures
 import contextlib
 import ctypes
 import errno
@@ -15,10 +17,12 @@ import fcntl
 import logging
 import os
 import resource  # noqa: F401 @UnusedImport necessary to eagerly import this module
+import select
 import signal
 import socket
 import struct
 import sys
+import threading
 
 from benchexec import libc
 from benchexec import seccomp
@@ -26,6 +30,7 @@ from benchexec import util
 
 __all__ = [
     "execute_in_namespace",
+    "get_network_namespace_pool",
     "setup_user_mapping",
     "activate_network_interface",
     "duplicate_mount_hierarchy",
@@ -54,6 +59,9 @@ CONTAINER_GID = 1000
 CONTAINER_HOME = "/home/benchexec"
 CONTAINER_HOSTNAME = "benchexec"
 
+NETWORK_NAMESPACE_POOL_SIZE = 2
+"""Number of network namespaces that are kept ready for the next child processes."""
+
 CONTAINER_ETC_NSSWITCH_CONF = """
 passwd: files
 group: files
@@ -146,10 +154,14 @@ def allocate_stack(size=DEFAULT_STACK_SIZE):
         libc.munmap(base, size + PAGE_SIZE)
 
 
-def execute_in_namespace(func, use_network_ns=True):
+def execute_in_namespace(func, use_network_ns=True, network_ns_fd=None):
     """Execute a function in a child process in separate namespaces.
     @param func: a parameter-less function returning an int
         (which will be the process' exit value)
+    @param use_network_ns: whether the child should get its own network namespace
+    @param network_ns_fd: if given, a file descriptor of an existing network namespace
+        that the child should use instead of a new one
+        (e.g., from a NetworkNamespacePool)
     @return: the PID of the created child process
     """
     flags = (
@@ -160,7 +172,7 @@ def execute_in_namespace(func, use_network_ns=True):
         | libc.CLONE_NEWUSER
         | libc.CLONE_NEWPID
     )
-    if use_network_ns:
+    if use_network_ns and network_ns_fd is None:
         flags |= libc.CLONE_NEWNET
 
     # We need to use the syscall clone(), which is similar to fork(), but not available
@@ -196,16 +208,24 @@ def execute_in_namespace(func, use_network_ns=True):
     # and we expect practically all BenchExec users to fall in this category. For others
     # there is still the pure Python callback, which in practice works totally fine as
     # long as there does not exist a huge number of threads.
-    # There is a workaround using sys.setswitchinterval(), however, it is too late to
-    # apply it here in this function, because gil_drop_request could already be set.
+    # Furthermore, ContainerExecutor calls this function from a zygote process
+    # (cf. zygote.py), which has only one thread, so there is no thread contention.
+    # If the zygote cannot be used, ContainerExecutor calls this function directly
+    # and uses a workaround with sys.setswitchinterval() from then on. However, it is
+    # too late to apply it here in this function, because gil_drop_request could
+    # already be set, so the first run without zygote is still unprotected.
     # Summary:
     # - For Linux x86_64 we use native code from _generate_native_clone_child_callback()
-    # - Otherwise, we use sys.setswitchinterval() as workaround in localexecution.py.
-    # - Direct users of ContainerExecutor are fine in practice if they use few threads.
+    # - ContainerExecutor uses a single-threaded zygote process if possible.
+    # - Otherwise, ContainerExecutor uses sys.setswitchinterval() as workaround.
+    # - Other callers are fine in practice if they use few threads.
 
     func_p = _CLONE_NESTED_CALLBACK(func)  # store in variable to avoid GC
 
-    with allocate_stack() as stack:
+    with contextlib.ExitStack() as stack_of_contexts:
+        if use_network_ns and network_ns_fd is not None:
+            stack_of_contexts.enter_context(_joined_network_namespace(network_ns_fd))
+        stack = stack_of_contexts.enter_context(allocate_stack())
         try:
             ctypes.pythonapi.PyOS_BeforeFork()
             pid = libc.clone(_clone_child_callback, stack, flags, func_p)
@@ -214,6 +234,142 @@ def execute_in_namespace(func, use_network_ns=True):
     return pid
 
 
+@contextlib.contextmanager
+def _joined_network_namespace(network_ns_fd):
+    """
+    Let the current thread join the given network namespace temporarily.
+    Network namespaces are a property of each thread, so other threads are not affected
+    and child processes created by this thread inherit the namespace.
+    """
+    original_ns = os.open("/proc/thread-self/ns/net", os.O_RDONLY)
+    try:
+        libc.setns(network_ns_fd, libc.CLONE_NEWNET)
+        try:
+            yield
+        finally:
+            libc.setns(original_ns, libc.CLONE_NEWNET)
+    finally:
+        os.close(original_ns)
+
+
+def _create_network_namespace():
+    """
+    Create a new network namespace with an active loopback interface
+    and return a file descriptor for it.
+    The current thread temporarily joins the new namespace,
+    so this should be called only in threads dedicated to this purpose.
+    """
+    original_ns = os.open("/proc/thread-self/ns/net", os.O_RDONLY)
+    try:
+        libc.unshare(libc.CLONE_NEWNET)
+        try:
+            network_ns_fd = os.open("/proc/thread-self/ns/net", os.O_RDONLY)
+            try:
+                activate_network_interface("lo")
+            except BaseException:
+                os.close(network_ns_fd)
+                raise
+        finally:
+            libc.setns(original_ns, libc.CLONE_NEWNET)
+    finally:
+        os.close(original_ns)
+    return network_ns_fd
+
+
+class NetworkNamespacePool(object):
+    """
+    A pool of network namespaces with only an active loopback interface,
+    which can be passed to execute_in_namespace() such that creating a new network
+    namespace is not part of the startup of each child process.
+    Namespaces are created and destroyed asynchronously in a background thread.
+    Each namespace is used for only one child process
+    and destroyed as soon as all processes in it have terminated.
+    Creating network namespaces in advance requires CAP_SYS_ADMIN,
+    so this is typically only available if BenchExec is executed as root.
+    Use create_if_supported() to create instances.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._lock = threading.Lock()
+        self._namespaces = collections.deque()
+        self._pending = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="BenchExec-netns"
+        )
+
+    @classmethod
+    def create_if_supported(cls, size=NETWORK_NAMESPACE_POOL_SIZE):
+        """
+        Create a pool if network namespaces can be created in advance on this system.
+        @return: a NetworkNamespacePool instance or None
+        """
+        pool = cls(size)
+        try:
+            network_ns_fd = pool._executor.submit(_create_network_namespace).result()
+        except OSError as e:
+            logging.debug("Cannot create network namespaces in advance: %s", e)
+            pool._executor.shutdown(wait=False)
+            return None
+        pool._namespaces.append(network_ns_fd)
+        pool._fill()
+        return pool
+
+    def get(self):
+        """
+        Take a namespace from the pool, which should be passed to release() afterwards.
+        @return: a file descriptor of the namespace,
+            or None if the pool is currently empty
+        """
+        with self._lock:
+            network_ns_fd = self._namespaces.popleft() if self._namespaces else None
+        self._fill()
+        return network_ns_fd
+
+    def release(self, network_ns_fd):
+        """
+        Release a namespace that was taken from the pool.
+        It is destroyed by the kernel once all processes in it have terminated.
+        """
+        self._executor.submit(os.close, network_ns_fd)
+
+    def _fill(self):
+        with self._lock:
+            missing = self._size - len(self._namespaces) - self._pending
+            self._pending += max(missing, 0)
+        for _ in range(missing):
+            self._executor.submit(self._add_new_namespace)
+
+    def _add_new_namespace(self):
+        try:
+            network_ns_fd = _create_network_namespace()
+        except OSError as e:
+            logging.warning("Creating network namespace in advance failed: %s", e)
+            network_ns_fd = None
+        with self._lock:
+            self._pending -= 1
+            if network_ns_fd is not None:
+                self._namespaces.append(network_ns_fd)
+
+
+_network_namespace_pool = None
+_network_namespace_pool_checked = False
+_network_namespace_pool_lock = threading.Lock()
+
+
+def get_network_namespace_pool():
+    """
+    Return the NetworkNamespacePool that is shared by all users of this module,
+    or None if network namespaces cannot be created in advance on this system.
+    """
+    global _network_namespace_pool, _network_namespace_pool_checked
+    with _network_namespace_pool_lock:
+        if not _network_namespace_pool_checked:
+            _network_namespace_pool = NetworkNamespacePool.create_if_supported()
+            _network_namespace_pool_checked = True
+        return _network_namespace_pool
+
+
 @libc.CLONE_CALLBACK
 def _python_clone_child_callback(func_p):
     """Used as callback for clone, calls the passed function pointer."""
@@ -223,8 +379,10 @@ def _python_clone_child_callback(func_p):
     # world, so it could be too late. For more information cf. execute_in_namespace()
     # and https://github.com/sosy-lab/benchexec/issues/435.
     # Thus we use this function only as fallback of architectures where we have no
-    # native callback. For benchexec we combine it with the sys.setswitchinterval()
-    # workaround in localexecution.py. Other users of ContainerExecutor should be safe
+    # native callback. ContainerExecutor calls clone from its single-threaded
+    # zygote process if possible, where this is safe. Otherwise, it combines this
+    # with a workaround using sys.setswitchinterval().
+    # Other callers should be safe
     # as long as they do not use many threads. We cannot do anything before cloning
     # because it might be too late anyway (gil_drop_request could be set already).
     ctypes.pythonapi.PyOS_AfterFork_Child()
@@ -396,7 +554,85 @@ def activate_network_interface(iface):
         sock.close()
 
 
-def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
+class MountPlan(object):
+    """
+    The directory modes that duplicate_mount_hierarchy() applies to all mount points
+    of the system, which depend only on the mount table and the directory modes
+    and can thus be determined once and reused for all runs.
+    The plan knows whether the mount table of the system has changed since
+    it was created, in which case it needs to be replaced with a new plan.
+
+    @param dir_modes: the directory modes to apply
+    """
+
+    def __init__(self, dir_modes):
+        # The kernel signals changes of the mount table with POLLPRI on this file.
+        # It needs to be opened before reading the mount table to avoid missing changes.
+        self._mounts_file = open("/proc/self/mounts", "rb")
+        self._poll = select.poll()
+        self._poll.register(self._mounts_file, select.POLLPRI)
+
+        self._plan = {}
+        for _unused_source, mountpoint, fstype, _unused_options in get_mount_points():
+            self._plan[(mountpoint, fstype)] = plan_mount_point(
+                dir_modes, mountpoint, fstype
+            )
+
+    def get(self, mountpoint, fstype):
+        """
+        Return the result of plan_mount_point() for the given mount point,
+        or None if it was not mounted when the plan was created.
+        """
+        return self._plan.get((mountpoint, fstype))
+
+    def is_outdated(self):
+        """Check whether the mount table has changed since the plan was created."""
+        return bool(self._poll.poll(0))
+
+    def fileno(self):
+        return self._mounts_file.fileno()
+
+    def close(self):
+        self._mounts_file.close()
+
+
+def plan_mount_point(dir_modes, mountpoint, fstype):
+    """
+    Determine what duplicate_mount_hierarchy() should do for a given mount point.
+    @param dir_modes: the directory modes to apply
+    @param mountpoint: the mount point (as bytes, without prefix of mount base)
+    @param fstype: the file system of the mount point
+    @return a tuple of the mode to apply (or None) and the mount point to apply it to,
+        which is a parent directory if the mount point is not accessible
+    """
+    mode = determine_directory_mode(dir_modes, mountpoint, fstype)
+    if not mode:
+        return None, mountpoint
+
+    if not os.access(os.path.dirname(mountpoint), os.X_OK):
+        # If parent is not accessible we cannot mount something on mountpoint.
+        # We mark the inaccessible directory as hidden
+        # because otherwise the mountpoint could become accessible (directly!)
+        # if the permissions on the parent are relaxed during container execution.
+        original_mountpoint = mountpoint
+        parent = os.path.dirname(mountpoint)
+        while not os.access(parent, os.X_OK):
+            mountpoint = parent
+            parent = os.path.dirname(mountpoint)
+        logging.debug(
+            "Marking inaccessible directory '%s' as hidden "
+            "because it contains a mountpoint at '%s'",
+            mountpoint.decode(),
+            original_mountpoint.decode(),
+        )
+        return DIR_HIDDEN, mountpoint
+
+    return mode, mountpoint
+
+
+def duplicate_mount_hierarchy(
+    mount_base, temp_base, work_base, dir_modes, mount_plan=None
+):
     """
     Setup a copy of the system's mount hierarchy below a specified directory,
     and apply all specified directory modes (e.g., read-only access or hidden)
@@ -406,6 +642,8 @@ def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
     @param temp_base: the base directory for all temporary files
     @param work_base: the base directory for all overlayfs work files
     @param dir_modes: the directory modes to apply (without mount_base prefix)
+    @param mount_plan: None or a MountPlan for dir_modes that is used for all
+        mount points that it knows
     """
     # Create a copy of all mountpoints.
     # Setting MS_PRIVATE flag discouples the new mounts from the original mounts,
@@ -444,28 +682,16 @@ def duplicate_mount_hierarchy(mount_base, temp_base, work_base, dir_modes):
     for _unused_source, full_mountpoint, fstype, options in list(get_mount_points()):
         if not util.path_is_below(full_mountpoint, mount_base):
             continue
-        mountpoint = full_mountpoint[len(mount_base) :] or b"/"
-        mode = determine_directory_mode(dir_modes, mountpoint, fstype)
+        original_mountpoint = full_mountpoint[len(mount_base) :] or b"/"
+        planned = mount_plan and mount_plan.get(original_mountpoint, fstype)
+        if planned is None:
+            # not mounted when the plan was created, e.g., bind mounts of dir_modes
+            planned = plan_mount_point(dir_modes, original_mountpoint, fstype)
+        mode, mountpoint = planned
         if not mode:
             continue
 
-        if not os.access(os.path.dirname(mountpoint), os.X_OK):
-            # If parent is not accessible we cannot mount something on mountpoint.
-            # We mark the inaccessible directory as hidden
-            # because otherwise the mountpoint could become accessible (directly!)
-            # if the permissions on the parent are relaxed during container execution.
-            original_mountpoint = mountpoint
-            parent = os.path.dirname(mountpoint)
-            while not os.access(parent, os.X_OK):
-                mountpoint = parent
-                parent = os.path.dirname(mountpoint)
-            mode = DIR_HIDDEN
-            logging.debug(
-                "Marking inaccessible directory '%s' as hidden "
-                "because it contains a mountpoint at '%s'",
-                mountpoint.decode(),
-                original_mountpoint.decode(),
-            )
+        if mountpoint != original_mountpoint:
             # Creating the following directory will make original_mountpoint appear as
             # empty directory in the container. This is useful because otherwise the
             # kernel will show a mountpoint for a non-existing directory.
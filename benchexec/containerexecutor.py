@@ -7,10 +7,12 @@
 
 import argparse
 import errno
+import fnmatch
 import glob
 import logging
 import os
 import collections
+import concurrent.futures
 import shutil
 import pickle
 import signal
@@ -26,6 +28,7 @@ from benchexec.cgroups import Cgroup
 from benchexec import container
 from benchexec import libc
 from benchexec import util
+from benchexec import zygote
 from benchexec.container import (
     DIR_MODES,
     DIR_HIDDEN,
@@ -38,8 +41,23 @@ from benchexec.container import (
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
 
 _MAX_RESULT_FILE_LOG_COUNT = 1000
+_RESULT_FILE_COPY_THREADS = 4
+_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Error codes from child to parent
+_CHILD_OSERROR = 128
+_CHILD_UNKNOWN_ERROR = 129
+
+# Markers that the parent sends to child and grandchild,
+# cf. ContainerExecutor._start_execution_in_container()
+_MARKER_USER_MAPPING_COMPLETED = b"A"
+_MARKER_PARENT_COMPLETED = b"B"
+_MARKER_PARENT_POST_RUN_COMPLETED = b"C"
 """How many result files to log at most."""
 
+# whether _enable_switch_interval_workaround() was called
+_switch_interval_workaround_enabled = False
+
 
 def add_basic_container_args(argument_parser):
     argument_parser.add_argument(
@@ -293,6 +311,24 @@ def main(argv=None):
     return result.signal or result.value
 
 
+def _enable_switch_interval_workaround():
+    """
+    Let threads of this process switch only rarely from now on,
+    such that cloning this multi-threaded process without the native clone callback
+    is unlikely to deadlock (cf. container.execute_in_namespace() and
+    https://github.com/sosy-lab/benchexec/issues/435).
+    This is necessary only for runs that are not started from the zygote process.
+    """
+    global _switch_interval_workaround_enabled
+    if not _switch_interval_workaround_enabled:
+        logging.debug(
+            "Using sys.setswitchinterval() workaround for #435 in container mode "
+            "because native callback and zygote process are not available."
+        )
+        sys.setswitchinterval(1000)
+        _switch_interval_workaround_enabled = True
+
+
 class ContainerExecutor(baseexecutor.BaseExecutor):
     """Extended executor that allows to start the processes inside containers
     using Linux namespaces."""
@@ -306,6 +342,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         dir_modes={"/": DIR_OVERLAY, "/run": DIR_HIDDEN, "/tmp": DIR_HIDDEN},
         container_system_config=True,
         container_tmpfs=True,
+        use_zygote=True,
         *args,
         **kwargs,
     ):
@@ -321,6 +358,8 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         @param container_system_config: Whether to use a special system configuration in
             the container that disables all remote host and user lookups, sets a custom
             hostname, etc.
+        @param use_zygote: Whether to start containers from a zygote process
+            (cf. zygote.py) instead of from the current process.
         """
         super(ContainerExecutor, self).__init__(*args, **kwargs)
         self._use_namespaces = use_namespaces
@@ -368,6 +407,9 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
             key=lambda tupl: len(tupl[0]),
         )
         self._dir_modes = collections.OrderedDict(sorted_special_dirs)
+        self._mount_plan = None
+        self._use_zygote = use_zygote
+        self._zygote = None
 
         def is_accessible(path):
             mode = container.determine_directory_mode(self._dir_modes, path)
@@ -381,12 +423,24 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                 " some host information like the uptime leaks into the container."
             )
 
-        if not NATIVE_CLONE_CALLBACK_SUPPORTED:
+        if not NATIVE_CLONE_CALLBACK_SUPPORTED and not use_zygote:
             logging.debug(
                 "Using a non-robust fallback for clone callback. If you have many "
                 "threads please read https://github.com/sosy-lab/benchexec/issues/435"
             )
 
+    def _get_mount_plan(self):
+        """
+        Return the MountPlan for the directory modes of this executor,
+        which is created once and replaced if the mount table of the system changed.
+        """
+        if self._mount_plan is None or self._mount_plan.is_outdated():
+            if self._mount_plan is not None:
+                logging.debug("Mount table changed, updating mount plan.")
+                self._mount_plan.close()
+            self._mount_plan = container.MountPlan(self._dir_modes)
+        return self._mount_plan
+
     def _get_result_files_base(self, temp_dir):
         """Given the temp directory that is created for each run, return the path to the
         directory where files created by the tool are stored."""
@@ -554,6 +608,8 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         #        configures inner namespace, serves as dummy init,
         #        collects result of grandchild and passes it to parent
         # grandchild: child of child process (PID 2 in inner namespace), exec()s tool
+        # The child is started by the zygote process of this executor if possible,
+        # otherwise by the parent (cf. _start_child()).
 
         # We need the following communication steps between these proceses:
         # 1a) grandchild tells parent its PID (in outer namespace).
@@ -568,10 +624,6 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         # We cannot use the same pipe for both directions, because otherwise a sender
         # might read the bytes it has sent itself.
 
-        # Error codes from child to parent
-        CHILD_OSERROR = 128  # noqa: N806 local constant
-        CHILD_UNKNOWN_ERROR = 129  # noqa: N806 local constant
-
         # "downstream" pipe parent->grandchild
         from_parent, to_grandchild = os.pipe()
         # "upstream" pipe grandchild/child->parent
@@ -582,9 +634,6 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         # and finally the parent sends its completion marker.
         # After the run, the child sends the result of the grand child and then waits
         # for the post_run marker, before it terminates.
-        MARKER_USER_MAPPING_COMPLETED = b"A"  # noqa: N806 local constant
-        MARKER_PARENT_COMPLETED = b"B"  # noqa: N806 local constant
-        MARKER_PARENT_POST_RUN_COMPLETED = b"C"  # noqa: N806 local constant
 
         # If the current directory is within one of the bind mounts we create,
         # we need to cd into this directory again, otherwise we would not see the
@@ -596,6 +645,248 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
             root_dir = os.path.abspath(root_dir)
             cwd = os.path.abspath(cwd)
 
+        # Using a network namespace that was created in advance saves time,
+        # and its loopback interface is already active.
+        network_ns_pool = (
+            None if self._allow_network else container.get_network_namespace_pool()
+        )
+        network_ns_fd = network_ns_pool.get() if network_ns_pool else None
+
+        try:  # parent
+            try:
+                child_pid, wait_for_child = self._start_child(
+                    fds={
+                        "stdin": stdin,
+                        "stdout": stdout,
+                        "stderr": stderr,
+                        "from_parent": from_parent,
+                        "to_parent": to_parent,
+                        "network_ns_fd": network_ns_fd,
+                    },
+                    args=args,
+                    env=env,
+                    root_dir=root_dir,
+                    cwd=cwd,
+                    temp_dir=temp_dir,
+                    memlimit=memlimit,
+                    memory_nodes=memory_nodes,
+                    output_dir=output_dir,
+                    result_files_patterns=result_files_patterns,
+                    child_setup_fn=child_setup_fn,
+                )
+            except OSError as e:
+                if (
+                    e.errno == errno.EPERM
+                    and util.try_read_file("/proc/sys/kernel/unprivileged_userns_clone")
+                    == "0"
+                ):
+                    raise BenchExecException(
+                        "Unprivileged user namespaces forbidden on this system, please "
+                        "enable them with 'sysctl -w kernel.unprivileged_userns_clone=1' "
+                        "or disable container mode"
+                    )
+                elif (
+                    e.errno in {errno.ENOSPC, errno.EINVAL}
+                    and util.try_read_file("/proc/sys/user/max_user_namespaces") == "0"
+                ):
+                    # Ubuntu has ENOSPC, Centos seems to produce EINVAL in this case
+                    raise BenchExecException(
+                        "Unprivileged user namespaces forbidden on this system, please "
+                        "enable by using 'sysctl -w user.max_user_namespaces=10000' "
+                        "(or another value) or disable container mode"
+                    )
+                else:
+                    raise BenchExecException(
+                        "Creating namespace for container mode failed: "
+                        + os.strerror(e.errno)
+                    )
+            finally:
+                if network_ns_fd is not None:
+                    # the child keeps the namespace alive as long as it needs it
+                    network_ns_pool.release(network_ns_fd)
+            logging.debug(
+                "Parent: child process of RunExecutor with PID %d started.", child_pid
+            )
+
+            def check_child_exit_code():
+                """Check if the child process terminated cleanly
+                and raise an error otherwise."""
+                child_exitcode, unused_child_rusage = wait_for_child()
+                child_exitcode = util.ProcessExitCode.from_raw(child_exitcode)
+                logging.debug(
+                    "Parent: child process of RunExecutor with PID %d"
+                    " terminated with %s.",
+                    child_pid,
+                    child_exitcode,
+                )
+
+                if child_exitcode:
+                    if child_exitcode.value:
+                        if child_exitcode.value == _CHILD_OSERROR:
+                            # This was an OSError in the child,
+                            # details were already logged
+                            raise BenchExecException(
+                                "execution in container failed, check log for details"
+                            )
+                        elif child_exitcode.value == _CHILD_UNKNOWN_ERROR:
+                            raise BenchExecException("unexpected error in container")
+                        raise OSError(
+                            child_exitcode.value, os.strerror(child_exitcode.value)
+                        )
+                    raise OSError(
+                        0,
+                        f"Child process of RunExecutor terminated with {child_exitcode}",
+                    )
+
+            # Close unnecessary ends of pipes such that read() does not block forever
+            # if all other processes have terminated.
+            os.close(from_parent)
+            os.close(to_parent)
+
+            container.setup_user_mapping(child_pid, uid=self._uid, gid=self._gid)
+            # signal child to continue
+            os.write(to_grandchild, _MARKER_USER_MAPPING_COMPLETED)
+
+            try:
+                # read at most 10 bytes because this is enough for 32bit int
+                grandchild_pid = int(os.read(from_grandchild, 10))
+            except ValueError:
+                # probably empty read, i.e., pipe closed,
+                # i.e., child or grandchild failed
+                check_child_exit_code()
+                assert False, (
+                    "Child process of RunExecutor terminated cleanly"
+                    " but did not send expected data."
+                )
+
+            logging.debug(
+                "Parent: executing %s in grand child with PID %d"
+                " via child with PID %d.",
+                args[0],
+                grandchild_pid,
+                child_pid,
+            )
+
+            # start measurements
+            cgroups.add_task(grandchild_pid)
+            parent_setup = parent_setup_fn()
+
+            # Signal grandchild that setup is finished
+            os.write(to_grandchild, _MARKER_PARENT_COMPLETED)
+
+            # Copy file descriptor, otherwise we could not close from_grandchild in
+            # finally block and would leak a file descriptor in case of exception.
+            from_grandchild_copy = os.dup(from_grandchild)
+            to_grandchild_copy = os.dup(to_grandchild)
+        finally:
+            os.close(from_grandchild)
+            os.close(to_grandchild)
+
+        def wait_for_grandchild():
+            # 1024 bytes ought to be enough for everyone^Wour pickled result
+            try:
+                received = os.read(from_grandchild_copy, 1024)
+            except OSError as e:
+                if self.PROCESS_KILLED and e.errno == errno.EINTR:
+                    # Read was interrupted because of Ctrl+C, we just try again
+                    received = os.read(from_grandchild_copy, 1024)
+                else:
+                    raise e
+
+            if not received:
+                # Typically this means the child exited prematurely because an error
+                # occurred, and check_child_exitcode() will handle this.
+                # We close the pipe first, otherwise child could hang infinitely.
+                os.close(from_grandchild_copy)
+                os.close(to_grandchild_copy)
+                check_child_exit_code()
+                assert False, "Child process terminated cleanly without sending result"
+
+            exitcode, ru_child = pickle.loads(received)
+
+            base_path = f"/proc/{child_pid}/root"
+            parent_cleanup = parent_cleanup_fn(
+                parent_setup, util.ProcessExitCode.from_raw(exitcode), base_path
+            )
+
+            if result_files_patterns:
+                # As long as the child process exists
+                # we can access the container file system here
+                self._transfer_output_files(
+                    base_path + temp_dir, cwd, output_dir, result_files_patterns
+                )
+
+            os.close(from_grandchild_copy)
+            os.write(to_grandchild_copy, _MARKER_PARENT_POST_RUN_COMPLETED)
+            os.close(to_grandchild_copy)  # signal child that it can terminate
+            check_child_exit_code()
+
+            return exitcode, ru_child, parent_cleanup
+
+        return grandchild_pid, wait_for_grandchild
+
+    def _start_child(self, fds, **kwargs):
+        """Start the child process of a run with _clone_child(),
+        preferably in the zygote process of this executor.
+        @param fds: a dict with those parameters of _clone_child()
+            that are file descriptors
+        @return: the PID of the child process and a function that waits for it
+            and returns its exit code and resource usage
+        """
+        if self._use_zygote:
+            if self._zygote is None:
+                # The zygote inherits the mount plan including its open file,
+                # such that it does not need to create its own plan.
+                mount_plan = self._get_mount_plan()
+                self._zygote = zygote.Zygote(self._clone_child, [mount_plan])
+            try:
+                child = self._zygote.start_child(fds, **kwargs)
+                return child.pid, child.wait
+            except ValueError as e:
+                logging.debug("Starting run without zygote process: %s", e)
+            except OSError as e:
+                if e.errno not in {errno.EPIPE, errno.ECONNRESET, errno.ECHILD}:
+                    raise  # error from starting the child, not from the zygote
+                # The zygote process is gone, a new one is started for the next run.
+                logging.warning(
+                    "Zygote process %s failed (%s), starting run without it.",
+                    self._zygote.pid,
+                    e.strerror,
+                )
+                self._zygote.close()
+                self._zygote = None
+
+        if not NATIVE_CLONE_CALLBACK_SUPPORTED:
+            _enable_switch_interval_workaround()
+        pid = self._clone_child(**fds, **kwargs)
+        return pid, lambda: self._wait_for_process(pid, kwargs["args"][0])
+
+    def _clone_child(
+        self,
+        args,
+        env,
+        root_dir,
+        cwd,
+        temp_dir,
+        memlimit,
+        memory_nodes,
+        output_dir,
+        result_files_patterns,
+        child_setup_fn,
+        from_parent,
+        to_parent,
+        stdin=None,
+        stdout=None,
+        stderr=None,
+        network_ns_fd=None,
+    ):
+        """Start the child process of a run in new namespaces.
+        This is executed in the zygote process of this executor if possible.
+        For the parameters cf. _start_execution_in_container().
+        @return: the PID of the child process
+        """
+        mount_plan = self._get_mount_plan() if root_dir is None else None
+
         def grandchild():
             """Setup everything inside the process that finally exec()s the tool."""
             try:
@@ -618,7 +909,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                 # and wait until parent is also ready
                 os.write(to_parent, str(my_outer_pid).encode())
                 received = os.read(from_parent, 1)
-                assert received == MARKER_PARENT_COMPLETED, received
+                assert received == _MARKER_PARENT_COMPLETED, received
             finally:
                 # close remaining ends of pipe
                 os.close(from_parent)
@@ -662,13 +953,13 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                         # A standard hostname increases reproducibility.
                         socket.sethostname(container.CONTAINER_HOSTNAME)
 
-                    if not self._allow_network:
+                    if not self._allow_network and network_ns_fd is None:
                         container.activate_network_interface("lo")
 
                     # Wait until user mapping is finished,
                     # this is necessary for filesystem writes
-                    received = os.read(from_parent, len(MARKER_USER_MAPPING_COMPLETED))
-                    assert received == MARKER_USER_MAPPING_COMPLETED, received
+                    received = os.read(from_parent, len(_MARKER_USER_MAPPING_COMPLETED))
+                    assert received == _MARKER_USER_MAPPING_COMPLETED, received
 
                     if root_dir is not None:
                         self._setup_root_filesystem(root_dir)
@@ -678,6 +969,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                             output_dir if result_files_patterns else None,
                             memlimit,
                             memory_nodes,
+                            mount_plan,
                         )
 
                     # Marking this process as "non-dumpable" (no core dumps) also
@@ -687,11 +979,11 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     # We set this to prevent the benchmarked tool from messing with this
                     # process or using it to escape from the container. More info:
                     # http://man7.org/linux/man-pages/man5/proc.5.html
-                    # It needs to be done after MARKER_USER_MAPPING_COMPLETED.
+                    # It needs to be done after _MARKER_USER_MAPPING_COMPLETED.
                     libc.prctl(libc.PR_SET_DUMPABLE, libc.SUID_DUMP_DISABLE, 0, 0, 0)
                 except OSError as e:
                     logging.critical("Failed to configure container: %s", e)
-                    return CHILD_OSERROR
+                    return _CHILD_OSERROR
 
                 try:
                     os.chdir(cwd)
@@ -699,7 +991,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     logging.critical(
                         "Cannot change into working directory inside container: %s", e
                     )
-                    return CHILD_OSERROR
+                    return _CHILD_OSERROR
 
                 container.setup_seccomp_filter()
 
@@ -715,7 +1007,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                     )
                 except (OSError, RuntimeError) as e:
                     logging.critical("Cannot start process: %s", e)
-                    return CHILD_OSERROR
+                    return _CHILD_OSERROR
 
                 # keep capability for unmount if necessary later
                 necessary_capabilities = (
@@ -757,174 +1049,26 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
                 # Now the parent copies the output files, we need to wait until this is
                 # finished. If the child terminates, the container file system and its
                 # tmpfs go away.
-                assert os.read(from_parent, 1) == MARKER_PARENT_POST_RUN_COMPLETED
+                assert os.read(from_parent, 1) == _MARKER_PARENT_POST_RUN_COMPLETED
                 os.close(from_parent)
 
                 return 0
             except OSError:
                 logging.exception("Error in child process of RunExecutor")
-                return CHILD_OSERROR
+                return _CHILD_OSERROR
             except BaseException:
                 # Need to catch everything because this method always needs to return an
                 # int (we are inside a C callback that requires returning int).
                 logging.exception("Error in child process of RunExecutor")
-                return CHILD_UNKNOWN_ERROR
+                return _CHILD_UNKNOWN_ERROR
 
-        try:  # parent
-            try:
-                child_pid = container.execute_in_namespace(
-                    child, use_network_ns=not self._allow_network
-                )
-            except OSError as e:
-                if (
-                    e.errno == errno.EPERM
-                    and util.try_read_file("/proc/sys/kernel/unprivileged_userns_clone")
-                    == "0"
-                ):
-                    raise BenchExecException(
-                        "Unprivileged user namespaces forbidden on this system, please "
-                        "enable them with 'sysctl -w kernel.unprivileged_userns_clone=1' "
-                        "or disable container mode"
-                    )
-                elif (
-                    e.errno in {errno.ENOSPC, errno.EINVAL}
-                    and util.try_read_file("/proc/sys/user/max_user_namespaces") == "0"
-                ):
-                    # Ubuntu has ENOSPC, Centos seems to produce EINVAL in this case
-                    raise BenchExecException(
-                        "Unprivileged user namespaces forbidden on this system, please "
-                        "enable by using 'sysctl -w user.max_user_namespaces=10000' "
-                        "(or another value) or disable container mode"
-                    )
-                else:
-                    raise BenchExecException(
-                        "Creating namespace for container mode failed: "
-                        + os.strerror(e.errno)
-                    )
-            logging.debug(
-                "Parent: child process of RunExecutor with PID %d started.", child_pid
-            )
-
-            def check_child_exit_code():
-                """Check if the child process terminated cleanly
-                and raise an error otherwise."""
-                child_exitcode, unused_child_rusage = self._wait_for_process(
-                    child_pid, args[0]
-                )
-                child_exitcode = util.ProcessExitCode.from_raw(child_exitcode)
-                logging.debug(
-                    "Parent: child process of RunExecutor with PID %d"
-                    " terminated with %s.",
-                    child_pid,
-                    child_exitcode,
-                )
-
-                if child_exitcode:
-                    if child_exitcode.value:
-                        if child_exitcode.value == CHILD_OSERROR:
-                            # This was an OSError in the child,
-                            # details were already logged
-                            raise BenchExecException(
-                                "execution in container failed, check log for details"
-                            )
-                        elif child_exitcode.value == CHILD_UNKNOWN_ERROR:
-                            raise BenchExecException("unexpected error in container")
-                        raise OSError(
-                            child_exitcode.value, os.strerror(child_exitcode.value)
-                        )
-                    raise OSError(
-                        0,
-                        f"Child process of RunExecutor terminated with {child_exitcode}",
-                    )
-
-            # Close unnecessary ends of pipes such that read() does not block forever
-            # if all other processes have terminated.
-            os.close(from_parent)
-            os.close(to_parent)
-
-            container.setup_user_mapping(child_pid, uid=self._uid, gid=self._gid)
-            # signal child to continue
-            os.write(to_grandchild, MARKER_USER_MAPPING_COMPLETED)
-
-            try:
-                # read at most 10 bytes because this is enough for 32bit int
-                grandchild_pid = int(os.read(from_grandchild, 10))
-            except ValueError:
-                # probably empty read, i.e., pipe closed,
-                # i.e., child or grandchild failed
-                check_child_exit_code()
-                assert False, (
-                    "Child process of RunExecutor terminated cleanly"
-                    " but did not send expected data."
-                )
-
-            logging.debug(
-                "Parent: executing %s in grand child with PID %d"
-                " via child with PID %d.",
-                args[0],
-                grandchild_pid,
-                child_pid,
-            )
-
-            # start measurements
-            cgroups.add_task(grandchild_pid)
-            parent_setup = parent_setup_fn()
-
-            # Signal grandchild that setup is finished
-            os.write(to_grandchild, MARKER_PARENT_COMPLETED)
-
-            # Copy file descriptor, otherwise we could not close from_grandchild in
-            # finally block and would leak a file descriptor in case of exception.
-            from_grandchild_copy = os.dup(from_grandchild)
-            to_grandchild_copy = os.dup(to_grandchild)
-        finally:
-            os.close(from_grandchild)
-            os.close(to_grandchild)
-
-        def wait_for_grandchild():
-            # 1024 bytes ought to be enough for everyone^Wour pickled result
-            try:
-                received = os.read(from_grandchild_copy, 1024)
-            except OSError as e:
-                if self.PROCESS_KILLED and e.errno == errno.EINTR:
-                    # Read was interrupted because of Ctrl+C, we just try again
-                    received = os.read(from_grandchild_copy, 1024)
-                else:
-                    raise e
-
-            if not received:
-                # Typically this means the child exited prematurely because an error
-                # occurred, and check_child_exitcode() will handle this.
-                # We close the pipe first, otherwise child could hang infinitely.
-                os.close(from_grandchild_copy)
-                os.close(to_grandchild_copy)
-                check_child_exit_code()
-                assert False, "Child process terminated cleanly without sending result"
-
-            exitcode, ru_child = pickle.loads(received)
-
-            base_path = f"/proc/{child_pid}/root"
-            parent_cleanup = parent_cleanup_fn(
-                parent_setup, util.ProcessExitCode.from_raw(exitcode), base_path
-            )
-
-            if result_files_patterns:
-                # As long as the child process exists
-                # we can access the container file system here
-                self._transfer_output_files(
-                    base_path + temp_dir, cwd, output_dir, result_files_patterns
-                )
-
-            os.close(from_grandchild_copy)
-            os.write(to_grandchild_copy, MARKER_PARENT_POST_RUN_COMPLETED)
-            os.close(to_grandchild_copy)  # signal child that it can terminate
-            check_child_exit_code()
-
-            return exitcode, ru_child, parent_cleanup
-
-        return grandchild_pid, wait_for_grandchild
+        return container.execute_in_namespace(
+            child, use_network_ns=not self._allow_network, network_ns_fd=network_ns_fd
+        )
 
-    def _setup_container_filesystem(self, temp_dir, output_dir, memlimit, memory_nodes):
+    def _setup_container_filesystem(
+        self, temp_dir, output_dir, memlimit, memory_nodes, mount_plan=None
+    ):
         """Setup the filesystem layout in the container.
         As first step, we create a copy of all existing mountpoints in mount_base,
         recursively, and as "private" mounts
@@ -945,6 +1089,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
 
         @param temp_dir:
             The base directory under which all our directories should be created.
+        @param mount_plan: None or a container.MountPlan for the directory modes
         """
         # All strings here are bytes to avoid issues
         # if existing mountpoints are invalid UTF-8.
@@ -972,7 +1117,7 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
 
         # Copy all mounts to mount_base and apply directory modes
         container.duplicate_mount_hierarchy(
-            mount_base, temp_base, work_base, self._dir_modes
+            mount_base, temp_base, work_base, self._dir_modes, mount_plan
         )
 
         # Now configure some special hard-coded cases
@@ -1062,6 +1207,8 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         self, tool_output_dir, working_dir, output_dir, patterns
     ):
         """Transfer files created by the tool in the container to the output directory.
+        All patterns are matched during a single walk over the file hierarchy.
+        Files are moved if possible, otherwise they are copied in parallel.
         @param tool_output_dir:
             The directory under which all tool output files are created.
         @param working_dir: The absolute working directory of the tool in the container.
@@ -1071,65 +1218,178 @@ class ContainerExecutor(baseexecutor.BaseExecutor):
         assert output_dir
         assert patterns
         if any(os.path.isabs(pattern) for pattern in patterns):
-            base_dir = tool_output_dir
+            base_dir = "/"
         else:
-            base_dir = tool_output_dir + working_dir
+            base_dir = working_dir
+        base_parts = [part for part in os.path.normpath(base_dir).split("/") if part]
+        split_patterns = []
+        for pattern in patterns:
+            parts = _split_result_files_pattern(pattern, working_dir)
+            if parts[: len(base_parts)] == base_parts:
+                split_patterns.append(parts)
+            else:
+                logging.warning(
+                    "Ignoring result-files pattern '%s' "
+                    "that points outside of the working directory.",
+                    pattern,
+                )
+        patterns = split_patterns
         file_count = 0
+        created_dirs = set()
+        copy_futures = {}
+
+        def transfer_file(abs_file, file):
+            """@param file: the path of the file as visible for the tool"""
+            if container.is_container_system_config_file(file):
+                return
+            relative_file = os.path.relpath(file, base_dir)
+            if relative_file.split(os.sep)[0] == os.pardir:
+                # never write outside of output_dir
+                logging.warning("Ignoring output file '%s'.", file)
+                return
+            target = os.path.join(output_dir, relative_file)
+
+            nonlocal file_count
+            file_count += 1
+            if file_count <= _MAX_RESULT_FILE_LOG_COUNT:
+                logging.debug("Transferring output file %s to %s", abs_file, target)
+                if file_count == _MAX_RESULT_FILE_LOG_COUNT:
+                    logging.debug(
+                        "%s output files transferred, "
+                        "further files will not be logged.",
+                        file_count,
+                    )
 
-        def transfer_file(abs_file):
-            assert abs_file.startswith(base_dir)
-
-            # We ignore (empty) directories, because we create them for hidden dirs etc.
-            # We ignore device nodes, because overlayfs creates them.
-            # We also ignore all other files (symlinks, fifos etc.),
-            # because they are probably irrelevant, and just handle regular files.
-            file = os.path.join("/", os.path.relpath(abs_file, base_dir))
-            if (
-                os.path.isfile(abs_file)
-                and not os.path.islink(abs_file)
-                and not container.is_container_system_config_file(file)
-            ):
-                target = output_dir + file
-
-                nonlocal file_count
-                file_count += 1
-                if file_count <= _MAX_RESULT_FILE_LOG_COUNT:
-                    logging.debug("Transferring output file %s to %s", abs_file, target)
-                    if file_count == _MAX_RESULT_FILE_LOG_COUNT:
-                        logging.debug(
-                            "%s output files transferred, "
-                            "further files will not be logged.",
-                            file_count,
-                        )
-
-                os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                target_dir = os.path.dirname(target)
+                if target_dir not in created_dirs:
+                    os.makedirs(target_dir, exist_ok=True)
+                    created_dirs.add(target_dir)
                 try:
-                    # move is more efficient than copy in case both abs_file and target
-                    # are on the same filesystem, and it avoids matching the file again
-                    # with the next pattern.
-                    shutil.move(abs_file, target)
+                    # cheap if both abs_file and target are on the same filesystem
+                    os.rename(abs_file, target)
+                    return
                 except OSError as e:
-                    logging.warning("Could not retrieve output file '%s': %s", file, e)
-
-        for pattern in patterns:
-            if os.path.isabs(pattern):
-                pattern = tool_output_dir + pattern
-            else:
-                pattern = tool_output_dir + os.path.join(working_dir, pattern)
-            # normalize pattern for preventing directory traversal attacks:
-            for abs_file in glob.iglob(os.path.normpath(pattern), recursive=True):
-                # We allow the user to match directories and transfer them recursively.
-                if os.path.isdir(abs_file):
-                    for root, _unused_dirs, files in os.walk(abs_file):
-                        for file in files:
-                            transfer_file(os.path.join(root, file))
-                else:
-                    transfer_file(abs_file)
+                    if e.errno != errno.EXDEV:
+                        raise
+                future = copy_executor.submit(_copy_result_file, abs_file, target)
+                copy_futures[future] = file
+            except OSError as e:
+                logging.warning("Could not retrieve output file '%s': %s", file, e)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_RESULT_FILE_COPY_THREADS,
+            thread_name_prefix="BenchExec-result-files",
+        ) as copy_executor:
+            # We allow the user to match directories and transfer them recursively.
+            # A directory is only entered if it matches a pattern
+            # or could contain files that match a pattern.
+            matched = any(_match_path(pattern, []) for pattern in patterns)
+            pending = [(tool_output_dir, [], matched)]
+            while pending:
+                abs_dir, dir_parts, dir_matched = pending.pop()
+                try:
+                    entries = list(os.scandir(abs_dir))
+                except OSError as e:
+                    logging.warning(
+                        "Could not retrieve output files from '/%s': %s",
+                        "/".join(dir_parts),
+                        e,
+                    )
+                    continue
+                for entry in entries:
+                    parts = dir_parts + [entry.name]
+                    matched = dir_matched or any(
+                        _match_path(pattern, parts) for pattern in patterns
+                    )
+                    # We ignore (empty) directories, because we create them for
+                    # hidden dirs etc. We ignore device nodes, because overlayfs
+                    # creates them. We also ignore all other files (symlinks, fifos
+                    # etc.), because they are probably irrelevant,
+                    # and just handle regular files.
+                    if entry.is_dir(follow_symlinks=False):
+                        if matched or any(
+                            _match_path(pattern, parts, prefix=True)
+                            for pattern in patterns
+                        ):
+                            pending.append((entry.path, parts, matched))
+                    elif matched and entry.is_file(follow_symlinks=False):
+                        transfer_file(entry.path, "/" + "/".join(parts))
+
+        for future, file in copy_futures.items():
+            try:
+                future.result()
+            except OSError as e:
+                logging.warning("Could not retrieve output file '%s': %s", file, e)
 
         logging.debug(
             "%s output files matched the patterns and were transferred.", file_count
         )
 
 
+def _split_result_files_pattern(pattern, working_dir):
+    """Convert a result-files pattern into a list of components
+    of the absolute paths (as visible for the tool) that it matches."""
+    # normalize pattern for preventing directory traversal attacks
+    pattern = os.path.normpath(os.path.join(working_dir, pattern))
+    return [part for part in pattern.split("/") if part]
+
+
+def _match_path(pattern, parts, prefix=False):
+    """Check whether the given path matches a pattern like glob.glob() would do.
+    @param pattern: a list of path components, "**" matches any number of components
+    @param parts: a list of path components
+    @param prefix: whether it is sufficient that the path is a prefix
+        of a matching path
+    """
+    if not parts:
+        return prefix or all(part == "**" for part in pattern)
+    if not pattern:
+        return False
+    if pattern[0] == "**":
+        return _match_path(pattern[1:], parts, prefix) or (
+            not parts[0].startswith(".") and _match_path(pattern, parts[1:], prefix)
+        )
+    return _match_path_component(pattern[0], parts[0]) and _match_path(
+        pattern[1:], parts[1:], prefix
+    )
+
+
+def _match_path_component(pattern, name):
+    if not glob.has_magic(pattern):
+        return pattern == name
+    # like glob, wildcards do not match hidden files
+    if name.startswith(".") and not pattern.startswith("."):
+        return False
+    return fnmatch.fnmatchcase(name, pattern)
+
+
+def _copy_result_file(source, target):
+    """Copy a file, using reflinks or in-kernel copying if possible."""
+    if hasattr(os, "copy_file_range"):  # Python 3.8+
+        with open(source, "rb") as source_file, open(target, "wb") as target_file:
+            try:
+                while os.copy_file_range(
+                    source_file.fileno(), target_file.fileno(), _COPY_CHUNK_SIZE
+                ):
+                    pass
+            except OSError as e:
+                if e.errno not in [
+                    errno.EXDEV,
+                    errno.EINVAL,
+                    errno.ENOSYS,
+                    errno.EOPNOTSUPP,
+                ]:
+                    raise
+                # not supported for these file systems
+                source_file.seek(0)
+                target_file.seek(0)
+                target_file.truncate()
+                shutil.copyfileobj(source_file, target_file)
+    else:
+        shutil.copyfile(source, target)
+    shutil.copystat(source, target)
+
+
 if __name__ == "__main__":
     main()
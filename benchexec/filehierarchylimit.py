@@ -5,24 +5,57 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import errno
 import logging
 import os
-import threading
+import stat
+import struct
 import time
 
 from benchexec import container
-from benchexec import util
+from benchexec import libc
+from benchexec import limitmonitor
 
 _CHECK_INTERVAL_SECONDS = 60
 _DURATION_WARNING_THRESHOLD = 1
 
+_INOTIFY_MASK = (
+    libc.IN_CREATE
+    | libc.IN_DELETE
+    | libc.IN_MODIFY
+    | libc.IN_MOVED_FROM
+    | libc.IN_MOVED_TO
+    | libc.IN_ONLYDIR
+    | libc.IN_DONT_FOLLOW
+    | libc.IN_EXCL_UNLINK
+)
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (followed by name)
+_INOTIFY_READ_SIZE = 64 * 1024
+# Bound the time for one call of the event handler if events are produced quickly.
+_INOTIFY_MAX_READS = 16
 
-class FileHierarchyLimitThread(threading.Thread):
+
+def _is_counted_file(path, stat_result):
+    """
+    Determine whether a file is counted for the limits.
+    @param path: the path as visible for the tool
+    """
+    return stat.S_ISREG(
+        stat_result.st_mode
+    ) and not container.is_container_system_config_file(path)
+
+
+class FileHierarchyLimit(limitmonitor.Limit):
     """
-    Thread that periodically checks whether a given file hierarchy exceeds some limits.
+    Limit that checks whether a given file hierarchy exceeds some limits.
     After this happens, the process is terminated.
+    If possible, the files are accounted incrementally based on inotify events,
+    such that violations are detected immediately and the costs depend only on
+    the number of changes. Otherwise, the file hierarchy is scanned periodically.
     """
 
+    slow_check = True
+
     def __init__(
         self,
         path,
@@ -31,17 +64,35 @@ class FileHierarchyLimitThread(threading.Thread):
         pid_to_kill,
         callbackFn=lambda reason: None,
     ):
-        super(FileHierarchyLimitThread, self).__init__()
-        self.name = "FileHierarchyLimitThread-" + self.name
+        super(FileHierarchyLimit, self).__init__(pid_to_kill, callbackFn)
 
         assert os.path.isdir(path)
         self._path = path
         self._files_count_limit = files_count_limit
         self._files_size_limit = files_size_limit
 
-        self._pid_to_kill = pid_to_kill
-        self._callback = callbackFn
-        self._finished = threading.Event()
+        try:
+            self._accounting = _IncrementalFileAccounting(path)
+        except OSError as e:
+            logging.debug(
+                "Cannot watch file hierarchy for changes (%s), "
+                "scanning it periodically for enforcing limits.",
+                e,
+            )
+            self._accounting = None
+
+    def first_check_time(self):
+        if self._accounting:
+            # files that were created before the accounting started
+            return time.monotonic()
+        return time.monotonic() + _CHECK_INTERVAL_SECONDS
+
+    def fileno(self):
+        return self._accounting.fileno() if self._accounting else None
+
+    def _close(self):
+        if self._accounting:
+            self._accounting.close()
 
     def _check_limit(self, files_count, files_size):
         if self._files_count_limit and files_count > self._files_count_limit:
@@ -50,7 +101,6 @@ class FileHierarchyLimitThread(threading.Thread):
             reason = "files-size"
         else:
             return None
-        self._callback(reason)
         logging.debug(
             "Killing process %d due to %s limit (%d files with %d bytes).",
             self._pid_to_kill,
@@ -58,51 +108,232 @@ class FileHierarchyLimitThread(threading.Thread):
             files_count,
             files_size,
         )
-        util.kill_process(self._pid_to_kill)
+        self._kill(reason)
         return reason
 
-    def run(self):
-        while not self._finished.is_set():
-            self._finished.wait(_CHECK_INTERVAL_SECONDS)
-
-            files_count = 0
-            files_size = 0
-            start_time = time.monotonic()
-            for current_dir, _dirs, files in os.walk(self._path):
-                for file in files:
-                    abs_file = os.path.join(current_dir, file)
-                    file = "/" + os.path.relpath(file, self._path)
-                    # file has now the path as visible for tool
-                    if (
-                        not container.is_container_system_config_file(file)
-                        and os.path.isfile(abs_file)
-                        and not os.path.islink(abs_file)
-                    ):
-                        files_count += 1
-                        if self._files_size_limit:
-                            try:
-                                files_size += os.path.getsize(abs_file)
-                            except OSError:
-                                # possibly just deleted
-                                pass
-            if self._check_limit(files_count, files_size):
-                return
-
-            duration = time.monotonic() - start_time
+    def _check_accounted_files(self):
+        if self._check_limit(self._accounting.files_count, self._accounting.files_size):
+            # no further events are necessary
+            self._accounting.stop()
 
+    def _handle_event(self):
+        was_active = self._accounting.active
+        self._accounting.process_events()
+        if self._accounting.active:
+            self._check_accounted_files()
+        elif was_active:
             logging.debug(
-                "FileHierarchyLimitThread for process %d: "
-                "files count: %d, files size: %d, scan duration %fs",
+                "Falling back to periodic scans of file hierarchy for process %d.",
                 self._pid_to_kill,
-                files_count,
-                files_size,
+            )
+            return time.monotonic()
+        return None
+
+    def _check(self):
+        if self._accounting and self._accounting.active:
+            self._check_accounted_files()
+            return None
+
+        files_count = 0
+        files_size = 0
+        start_time = time.monotonic()
+        for current_dir, _dirs, files in os.walk(self._path):
+            for file in files:
+                abs_file = os.path.join(current_dir, file)
+                # file has now the path as visible for tool
+                file = "/" + os.path.relpath(abs_file, self._path)
+                try:
+                    stat_result = os.lstat(abs_file)
+                except OSError:
+                    # possibly just deleted
+                    continue
+                if _is_counted_file(file, stat_result):
+                    files_count += 1
+                    files_size += stat_result.st_size
+        if self._check_limit(files_count, files_size):
+            return None
+
+        end_time = time.monotonic()
+        duration = end_time - start_time
+
+        logging.debug(
+            "FileHierarchyLimit for process %d: "
+            "files count: %d, files size: %d, scan duration %fs",
+            self._pid_to_kill,
+            files_count,
+            files_size,
+            duration,
+        )
+        if duration > _DURATION_WARNING_THRESHOLD:
+            logging.warning(
+                "Scanning file hierarchy for enforcement of limits took %ds.",
                 duration,
             )
-            if duration > _DURATION_WARNING_THRESHOLD:
-                logging.warning(
-                    "Scanning file hierarchy for enforcement of limits took %ds.",
-                    duration,
-                )
-
-    def cancel(self):
-        self._finished.set()
+        return end_time + _CHECK_INTERVAL_SECONDS
+
+
+class _IncrementalFileAccounting(object):
+    """
+    Keeps track of the number and total size of the files in a file hierarchy
+    using inotify. The file hierarchy is scanned once, afterwards only the files
+    for which events are reported are inspected.
+    Directories are identified by the watch descriptors of inotify,
+    which stay the same if a directory is renamed.
+    If the accounting becomes incomplete (e.g., because there are too many events
+    or directories), it stops and active is set to False.
+    """
+
+    def __init__(self, path):
+        self._path = os.fsencode(path)
+        self._fd = libc.inotify_init1(libc.IN_NONBLOCK | libc.IN_CLOEXEC)
+        self.active = True
+        self.files_count = 0
+        self.files_size = 0
+        self._dir_paths = {}  # watch descriptor -> directory path relative to root
+        self._dir_files = {}  # watch descriptor -> dict of file names and sizes
+        self._dir_subdirs = {}  # watch descriptor -> dict of names and descriptors
+        self._dirty = set()  # (watch descriptor, name) of files to inspect
+        try:
+            self._add_directory(None, b"")
+            self._update_dirty_files()
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        os.close(self._fd)
+
+    def stop(self):
+        """Stop accounting and watching the file hierarchy."""
+        self.active = False
+        for wd in self._dir_paths:
+            try:
+                libc.inotify_rm_watch(self._fd, wd)
+            except OSError:
+                pass  # directory was deleted
+        self._dir_paths.clear()
+        self._dir_files.clear()
+        self._dir_subdirs.clear()
+        self._dirty.clear()
+
+    def process_events(self):
+        """Read the pending events and update the accounting accordingly."""
+        for _ in range(_INOTIFY_MAX_READS):
+            try:
+                data = os.read(self._fd, _INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data) and self.active:
+                wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                try:
+                    self._handle_event(wd, mask, name)
+                except OSError as e:
+                    logging.debug("Cannot watch file hierarchy anymore: %s", e)
+                    self.stop()
+
+        if self.active:
+            self._update_dirty_files()
+
+    def _handle_event(self, wd, mask, name):
+        if mask & libc.IN_Q_OVERFLOW:
+            raise OSError(errno.EOVERFLOW, "Too many file-system events")
+        if wd not in self._dir_paths:
+            return  # event for a directory that was removed already
+        if mask & libc.IN_IGNORED:
+            # watched directory itself was deleted
+            self._remove_directory(wd)
+        elif mask & libc.IN_ISDIR:
+            if mask & (libc.IN_CREATE | libc.IN_MOVED_TO):
+                self._add_directory(wd, name)
+            elif mask & (libc.IN_DELETE | libc.IN_MOVED_FROM):
+                subdir_wd = self._dir_subdirs[wd].pop(name, None)
+                if subdir_wd is not None:
+                    self._remove_directory(subdir_wd)
+        elif mask & (libc.IN_DELETE | libc.IN_MOVED_FROM):
+            self._remove_file(wd, name)
+        else:
+            self._dirty.add((wd, name))
+
+    def _add_directory(self, parent_wd, name):
+        """Start watching a directory and everything below it."""
+        pending = [(parent_wd, name)]
+        while pending:
+            parent_wd, name = pending.pop()
+            if parent_wd is None:
+                path = name
+            else:
+                path = os.path.join(self._dir_paths[parent_wd], name)
+            abs_path = os.path.join(self._path, path)
+            try:
+                wd = libc.inotify_add_watch(self._fd, abs_path, _INOTIFY_MASK)
+            except OSError as e:
+                if e.errno in [errno.ENOENT, errno.ENOTDIR]:
+                    continue  # already deleted again
+                raise
+            if wd in self._dir_paths:
+                continue  # already known
+            self._dir_paths[wd] = path
+            self._dir_files[wd] = {}
+            self._dir_subdirs[wd] = {}
+            if parent_wd is not None:
+                self._dir_subdirs[parent_wd][name] = wd
+
+            # The directory is listed after the watch was added,
+            # such that no files are missed.
+            try:
+                with os.scandir(abs_path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append((wd, os.fsencode(entry.name)))
+                        else:
+                            self._dirty.add((wd, os.fsencode(entry.name)))
+            except FileNotFoundError:
+                pass  # removal of directory is handled by events
+
+    def _remove_directory(self, wd):
+        """Stop watching a directory and forget about everything below it."""
+        pending = [wd]
+        while pending:
+            wd = pending.pop()
+            if self._dir_paths.pop(wd, None) is None:
+                continue
+            for size in self._dir_files.pop(wd).values():
+                self.files_count -= 1
+                self.files_size -= size
+            pending.extend(self._dir_subdirs.pop(wd).values())
+            try:
+                libc.inotify_rm_watch(self._fd, wd)
+            except OSError:
+                pass  # directory was deleted and watch removed automatically
+
+    def _remove_file(self, wd, name):
+        self._dirty.discard((wd, name))
+        size = self._dir_files[wd].pop(name, None)
+        if size is not None:
+            self.files_count -= 1
+            self.files_size -= size
+
+    def _update_dirty_files(self):
+        dirty = self._dirty
+        self._dirty = set()
+        for wd, name in dirty:
+            dir_path = self._dir_paths.get(wd)
+            if dir_path is None:
+                continue  # directory was removed
+            self._remove_file(wd, name)
+            path = os.path.join(dir_path, name)
+            try:
+                stat_result = os.lstat(os.path.join(self._path, path))
+            except OSError:
+                continue  # possibly just deleted
+            if _is_counted_file("/" + os.fsdecode(path), stat_result):
+                self._dir_files[wd][name] = stat_result.st_size
+                self.files_count += 1
+                self.files_size += stat_result.st_size
@@ -11,6 +11,8 @@ import os
 import subprocess
 import signal
 import re
+import time
+from benchexec import limitmonitor
 from benchexec.util import find_executable2
 from decimal import Decimal
 
@@ -18,15 +20,40 @@ DOMAIN_PACKAGE = "package"
 DOMAIN_CORE = "core"
 DOMAIN_UNCORE = "uncore"
 DOMAIN_DRAM = "dram"
+DOMAIN_PSYS = "psys"
+
+_POWERCAP_DIR = "sys/class/powercap"  # relative to the sysfs root
+_RAPL_ZONE_PREFIX = "intel-rapl:"
+# Name of a zone of a package, on systems with several dies per package
+# there is one such zone per die (e.g., "package-0-die-1").
+_RAPL_PACKAGE_ZONE_PATTERN = re.compile(r"package-(\d+)(?:-die-\d+)?")
+
+# Interval for reading the RAPL counters during a measurement,
+# such that wrap-arounds are not missed. The counters of a package wrap around
+# after 262143J, i.e., after about 9 minutes at 500W.
+_RAPL_SAMPLE_INTERVAL = 30  # seconds
 
 
 class EnergyMeasurement(object):
+    """
+    Energy measurement with the external program cpu-energy-meter.
+    """
+
     def __init__(self, executable):
         self._executable = executable
         self._measurement_process = None
 
     @classmethod
     def create_if_supported(cls):
+        """
+        Return an object for measuring energy consumption,
+        preferably a RaplEnergyMeasurement if the RAPL counters are readable,
+        or None if energy measurement is not possible on the current system.
+        """
+        measurement = RaplEnergyMeasurement.create_if_supported()
+        if measurement is not None:
+            return measurement
+
         executable = find_executable2("cpu-energy-meter")
         if executable is None:  # not available on current system
             logging.debug(
@@ -87,6 +114,177 @@ class EnergyMeasurement(object):
         return self._measurement_process is not None
 
 
+class _RaplZone(object):
+    """A RAPL energy counter of one domain of a CPU package in the powercap sysfs."""
+
+    def __init__(self, path, package, domain, max_energy_range):
+        self.path = path
+        self.package = package
+        self.domain = domain
+        self.max_energy_range = max_energy_range
+
+    def read(self):
+        """Return the current value of the counter in microjoules."""
+        with open(os.path.join(self.path, "energy_uj"), "rb") as f:
+            return int(f.read())
+
+
+def _find_rapl_zones(sysfs_root):
+    """
+    Return the RAPL zones of the system with readable energy counters.
+    Several zones can belong to the same package and domain (one for each die).
+    """
+    powercap_dir = os.path.join(sysfs_root, _POWERCAP_DIR)
+    try:
+        zone_ids = sorted(
+            entry[len(_RAPL_ZONE_PREFIX) :]
+            for entry in os.listdir(powercap_dir)
+            if entry.startswith(_RAPL_ZONE_PREFIX)
+        )
+    except OSError:
+        return []
+
+    def read_zone_file(zone_id, name):
+        with open(os.path.join(powercap_dir, _RAPL_ZONE_PREFIX + zone_id, name)) as f:
+            return f.read().strip()
+
+    zones = []
+    package_of_zone = {}
+    # sorting ensures that zones (e.g. "0") come before their subzones (e.g. "0:1")
+    for zone_id in zone_ids:
+        try:
+            name = read_zone_file(zone_id, "name")
+            parent_id = zone_id.rpartition(":")[0]
+            if name.startswith("package-"):
+                match = _RAPL_PACKAGE_ZONE_PATTERN.fullmatch(name)
+                if not match:
+                    # We could not attribute the zone to a package,
+                    # let cpu-energy-meter do the measurement instead.
+                    logging.debug("Unknown name of RAPL zone %s: %s", zone_id, name)
+                    return []
+                package = int(match.group(1))
+                domain = DOMAIN_PACKAGE
+            elif name == DOMAIN_PSYS:
+                package = 0
+                domain = DOMAIN_PSYS
+            elif parent_id in package_of_zone:
+                package = package_of_zone[parent_id]
+                domain = name
+            else:
+                logging.debug("Ignoring unknown RAPL zone %s (%s).", zone_id, name)
+                continue
+            package_of_zone[zone_id] = package
+
+            zone = _RaplZone(
+                os.path.join(powercap_dir, _RAPL_ZONE_PREFIX + zone_id),
+                package,
+                domain,
+                int(read_zone_file(zone_id, "max_energy_range_uj")),
+            )
+            zone.read()
+        except (OSError, ValueError) as e:
+            # Since Linux 5.10, the counters are readable only for root by default.
+            logging.debug("Cannot read RAPL zone %s: %s", zone_id, e)
+            continue
+        zones.append(zone)
+    return zones
+
+
+class RaplEnergyMeasurement(object):
+    """
+    Energy measurement that reads the RAPL counters of the CPU directly
+    from the powercap sysfs (/sys/class/powercap/intel-rapl:*),
+    which avoids starting an external program for each measurement.
+    During a measurement, the counters are read periodically by the LimitMonitor
+    such that wrap-arounds of the counters are accounted for.
+
+    @param zones: the RAPL zones to measure
+    """
+
+    def __init__(self, zones):
+        self._zones = zones
+        self._last_values = None
+        self._consumed = None
+        self._sampler = None
+
+    @classmethod
+    def create_if_supported(cls, sysfs_root="/"):
+        """
+        Return a RaplEnergyMeasurement, or None if no RAPL counter is readable.
+        @param sysfs_root: the directory in which the sysfs is mounted as "sys"
+        """
+        zones = _find_rapl_zones(sysfs_root)
+        if not zones:
+            logging.debug(
+                "Energy measurement via RAPL not available "
+                "because no energy counter is readable in %s.",
+                os.path.join(sysfs_root, _POWERCAP_DIR),
+            )
+            return None
+        return cls(zones)
+
+    def start(self):
+        """Starts the measurement by reading the current counter values."""
+        assert (
+            not self.is_running()
+        ), "Attempted to start an energy measurement while one was already running."
+        self._consumed = [0] * len(self._zones)
+        self._last_values = [zone.read() for zone in self._zones]
+        self._sampler = _RaplSampler(self._sample)
+        limitmonitor.get_monitor().register(self._sampler)
+
+    def _sample(self):
+        """Read all counters and add the energy consumed since the last read."""
+        for i, zone in enumerate(self._zones):
+            value = zone.read()
+            difference = value - self._last_values[i]
+            if difference < 0:
+                # counter wrapped around
+                difference += zone.max_energy_range
+            self._consumed[i] += difference
+            self._last_values[i] = value
+
+    def stop(self):
+        """Stops the measurement and returns the measurement result,
+        if the measurement was running."""
+        if not self.is_running():
+            return None
+        limitmonitor.get_monitor().unregister(self._sampler)
+        self._sampler = None
+        self._sample()
+
+        consumed_energy = collections.defaultdict(dict)
+        for zone, consumed in zip(self._zones, self._consumed):
+            # sum up the dies of each package and convert microjoules to joules
+            domains = consumed_energy[zone.package]
+            domains[zone.domain] = domains.get(zone.domain, 0) + consumed
+        for domains in consumed_energy.values():
+            for domain, consumed in domains.items():
+                domains[domain] = Decimal(consumed) / 1_000_000
+        self._consumed = None
+        self._last_values = None
+        return consumed_energy
+
+    def is_running(self):
+        """Returns True if there is currently a measurement running, False otherwise."""
+        return self._sampler is not None
+
+
+class _RaplSampler(limitmonitor.Limit):
+    """Calls a function periodically while registered at the LimitMonitor."""
+
+    def __init__(self, sample_fn):
+        super(_RaplSampler, self).__init__(pid_to_kill=None)
+        self._sample_fn = sample_fn
+
+    def first_check_time(self):
+        return time.monotonic() + _RAPL_SAMPLE_INTERVAL
+
+    def _check(self):
+        self._sample_fn()
+        return time.monotonic() + _RAPL_SAMPLE_INTERVAL
+
+
 def format_energy_results(energy):
     """Take the result of an energy measurement and return a flat dictionary that contains all values."""
     if not energy:
@@ -10,7 +10,16 @@
 """
 
 import ctypes as _ctypes
-from ctypes import c_int, c_uint32, c_long, c_ulong, c_size_t, c_char_p, c_void_p
+from ctypes import (
+    c_int,
+    c_uint,
+    c_uint32,
+    c_long,
+    c_ulong,
+    c_size_t,
+    c_char_p,
+    c_void_p,
+)
 import os as _os
 
 _libc = _ctypes.CDLL("libc.so.6", use_errno=True)
@@ -69,6 +78,11 @@ unshare = _libc.unshare
 unshare.argtypes = [c_int]
 unshare.errcheck = _check_errno
 
+setns = _libc.setns
+"""Move current thread into existing namespace given as file descriptor."""
+setns.argtypes = [c_int, c_int]  # fd, nstype
+setns.errcheck = _check_errno
+
 
 mmap = _libc.mmap
 """Map file into memory."""
@@ -197,3 +211,42 @@ PR_GET_SECCOMP = 21
 PR_SET_SECCOMP = 22
 SUID_DUMP_DISABLE = 0
 SUID_DUMP_USER = 1
+
+eventfd = _libc.eventfd
+"""Create a file descriptor for event notification."""
+eventfd.argtypes = [c_uint, c_int]  # initval, flags
+eventfd.errcheck = _check_errno
+
+# /usr/include/sys/eventfd.h
+EFD_NONBLOCK = 0o4000
+EFD_CLOEXEC = 0o2000000
+
+inotify_init1 = _libc.inotify_init1
+"""Create an inotify instance for watching file-system events."""
+inotify_init1.argtypes = [c_int]  # flags
+inotify_init1.errcheck = _check_errno
+
+inotify_add_watch = _libc.inotify_add_watch
+"""Add a watch for a path to an inotify instance and return the watch descriptor."""
+inotify_add_watch.argtypes = [c_int, c_char_p, c_uint32]  # fd, path, mask
+inotify_add_watch.errcheck = _check_errno
+
+inotify_rm_watch = _libc.inotify_rm_watch
+"""Remove a watch from an inotify instance."""
+inotify_rm_watch.argtypes = [c_int, c_int]  # fd, wd
+inotify_rm_watch.errcheck = _check_errno
+
+# /usr/include/sys/inotify.h
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
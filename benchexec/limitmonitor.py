@@ -0,0 +1,232 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains a monitor that enforces the limits of all currently executing
+runs of this process with a single thread, instead of one thread per limit and run.
+"""
+
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import os
+import select
+import sys
+import threading
+import time
+
+from benchexec import libc
+from benchexec import util
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor():
+    """Return the LimitMonitor of this process, starting it if necessary."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = LimitMonitor()
+        return _monitor
+
+
+class Limit(object):
+    """
+    Base class for limits of one run that are enforced by the LimitMonitor.
+    Subclasses implement first_check_time() and _check() for limits that need to be
+    checked periodically, and/or fileno() and _handle_event() for limits that wait
+    for events on a file descriptor. The latter two methods return the time
+    (as given by time.monotonic()) when the limit should be checked next,
+    or None if no further check is necessary.
+    Subclasses with checks that can take long (like scanning the file system)
+    should set slow_check such that the check does not delay other limits.
+    Subclasses that wait for other events than readability of their file descriptor
+    should set event_mask accordingly. Event handlers need to consume the event,
+    otherwise it is reported again.
+
+    @param pid_to_kill: the process to kill if the limit is violated
+    @param callbackFn: A one-argument function that is called in case of a violation
+        with a string for the reason as argument
+    """
+
+    slow_check = False
+    event_mask = select.EPOLLIN
+
+    def __init__(self, pid_to_kill, callbackFn=lambda reason: None):
+        self._pid_to_kill = pid_to_kill
+        self._callback = callbackFn
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def first_check_time(self):
+        """Return the time when the limit should be checked first, or None."""
+        return None
+
+    def fileno(self):
+        """Return the file descriptor to wait for, or None."""
+        return None
+
+    def check(self):
+        with self._lock:
+            if self._cancelled:
+                return None
+            return self._check()
+
+    def handle_event(self):
+        with self._lock:
+            if self._cancelled:
+                return None
+            return self._handle_event()
+
+    def cancel(self):
+        """
+        Stop enforcing this limit. If a check is currently executing,
+        this waits until it is finished, such that the limit does not interfere
+        with the cleanup of the run afterwards.
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._cancelled = True
+                self._close()
+
+    def _check(self):
+        return None
+
+    def _handle_event(self):
+        return None
+
+    def _close(self):
+        """Release resources of this limit, called once when it is cancelled."""
+        pass
+
+    def _kill(self, reason):
+        self._callback(reason)
+        util.kill_process(self._pid_to_kill)
+
+
+class LimitMonitor(object):
+    """
+    Enforce the limits of all runs with a single thread that waits with epoll
+    for the events of all registered file descriptors
+    and for the time of the next necessary check.
+    Checks that take long are executed by a single helper thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limits = set()
+        self._limit_of_fd = {}
+        self._schedule = []  # heap of (time, id, limit)
+        self._scheduled_id = {}  # the id of the valid heap entry of each limit
+        self._ids = itertools.count()
+        self._slow_check_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self._epoll = select.epoll()
+        self._wakeup_fd = libc.eventfd(0, libc.EFD_CLOEXEC | libc.EFD_NONBLOCK)
+        self._epoll.register(self._wakeup_fd, select.EPOLLIN)
+
+        self._thread = threading.Thread(target=self._run, name="LimitMonitor")
+        # Nothing needs to be cleaned up if the monitor is stopped on exit
+        # because all limits would belong to runs that get killed anyway.
+        self._thread.daemon = True
+        self._thread.start()
+
+    def register(self, limit):
+        """Start enforcing a limit."""
+        check_time = limit.first_check_time()
+        with self._lock:
+            self._limits.add(limit)
+            fd = limit.fileno()
+            if fd is not None:
+                self._limit_of_fd[fd] = limit
+                self._epoll.register(fd, limit.event_mask)
+            if check_time is not None:
+                self._schedule_check(limit, check_time)
+        self._wakeup()
+
+    def unregister(self, limit):
+        """
+        Stop enforcing a limit and cancel it. Can be called several times.
+        After this method returns, no check of the limit is executing.
+        """
+        with self._lock:
+            if limit in self._limits:
+                self._limits.remove(limit)
+                self._scheduled_id.pop(limit, None)
+                self._unregister_fd(limit)
+                if len(self._schedule) > 2 * len(self._scheduled_id) + 100:
+                    # remove outdated entries of cancelled limits
+                    self._schedule = [
+                        entry
+                        for entry in self._schedule
+                        if self._scheduled_id.get(entry[2]) == entry[1]
+                    ]
+                    heapq.heapify(self._schedule)
+        limit.cancel()
+
+    def _unregister_fd(self, limit):
+        fd = limit.fileno()
+        if fd is not None and self._limit_of_fd.get(fd) is limit:
+            del self._limit_of_fd[fd]
+            self._epoll.unregister(fd)
+
+    def _schedule_check(self, limit, check_time):
+        if limit in self._limits:
+            entry_id = next(self._ids)
+            self._scheduled_id[limit] = entry_id
+            heapq.heappush(self._schedule, (check_time, entry_id, limit))
+
+    def _wakeup(self):
+        if threading.current_thread() is not self._thread:
+            os.write(self._wakeup_fd, (1).to_bytes(8, sys.byteorder))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                timeout = -1
+                if self._schedule:
+                    timeout = max(self._schedule[0][0] - time.monotonic(), 0)
+
+            for fd, _ in self._epoll.poll(timeout):
+                if fd == self._wakeup_fd:
+                    os.read(self._wakeup_fd, 8)
+                    continue
+                with self._lock:
+                    limit = self._limit_of_fd.get(fd)
+                    if limit is None:
+                        continue
+                self._run_check(limit, limit.handle_event)
+
+            now = time.monotonic()
+            due_limits = []
+            with self._lock:
+                while self._schedule and self._schedule[0][0] <= now:
+                    _, entry_id, limit = heapq.heappop(self._schedule)
+                    if self._scheduled_id.get(limit) == entry_id:
+                        del self._scheduled_id[limit]
+                        due_limits.append(limit)
+
+            for limit in due_limits:
+                if limit.slow_check:
+                    self._slow_check_executor.submit(
+                        self._run_check, limit, limit.check
+                    )
+                else:
+                    self._run_check(limit, limit.check)
+
+    def _run_check(self, limit, check_fn):
+        try:
+            check_time = check_fn()
+        except Exception:
+            logging.exception("Enforcing limit %s failed.", limit)
+            return
+        if check_time is not None:
+            with self._lock:
+                self._schedule_check(limit, check_time)
+            self._wakeup()
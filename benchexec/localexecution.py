@@ -5,6 +5,7 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import collections
 import logging
 import os
 import queue
@@ -18,7 +19,8 @@ from benchexec import cgroups
 from benchexec import containerexecutor
 from benchexec import resources
 from benchexec.runexecutor import RunExecutor
-from benchexec.pqos import Pqos
+from benchexec.pqos import Pqos, PqosMonitoringSession
+from benchexec import runordering
 from benchexec import systeminfo
 from benchexec import tooladapter
 from benchexec import util
@@ -27,6 +29,23 @@ from benchexec.intel_cpu_energy import EnergyMeasurement
 
 WORKER_THREADS = []
 STOPPED_BY_INTERRUPT = False
+_my_cgroups = None  # cgroups of this process, c.f. init_cgroups()
+
+
+def init_cgroups():
+    """
+    Find the cgroups of this process and prepare them for creating the cgroups
+    of the runs, once for all benchmarks.
+    This needs to be called before any further processes are started
+    (e.g., for tool-info modules in containers, zygotes, or energy measurement),
+    because with cgroups v2 these would prevent enabling controllers.
+    @return: the cgroups of this process
+    """
+    global _my_cgroups
+    if _my_cgroups is None:
+        _my_cgroups = cgroups.find_my_cgroups()
+        _my_cgroups.prepare_child_cgroups()
+    return _my_cgroups
 
 
 def init(config, benchmark):
@@ -48,15 +67,21 @@ def init(config, benchmark):
     benchmark.executable = benchmark.tool.executable(tool_locator)
     benchmark.tool_version = benchmark.tool.version(benchmark.executable)
 
+    benchmark.run_predictor = None
+    if config.history_result_files:
+        default_cputime = config.default_predicted_cputime
+        if default_cputime is None:
+            default_cputime = benchmark.rlimits.cputime or 0
+        benchmark.run_predictor = runordering.RuntimePredictor(
+            config.history_result_files, default_cputime
+        )
+
 
 def get_system_info():
     return systeminfo.SystemInfo()
 
 
 def execute_benchmark(benchmark, output_handler):
-
-    run_sets_executed = 0
-
     logging.debug("I will use %s threads.", benchmark.num_of_threads)
 
     if (
@@ -69,29 +94,42 @@ def execute_benchmark(benchmark, output_handler):
             "only resource limits are used."
         )
 
-    my_cgroups = cgroups.find_my_cgroups()
+    my_cgroups = init_cgroups()
+    _Worker.my_cgroups = my_cgroups
     required_cgroups = set()
 
     coreAssignment = None  # cores per run
     memoryAssignment = None  # memory banks per run
+    resource_pool = None  # cores and memory banks assigned when runs are started
     cpu_packages = None
     pqos = Pqos(show_warnings=True)  # The pqos class instance for cache allocation
     pqos.reset_monitoring()
+    _Worker.pqos_session = PqosMonitoringSession(Pqos())
+
+    run_sets = [runSet for runSet in benchmark.run_sets if runSet.should_be_executed()]
+    core_limits = {runSet.rlimits.cpu_cores for runSet in run_sets}
+    memory_limits = {runSet.rlimits.memory for runSet in run_sets}
+    has_different_limits = len(core_limits) > 1 or len(memory_limits) > 1
+    core_limits.discard(None)
+    memory_limits.discard(None)
 
-    if benchmark.rlimits.cpu_cores:
+    if core_limits:
         if not my_cgroups.require_subsystem(cgroups.CPUSET):
             required_cgroups.add(cgroups.CPUSET)
             logging.error(
                 "Cgroup subsystem cpuset is required "
                 "for limiting the number of CPU cores/memory nodes."
             )
+        elif has_different_limits:
+            resource_pool = _create_resource_pool(benchmark, run_sets, my_cgroups)
         else:
             coreAssignment = resources.get_cpu_cores_per_run(
-                benchmark.rlimits.cpu_cores,
+                max(core_limits),
                 benchmark.num_of_threads,
                 benchmark.config.use_hyperthreading,
                 my_cgroups,
                 benchmark.config.coreset,
+                benchmark.config.core_class,
             )
             pqos.allocate_l3ca(coreAssignment)
             memoryAssignment = resources.get_memory_banks_per_run(
@@ -106,15 +144,23 @@ def execute_benchmark(benchmark, output_handler):
         sys.exit(
             "Please limit the number of cores first if you also want to limit the set of available cores."
         )
+    elif benchmark.config.core_class:
+        sys.exit(
+            "Please limit the number of cores first if you also want to limit the class of used cores."
+        )
 
-    if benchmark.rlimits.memory:
+    if memory_limits:
         if not my_cgroups.require_subsystem(cgroups.MEMORY):
             required_cgroups.add(cgroups.MEMORY)
             logging.error("Cgroup subsystem memory is required for memory limit.")
+        elif resource_pool:
+            # the resource pool checks the memory banks whenever a run is started,
+            # here we only check that a single run fits
+            resources.check_memory_size(max(memory_limits), 1, None, my_cgroups)
         else:
             # check whether we have enough memory in the used memory banks for all runs
             resources.check_memory_size(
-                benchmark.rlimits.memory,
+                max(memory_limits),
                 benchmark.num_of_threads,
                 memoryAssignment,
                 my_cgroups,
@@ -134,15 +180,107 @@ def execute_benchmark(benchmark, output_handler):
             "and thus makes the performance unreliable."
         )
 
+    run_predictor = benchmark.run_predictor
+    scheduler = _ResourceScheduler(resource_pool) if resource_pool else None
+
     throttle_check = systeminfo.CPUThrottleCheck()
     swap_check = systeminfo.SwapCheck()
 
+    if benchmark.config.pipeline_run_sets:
+        _execute_run_sets_pipelined(
+            benchmark,
+            output_handler,
+            coreAssignment,
+            memoryAssignment,
+            run_predictor,
+            scheduler,
+        )
+    else:
+        _execute_run_sets_sequentially(
+            benchmark,
+            output_handler,
+            coreAssignment,
+            memoryAssignment,
+            cpu_packages,
+            run_predictor,
+            scheduler,
+        )
+
+    if throttle_check.has_throttled():
+        logging.warning(
+            "CPU throttled itself during benchmarking due to overheating. "
+            "Benchmark results are unreliable!"
+        )
+    if swap_check.has_swapped():
+        logging.warning(
+            "System has swapped during benchmarking. "
+            "Benchmark results are unreliable!"
+        )
+    pqos.reset_resources()
+    output_handler.output_after_benchmark(STOPPED_BY_INTERRUPT)
+
+    return 0
+
+
+def _create_resource_pool(benchmark, run_sets, my_cgroups):
+    """
+    Create a ResourcePool for run sets with different resource limits
+    and check that the runs of each run set fit into it.
+    """
+    if any(runSet.rlimits.cpu_cores is None for runSet in run_sets):
+        sys.exit(
+            "If run definitions have different resource limits, "
+            "all of them need a limit for the number of CPU cores."
+        )
+    resource_pool = resources.create_resource_pool(
+        benchmark.config.use_hyperthreading,
+        my_cgroups,
+        benchmark.config.coreset,
+        benchmark.config.core_class,
+    )
+    for runSet in run_sets:
+        if not resource_pool.can_ever_allocate(
+            runSet.rlimits.cpu_cores, runSet.rlimits.memory
+        ):
+            memory = runSet.rlimits.memory
+            sys.exit(
+                f"Cannot execute runs of run definition {runSet.full_name} "
+                f"with {runSet.rlimits.cpu_cores} CPU cores"
+                + (f" and {memory} bytes of memory" if memory else "")
+                + " on this machine."
+            )
+    logging.debug(
+        "Run definitions have different resource limits, "
+        "assigning CPU cores and memory to each run when it is started."
+    )
+    return resource_pool
+
+
+def _execute_run_sets_sequentially(
+    benchmark,
+    output_handler,
+    coreAssignment,
+    memoryAssignment,
+    cpu_packages,
+    run_predictor=None,
+    scheduler=None,
+):
+    """
+    Execute the run sets one after another,
+    waiting for all runs of a run set to finish before starting the next one.
+    If a run_predictor is given, the runs of each run set are started
+    in order of their predicted CPU time, longest first.
+    If a scheduler is given, it assigns resources to each run instead of
+    using coreAssignment and memoryAssignment.
+    """
     # iterate over run sets
     for runSet in benchmark.run_sets:
 
         if STOPPED_BY_INTERRUPT:
             break
 
+        benchmark.check_run_expansion()
+
         if not runSet.should_be_executed():
             output_handler.output_for_skipping_run_set(runSet)
 
@@ -152,7 +290,6 @@ def execute_benchmark(benchmark, output_handler):
             )
 
         else:
-            run_sets_executed += 1
             # get times before runSet
             energy_measurement = EnergyMeasurement.create_if_supported()
             ruBefore = resource.getrusage(resource.RUSAGE_CHILDREN)
@@ -162,27 +299,22 @@ def execute_benchmark(benchmark, output_handler):
 
             output_handler.output_before_run_set(runSet)
 
-            # put all runs into a queue
-            for run in runSet.runs:
-                _Worker.working_queue.put(run)
+            # put all runs into a queue (except those finished in a previous execution)
+            runs = [run for run in runSet.runs if not run.restored]
+            if run_predictor:
+                runs = run_predictor.order_longest_first(runs)
+            for run in runs:
+                _enqueue_run(run, scheduler)
 
             # keep a counter of unfinished runs for the below assertion
-            unfinished_runs = len(runSet.runs)
+            unfinished_runs = len(runs)
             unfinished_runs_lock = threading.Lock()
 
-            def run_finished():
+            def run_finished(run, run_result):
                 nonlocal unfinished_runs
                 with unfinished_runs_lock:
                     unfinished_runs -= 1
 
-            if not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED:
-                logging.debug(
-                    "Using sys.setswitchinterval() workaround for #435 in container "
-                    "mode because native callback is not available."
-                )
-                py_switch_interval = sys.getswitchinterval()
-                sys.setswitchinterval(1000)
-
             # create some workers
             for i in range(min(benchmark.num_of_threads, unfinished_runs)):
                 if STOPPED_BY_INTERRUPT:
@@ -190,7 +322,14 @@ def execute_benchmark(benchmark, output_handler):
                 cores = coreAssignment[i] if coreAssignment else None
                 memBanks = memoryAssignment[i] if memoryAssignment else None
                 WORKER_THREADS.append(
-                    _Worker(benchmark, cores, memBanks, output_handler, run_finished)
+                    _Worker(
+                        benchmark,
+                        cores,
+                        memBanks,
+                        output_handler,
+                        run_finished,
+                        scheduler=scheduler,
+                    )
                 )
 
             # wait until workers are finished (all tasks done or STOPPED_BY_INTERRUPT)
@@ -209,8 +348,13 @@ def execute_benchmark(benchmark, output_handler):
             if energy and cpu_packages:
                 energy = {pkg: energy[pkg] for pkg in energy if pkg in cpu_packages}
 
-            if not containerexecutor.NATIVE_CLONE_CALLBACK_SUPPORTED:
-                sys.setswitchinterval(py_switch_interval)
+            if run_predictor and not STOPPED_BY_INTERRUPT:
+                run_predictor.log_makespan(
+                    f"run set {runSet.full_name}",
+                    runs,
+                    benchmark.num_of_threads,
+                    usedWallTime,
+                )
 
             if STOPPED_BY_INTERRUPT:
                 output_handler.set_error("interrupted", runSet)
@@ -218,20 +362,286 @@ def execute_benchmark(benchmark, output_handler):
                 runSet, cputime=usedCpuTime, walltime=usedWallTime, energy=energy
             )
 
-    if throttle_check.has_throttled():
-        logging.warning(
-            "CPU throttled itself during benchmarking due to overheating. "
-            "Benchmark results are unreliable!"
+
+def _execute_run_sets_pipelined(
+    benchmark,
+    output_handler,
+    coreAssignment,
+    memoryAssignment,
+    run_predictor=None,
+    scheduler=None,
+):
+    """
+    Execute the runs of all run sets with one shared pool of workers,
+    such that idle workers at the end of one run set already start with the runs
+    of the next run set.
+    The runs of each run set are queued as soon as they were created,
+    and the results of each run set are written as soon as its last run has finished.
+    Because run sets overlap, their cputime, walltime, and energy are computed from
+    the measurements of their own runs instead of from the whole process.
+    If a run_predictor is given, the runs of each run set are started
+    in order of their predicted CPU time, longest first.
+    If a scheduler is given, it assigns resources to each run instead of
+    using coreAssignment and memoryAssignment.
+    """
+    executions = {}  # id of run set -> _RunSetExecution
+    finished_run_sets = queue.Queue()
+    queued_runs = []
+
+    def run_started(run):
+        executions[id(run.runSet)].run_started()
+
+    def run_finished(run, run_result):
+        execution = executions[id(run.runSet)]
+        if execution.run_finished(run_result):
+            finished_run_sets.put(execution)
+
+    def finish_run_set(execution):
+        execution.finish(output_handler)
+        del executions[id(execution.run_set)]
+
+    def start_workers():
+        for i in range(benchmark.num_of_threads):
+            if STOPPED_BY_INTERRUPT:
+                break
+            cores = coreAssignment[i] if coreAssignment else None
+            memBanks = memoryAssignment[i] if memoryAssignment else None
+            WORKER_THREADS.append(
+                _Worker(
+                    benchmark,
+                    cores,
+                    memBanks,
+                    output_handler,
+                    run_finished,
+                    run_started_callback=run_started,
+                    scheduler=scheduler,
+                    wait_for_runs=True,
+                )
+            )
+
+    walltime_before = time.monotonic()
+    expansion_error = None
+    if scheduler:
+        scheduler.expect_more_runs(True)
+    try:
+        # The runs of later run sets may still be created in the background,
+        # so queue the run sets one after another while the workers are running.
+        for runSet in benchmark.run_sets:
+            if STOPPED_BY_INTERRUPT:
+                break
+
+            try:
+                benchmark.check_run_expansion()
+            except (BenchExecException, SystemExit) as e:
+                # finish the run sets that are already running, then abort
+                expansion_error = e
+                break
+
+            if not runSet.should_be_executed():
+                output_handler.output_for_skipping_run_set(runSet)
+            elif not runSet.runs:
+                output_handler.output_for_skipping_run_set(
+                    runSet, "because it has no files"
+                )
+            else:
+                output_handler.output_before_run_set(runSet, defer_log_header=True)
+                execution = _RunSetExecution(runSet)
+                executions[id(runSet)] = execution
+                if not execution.unfinished_runs:
+                    # all runs were finished in a previous execution
+                    finished_run_sets.put(execution)
+
+                runs = execution.runs
+                if run_predictor:
+                    runs = run_predictor.order_longest_first(runs)
+                for run in runs:
+                    _enqueue_run(run, scheduler)
+                queued_runs.extend(runs)
+                if runs and not WORKER_THREADS:
+                    start_workers()
+
+            while not finished_run_sets.empty():
+                finish_run_set(finished_run_sets.get())
+    finally:
+        # let the workers terminate as soon as the queue is empty
+        if scheduler:
+            scheduler.expect_more_runs(False)
+        else:
+            for _ in WORKER_THREADS:
+                _Worker.working_queue.put(None)
+
+    # Finalize run sets in this thread as soon as they are done,
+    # until all workers have terminated (all tasks done or STOPPED_BY_INTERRUPT).
+    while executions:
+        try:
+            execution = finished_run_sets.get(timeout=1)
+        except queue.Empty:
+            if any(worker.is_alive() for worker in WORKER_THREADS):
+                continue
+            if finished_run_sets.empty():
+                break
+            continue
+        finish_run_set(execution)
+
+    for worker in WORKER_THREADS:
+        worker.join()
+    assert not executions or STOPPED_BY_INTERRUPT
+
+    # run sets that were interrupted before all their runs have finished
+    for execution in list(executions.values()):
+        execution.finish(output_handler)
+
+    if run_predictor and queued_runs and not STOPPED_BY_INTERRUPT:
+        run_predictor.log_makespan(
+            f"benchmark {benchmark.name}",
+            queued_runs,
+            benchmark.num_of_threads,
+            time.monotonic() - walltime_before,
         )
-    if swap_check.has_swapped():
-        logging.warning(
-            "System has swapped during benchmarking. "
-            "Benchmark results are unreliable!"
+
+    if expansion_error:
+        raise expansion_error
+
+
+class _RunSetExecution(object):
+    """
+    Bookkeeping for one run set whose runs are executed by the shared workers
+    in pipelined mode.
+    """
+
+    def __init__(self, run_set):
+        self.run_set = run_set
+        self.runs = [run for run in run_set.runs if not run.restored]
+        self.unfinished_runs = len(self.runs)
+        self.cputime = 0
+        self.energy = None
+        self.walltime_before = None
+        self.walltime_after = None
+        self._lock = threading.Lock()
+
+    def run_started(self):
+        with self._lock:
+            if self.walltime_before is None:
+                self.walltime_before = time.monotonic()
+
+    def run_finished(self, run_result):
+        """
+        Account for a finished run.
+        @return: whether this was the last unfinished run of the run set
+        """
+        with self._lock:
+            self.unfinished_runs -= 1
+            self.walltime_after = time.monotonic()
+            if run_result:
+                self.cputime += run_result.get("cputime") or 0
+                energy = run_result.get("cpuenergy")
+                if energy:
+                    self.energy = self.energy or collections.defaultdict(dict)
+                    for pkg, domains in energy.items():
+                        for domain, value in domains.items():
+                            self.energy[pkg][domain] = (
+                                self.energy[pkg].get(domain, 0) + value
+                            )
+            return self.unfinished_runs == 0
+
+    def finish(self, output_handler):
+        walltime = None
+        if self.walltime_before is not None:
+            walltime = self.walltime_after - self.walltime_before
+        if STOPPED_BY_INTERRUPT:
+            output_handler.set_error("interrupted", self.run_set)
+        output_handler.output_after_run_set(
+            self.run_set, cputime=self.cputime, walltime=walltime, energy=self.energy
         )
-    pqos.reset_resources()
-    output_handler.output_after_benchmark(STOPPED_BY_INTERRUPT)
 
-    return 0
+
+def _enqueue_run(run, scheduler):
+    if scheduler:
+        scheduler.put(run)
+    else:
+        _Worker.working_queue.put(run)
+
+
+# How often later runs may be started before the first queued run of a
+# _ResourceScheduler if not enough resources are free for the latter.
+_MAX_BYPASSES_OF_FIRST_RUN = 10
+
+
+class _ResourceScheduler(object):
+    """
+    Hand out queued runs to workers together with the CPU cores and memory banks
+    that a ResourcePool assigns to them according to the limits of their run set.
+    Runs are started in the order of the queue, but if not enough resources are
+    free for a run, later runs with smaller limits may be started first
+    such that no cores stay idle unnecessarily.
+    This happens at most max_bypasses times for the first run of the queue,
+    afterwards the free resources are reserved for it such that it cannot starve.
+    """
+
+    def __init__(self, resource_pool, max_bypasses=_MAX_BYPASSES_OF_FIRST_RUN):
+        self._resource_pool = resource_pool
+        self._max_bypasses = max_bypasses
+        self._runs = []
+        self._bypasses = 0  # number of runs started before the first queued run
+        self._running_runs = 0
+        self._more_runs_expected = False
+        self._condition = threading.Condition()
+
+    def put(self, run):
+        with self._condition:
+            self._runs.append(run)
+            self._condition.notify_all()
+
+    def expect_more_runs(self, expected):
+        """
+        Declare whether further runs may still be put into the queue,
+        in which case get() waits for them instead of returning (None, None)
+        when the queue is empty.
+        """
+        with self._condition:
+            self._more_runs_expected = expected
+            self._condition.notify_all()
+
+    def get(self):
+        """
+        Wait until enough resources are free for one of the queued runs.
+        @return: a tuple of the run and its ResourceAllocation,
+            or (None, None) if there are no more runs
+        """
+        with self._condition:
+            while (self._runs or self._more_runs_expected) and not STOPPED_BY_INTERRUPT:
+                failed_limits = set()
+                for i, run in enumerate(self._runs):
+                    if i > 0 and self._bypasses >= self._max_bypasses:
+                        break  # wait until the first run can be started
+                    limits = (run.runSet.rlimits.cpu_cores, run.runSet.rlimits.memory)
+                    if limits in failed_limits:
+                        continue
+                    allocation = self._resource_pool.allocate(*limits)
+                    if allocation:
+                        del self._runs[i]
+                        self._bypasses = self._bypasses + 1 if i > 0 else 0
+                        self._running_runs += 1
+                        return run, allocation
+                    failed_limits.add(limits)
+
+                # All runs fit into the machine (checked in _create_resource_pool),
+                # so some other run must be occupying the resources.
+                assert self._running_runs or not self._runs
+                self._condition.wait()
+            return None, None
+
+    def release(self, allocation):
+        """Give back the resources of a finished run."""
+        with self._condition:
+            self._resource_pool.release(allocation)
+            self._running_runs -= 1
+            self._condition.notify_all()
+
+    def stop(self):
+        """Wake up all waiting workers such that they can terminate."""
+        with self._condition:
+            self._condition.notify_all()
 
 
 def stop():
@@ -247,34 +657,65 @@ def stop():
 class _Worker(threading.Thread):
     """
     A Worker is a deamonic thread, that takes jobs from the working_queue and runs them.
+    If wait_for_runs is True, it waits for further jobs until it gets None
+    from the working_queue instead of terminating as soon as the queue is empty.
     """
 
     working_queue = queue.Queue()
+    pqos_session = None  # PqosMonitoringSession shared by all workers
+    my_cgroups = None  # cgroups of this process shared by all RunExecutors
 
     def __init__(
-        self, benchmark, my_cpus, my_memory_nodes, output_handler, run_finished_callback
+        self,
+        benchmark,
+        my_cpus,
+        my_memory_nodes,
+        output_handler,
+        run_finished_callback,
+        run_started_callback=None,
+        scheduler=None,
+        wait_for_runs=False,
     ):
         threading.Thread.__init__(self)  # constuctor of superclass
         self.run_finished_callback = run_finished_callback
+        self.run_started_callback = run_started_callback
         self.benchmark = benchmark
         self.my_cpus = my_cpus
         self.my_memory_nodes = my_memory_nodes
         self.output_handler = output_handler
-        self.run_executor = RunExecutor(**benchmark.config.containerargs)
+        self.scheduler = scheduler
+        self.wait_for_runs = wait_for_runs
+        self.run_executor = RunExecutor(
+            my_cgroups=self.my_cgroups, **benchmark.config.containerargs
+        )
         self.setDaemon(True)
 
         self.start()
 
     def run(self):
         while not STOPPED_BY_INTERRUPT:
-            try:
-                currentRun = _Worker.working_queue.get_nowait()
-            except queue.Empty:
-                return
-
+            allocation = None
+            if self.scheduler:
+                currentRun, allocation = self.scheduler.get()
+                if currentRun is None:
+                    return
+                self.my_cpus = allocation.cores
+                self.my_memory_nodes = allocation.memory_banks
+            else:
+                try:
+                    currentRun = _Worker.working_queue.get(block=self.wait_for_runs)
+                except queue.Empty:
+                    return
+                if currentRun is None:  # no more runs will be queued
+                    _Worker.working_queue.task_done()
+                    return
+
+            if self.run_started_callback:
+                self.run_started_callback(currentRun)
+            run_result = None
             try:
                 logging.debug('Executing run "%s"', currentRun.identifier)
-                self.execute(currentRun)
+                run_result = self.execute(currentRun)
                 logging.debug('Finished run "%s"', currentRun.identifier)
             except SystemExit as e:
                 logging.critical(e)
@@ -282,22 +723,26 @@ class _Worker(threading.Thread):
                 logging.critical(e)
             except BaseException:
                 logging.exception("Exception during run execution")
-            self.run_finished_callback()
-            _Worker.working_queue.task_done()
+            if allocation:
+                self.scheduler.release(allocation)
+            self.run_finished_callback(currentRun, run_result)
+            if not self.scheduler:
+                _Worker.working_queue.task_done()
 
     def execute(self, run):
         """
         This function executes the tool with a sourcefile with options.
         It also calls functions for output before and after the run.
+        @return: the result of the run, or None if the run was interrupted
         """
         self.output_handler.output_before_run(run)
         benchmark = self.benchmark
 
         args = run.cmdline()
         logging.debug("Command line of run is %s", args)
-        pqos = Pqos()
-        if self.my_cpus:
-            pqos.start_monitoring([self.my_cpus])
+        mon_process = None
+        if self.my_cpus and self.pqos_session:
+            mon_process = self.pqos_session.start(self.my_cpus)
         run_result = self.run_executor.execute_run(
             args,
             output_filename=run.log_file,
@@ -308,16 +753,16 @@ class _Worker(threading.Thread):
             walltimelimit=benchmark.rlimits.walltime,
             cores=self.my_cpus,
             memory_nodes=self.my_memory_nodes,
-            memlimit=benchmark.rlimits.memory,
+            memlimit=run.runSet.rlimits.memory,
             environments=benchmark.environment(),
             workingDir=benchmark.working_directory(),
             maxLogfileSize=benchmark.config.maxLogfileSize,
             files_count_limit=benchmark.config.filesCountLimit,
             files_size_limit=benchmark.config.filesSizeLimit,
         )
-        mon_data = pqos.stop_monitoring()
+        mon_data = self.pqos_session.stop(mon_process) if self.pqos_session else {}
         run_result.update(mon_data)
-        if not mon_data:
+        if self.my_cpus and not mon_data:
             logging.debug(
                 "Could not monitor cache and memory bandwidth events for run: %s",
                 run.identifier,
@@ -332,7 +777,7 @@ class _Worker(threading.Thread):
                     os.remove(run.log_file)
             except OSError:
                 pass
-            return 1
+            return None
 
         if self.my_cpus:
             run_result["cpuCores"] = self.my_cpus
@@ -341,9 +786,11 @@ class _Worker(threading.Thread):
 
         run.set_result(run_result)
         self.output_handler.output_after_run(run)
-        return None
+        return run_result
 
     def stop(self):
         # asynchronous call to runexecutor,
         # the worker will stop asap, but not within this method.
         self.run_executor.stop()
+        if self.scheduler:
+            self.scheduler.stop()
@@ -6,13 +6,20 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import collections
+import concurrent.futures
 import logging
 import os
 import re
 import sys
+import threading
 import yaml
 from xml.etree import ElementTree
 
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader  # faster if libyaml is available
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
 from benchexec import BenchExecException
 from benchexec import intel_cpu_energy
 from benchexec import result
@@ -46,6 +53,10 @@ _WARNED_ABOUT_UNSUPPORTED_EXPECTED_RESULT_FILTER = False
 
 _TASK_DEF_VERSIONS = frozenset(["0.1", "1.0", "2.0"])
 
+# Below this number of task-definition files, starting worker processes does not pay off
+_PARALLEL_TASK_DEF_LOADING_THRESHOLD = 1000
+_PARALLEL_TASK_DEF_LOADING_MAX_WORKERS = 8
+
 
 def substitute_vars(oldList, runSet=None, task_file=None):
     """
@@ -91,7 +102,7 @@ def load_task_definition_file(task_def_file):
     """Open and parse a task-definition file in YAML format."""
     try:
         with open(task_def_file) as f:
-            task_def = yaml.safe_load(f)
+            task_def = yaml.load(f, Loader=_YamlSafeLoader)
     except OSError as e:
         raise BenchExecException(f"Cannot open task-definition file: {e}")
     except yaml.YAMLError as e:
@@ -116,12 +127,13 @@ def load_task_definition_file(task_def_file):
     return task_def
 
 
-def handle_files_from_task_definition(patterns, task_def_file):
+def handle_files_from_task_definition(patterns, task_def_file, directory_index=None):
     """
     Handle content of a key like input_files in a task-definition file and return list
     of matching files.
     @param patterns: the content of such a key (None, list, or string)
     @param task_def_file: name of task-definition file
+    @param directory_index: an optional util.DirectoryIndex for expanding patterns
     """
     if patterns is None:
         return []
@@ -131,7 +143,7 @@ def handle_files_from_task_definition(patterns, task_def_file):
         patterns = [patterns]
     for pattern in patterns:
         expanded = util.expand_filename_pattern(
-            str(pattern), os.path.dirname(task_def_file)
+            str(pattern), os.path.dirname(task_def_file), directory_index
         )
         if not expanded:
             raise BenchExecException(
@@ -143,6 +155,146 @@ def handle_files_from_task_definition(patterns, task_def_file):
     return result
 
 
+def _try_load_task_definition_file(task_def_file):
+    """Load a task-definition file, or return None if it is invalid."""
+    try:
+        return load_task_definition_file(task_def_file)
+    except BenchExecException:
+        return None
+
+
+class _TaskDefinitionCache(object):
+    """
+    Cache for task-definition files and the files that they refer to,
+    such that each task-definition file is loaded only once even if it is used
+    in several run sets. Entries are identified by file name and are reloaded
+    if the modification time or the size of the file changes.
+    """
+
+    def __init__(self):
+        self.allow_processes = True  # whether preload() may start worker processes
+        self._entries = {}  # file name -> _CachedTaskDefinition
+        self._expanded_patterns = {}  # (pattern, base dir) -> list of file names
+        self._same_files = {}  # (file name, file name) -> bool
+        # all patterns are expanded with this index, such that each directory
+        # is listed only once while the benchmark is loaded
+        self.directory_index = util.DirectoryIndex()
+
+    @staticmethod
+    def _stat_key(task_def_file):
+        try:
+            stat_result = os.stat(task_def_file)
+        except OSError:
+            return None
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def _get_valid_entry(self, task_def_file, stat_key):
+        entry = self._entries.get(task_def_file)
+        if entry is not None and stat_key is not None and entry.stat_key == stat_key:
+            return entry
+        return None
+
+    def get(self, task_def_file):
+        """Return the (possibly cached) _CachedTaskDefinition for the given file."""
+        stat_key = self._stat_key(task_def_file)
+        entry = self._get_valid_entry(task_def_file, stat_key)
+        if entry is None:
+            # If the file cannot be accessed, this produces the appropriate error.
+            content = load_task_definition_file(task_def_file)
+            entry = _CachedTaskDefinition(task_def_file, stat_key, content)
+            if stat_key is not None:
+                self._entries[task_def_file] = entry
+        return entry
+
+    def preload(self, task_def_files):
+        """
+        Load the given task-definition files that are not cached yet,
+        using several processes if there are many of them.
+        Invalid files are skipped, the error is reported when they are used.
+        """
+        if not self.allow_processes:
+            return  # files will be loaded on demand
+        missing = []
+        for task_def_file in task_def_files:
+            stat_key = self._stat_key(task_def_file)
+            if stat_key and not self._get_valid_entry(task_def_file, stat_key):
+                missing.append((task_def_file, stat_key))
+        workers = min(
+            len(os.sched_getaffinity(0)), _PARALLEL_TASK_DEF_LOADING_MAX_WORKERS
+        )
+        if len(missing) < _PARALLEL_TASK_DEF_LOADING_THRESHOLD or workers < 2:
+            return  # files will be loaded on demand
+
+        logging.debug(
+            "Loading %d task-definition files with %d processes.",
+            len(missing),
+            workers,
+        )
+        try:
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                contents = executor.map(
+                    _try_load_task_definition_file,
+                    [task_def_file for task_def_file, _ in missing],
+                    chunksize=max(1, len(missing) // (workers * 4)),
+                )
+                for (task_def_file, stat_key), content in zip(missing, contents):
+                    if content is not None:
+                        self._entries[task_def_file] = _CachedTaskDefinition(
+                            task_def_file, stat_key, content
+                        )
+        except (OSError, concurrent.futures.process.BrokenProcessPool) as e:
+            logging.debug("Could not load task-definition files in parallel: %s", e)
+
+    def expand_pattern(self, pattern, base_dir):
+        """
+        Cached version of util.expand_filename_pattern(),
+        useful for patterns that occur in many task-definition files.
+        The result must not be modified.
+        """
+        key = (pattern, base_dir)
+        files = self._expanded_patterns.get(key)
+        if files is None:
+            files = util.expand_filename_pattern(
+                pattern, base_dir, self.directory_index
+            )
+            self._expanded_patterns[key] = files
+        return files
+
+    def is_same_file(self, file1, file2):
+        """Cached version of os.path.samefile()."""
+        key = (file1, file2)
+        same = self._same_files.get(key)
+        if same is None:
+            same = os.path.samefile(file1, file2)
+            self._same_files[key] = same
+        return same
+
+
+class _CachedTaskDefinition(object):
+    """The content of a task-definition file and the input and required files."""
+
+    __slots__ = ["file_name", "stat_key", "content", "_files"]
+
+    def __init__(self, file_name, stat_key, content):
+        self.file_name = file_name
+        self.stat_key = stat_key
+        self.content = content
+        self._files = {}
+
+    def files(self, key, directory_index=None):
+        """
+        Return the list of files that are matched by the patterns in the given key
+        (like input_files). The result must not be modified.
+        """
+        files = self._files.get(key)
+        if files is None:
+            files = handle_files_from_task_definition(
+                self.content.get(key), self.file_name, directory_index
+            )
+            self._files[key] = files
+        return files
+
+
 def load_tool_info(tool_name: str, config):
     """
     Load the tool-info class.
@@ -229,6 +381,38 @@ def get_propertytag(parent):
     return tag
 
 
+def _parse_memory_limit(value):
+    # In a future BenchExec version, we could treat unit-less limits as bytes
+    try:
+        value = int(value)
+    except ValueError:
+        return util.parse_memory_value(value)
+    else:
+        raise ValueError(f"Memory limit must have a unit suffix, e.g., '{value} MB'")
+
+
+def _parse_limit_value(name, value, parse_fn):
+    try:
+        limit = parse_fn(value)
+    except ValueError as e:
+        sys.exit(f"Invalid value for {name.lower()} limit: {e}")
+    if limit <= 0:
+        sys.exit(
+            f'{name} limit "{value}" is invalid, '
+            f"it needs to be a positive number "
+            f"(or -1 on the command line for disabling it)."
+        )
+    return limit
+
+
+def get_benchmark_name(benchmark_file, config):
+    """Return the name of a benchmark, which is used as prefix for its output files."""
+    name = os.path.basename(benchmark_file)[:-4]  # remove ending ".xml"
+    if config.name:
+        name += "." + config.name
+    return name
+
+
 class Benchmark(object):
     """
     The class Benchmark manages the import of source files, options, columns and
@@ -248,9 +432,7 @@ class Benchmark(object):
         self.base_dir = os.path.dirname(self.benchmark_file)
 
         # get benchmark-name
-        self.name = os.path.basename(benchmark_file)[:-4]  # remove ending ".xml"
-        if config.name:
-            self.name += "." + config.name
+        self.name = get_benchmark_name(benchmark_file, config)
 
         self.description = None
         if config.description_file is not None:
@@ -292,17 +474,6 @@ class Benchmark(object):
         self.executable = None
         self.display_name = rootTag.get("displayName")
 
-        def parse_memory_limit(value):
-            # In a future BenchExec version, we could treat unit-less limits as bytes
-            try:
-                value = int(value)
-            except ValueError:
-                return util.parse_memory_value(value)
-            else:
-                raise ValueError(
-                    f"Memory limit must have a unit suffix, e.g., '{value} MB'"
-                )
-
         rlimits = {}
 
         def handle_limit_value(name, from_key, to_key, cmdline_value, parse_fn):
@@ -315,16 +486,7 @@ class Benchmark(object):
                     value = cmdline_value
 
             if value is not None:
-                try:
-                    rlimits[to_key] = parse_fn(value)
-                except ValueError as e:
-                    sys.exit(f"Invalid value for {name.lower()} limit: {e}")
-                if rlimits[to_key] <= 0:
-                    sys.exit(
-                        f'{name} limit "{value}" is invalid, '
-                        f"it needs to be a positive number "
-                        f"(or -1 on the command line for disabling it)."
-                    )
+                rlimits[to_key] = _parse_limit_value(name, value, parse_fn)
 
         handle_limit_value(
             "Time", TIMELIMIT, "cputime", config.timelimit, util.parse_timespan_value
@@ -344,7 +506,7 @@ class Benchmark(object):
             util.parse_timespan_value,
         )
         handle_limit_value(
-            "Memory", MEMLIMIT, "memory", config.memorylimit, parse_memory_limit
+            "Memory", MEMLIMIT, "memory", config.memorylimit, _parse_memory_limit
         )
         handle_limit_value("Core", CORELIMIT, "cpu_cores", config.corelimit, int)
 
@@ -422,6 +584,8 @@ class Benchmark(object):
             self.result_files_patterns = ["."]
 
         # get benchmarks
+        self.task_definitions = _TaskDefinitionCache()  # shared by all run sets
+        self._expansion_error = None  # first error of expand_runs_in_background()
         self.run_sets = []
         for (i, rundefinitionTag) in enumerate(rootTag.findall("rundefinition")):
             self.run_sets.append(
@@ -457,6 +621,52 @@ class Benchmark(object):
                         selected,
                     )
 
+    def expand_runs_in_background(self):
+        """
+        Create the runs of the first run set that should be executed,
+        and those of the remaining run sets in a background thread,
+        such that the execution can start before all runs are created.
+        Accessing the runs of a run set waits until they are created.
+        Errors in the background thread are logged immediately
+        and raised by check_run_expansion().
+        """
+        run_sets = [
+            run_set for run_set in self.run_sets if run_set.should_be_executed()
+        ]
+        if not run_sets:
+            return
+        run_sets[0].expand_runs()
+
+        # No worker processes should be forked while runs are executed,
+        # and the runs of later run sets are not needed that quickly.
+        self.task_definitions.allow_processes = False
+        threading.Thread(
+            target=self._expand_runs,
+            args=[run_sets[1:]],
+            name="RunExpansion",
+            daemon=True,
+        ).start()
+
+    def _expand_runs(self, run_sets):
+        for run_set in run_sets:
+            try:
+                run_set.expand_runs()
+            except (BenchExecException, SystemExit) as e:
+                logging.error(
+                    "Creating runs of run set %s failed: %s", run_set.full_name, e
+                )
+                self._expansion_error = e
+                return
+        self.task_definitions = _TaskDefinitionCache()  # free memory
+
+    def check_run_expansion(self):
+        """
+        Raise the error that occurred while creating runs in the background, if any,
+        such that the execution can be aborted before the affected run set is reached.
+        """
+        if self._expansion_error is not None:
+            raise self._expansion_error
+
     def required_files(self):
         assert self.executable is not None, "executor needs to set tool executable"
         return self._required_files.union(self.tool.program_files(self.executable))
@@ -522,6 +732,19 @@ class RunSet(object):
                 self.result_files_folder, self.real_name
             )
 
+        # get run-set-specific resource limits (command-line values take precedence)
+        self.rlimits = benchmark.rlimits
+        memlimit = rundefinitionTag.get(MEMLIMIT)
+        if memlimit is not None and benchmark.config.memorylimit is None:
+            self.rlimits = self.rlimits._replace(
+                memory=_parse_limit_value("Memory", memlimit, _parse_memory_limit)
+            )
+        corelimit = rundefinitionTag.get(CORELIMIT)
+        if corelimit is not None and benchmark.config.corelimit is None:
+            self.rlimits = self.rlimits._replace(
+                cpu_cores=_parse_limit_value("Core", corelimit, int)
+            )
+
         # get all run-set-specific options from rundefinitionTag
         self.options = benchmark.options + util.get_list_from_xml(rundefinitionTag)
         self.propertytag = get_propertytag(rundefinitionTag)
@@ -539,20 +762,64 @@ class RunSet(object):
                 f"Benchmark file {benchmark.benchmark_file} has unsupported old format. "
                 f"Rename <sourcefiles> tags to <tasks>."
             )
-        self.blocks = self.extract_runs_from_xml(
-            globalSourcefilesTags + rundefinitionTag.findall("tasks"),
-            required_files_pattern,
-            self.real_name,
+        self._tasks_tags = self.select_tasks_tags(
+            globalSourcefilesTags + rundefinitionTag.findall("tasks"), self.real_name
         )
-        self.runs = [run for block in self.blocks for run in block.runs]
+        self._required_files_pattern = required_files_pattern
+        # The runs are created lazily by expand_runs() because this can take long.
+        self._blocks = None
+        self._runs = None
+        self._expansion_lock = threading.Lock()
+        self._shared_lists = {}  # tuple -> equal list, only during creation of runs
 
         names = [self.real_name]
-        if len(self.blocks) == 1:
+        if len(self._tasks_tags) == 1:
             # there is exactly one source-file set to run, append its name to run-set name
-            names.append(self.blocks[0].real_name)
+            names.append(self._tasks_tags[0][1].get("name"))
         self.name = ".".join(filter(None, names))
         self.full_name = self.benchmark.name + (f".{self.name}" if self.name else "")
 
+    @property
+    def blocks(self):
+        """The SourcefileSets of this run set, created on first access."""
+        self.expand_runs()
+        return self._blocks
+
+    @property
+    def runs(self):
+        """The runs of this run set, created on first access."""
+        self.expand_runs()
+        return self._runs
+
+    @runs.setter
+    def runs(self, runs):
+        self.expand_runs()
+        self._runs = runs
+
+    def share_list(self, values):
+        """
+        Return a list that is equal to the given list,
+        reusing an equal list that was returned before if possible
+        such that runs with equal values share a single list.
+        The result must not be modified.
+        """
+        return self._shared_lists.setdefault(tuple(values), values)
+
+    def expand_runs(self):
+        """
+        Create the runs of this run set if this was not done yet.
+        Concurrent callers wait until the runs are created.
+        """
+        with self._expansion_lock:
+            if self._blocks is not None:
+                return
+            blocks = self.extract_runs_from_xml(
+                self._tasks_tags, self._required_files_pattern
+            )
+            self._runs = [run for block in blocks for run in block.runs]
+            self._blocks = blocks
+            self._shared_lists = {}
+
         # Currently we store logfiles as "basename.log",
         # so we cannot distinguish sourcefiles in different folder with same basename.
         # For a 'local benchmark' this causes overriding of logfiles after reading them,
@@ -561,7 +828,7 @@ class RunSet(object):
         # so the result will be wrong and every measured value will be missing.
         if self.should_be_executed():
             sourcefilesSet = set()
-            for run in self.runs:
+            for run in self._runs:
                 base = os.path.basename(run.identifier)
                 if base in sourcefilesSet:
                     logging.warning(
@@ -579,17 +846,12 @@ class RunSet(object):
             for run_definition in self.benchmark.config.selected_run_definitions
         )
 
-    def extract_runs_from_xml(
-        self, sourcefilesTagList, global_required_files_pattern, rundef_name
-    ):
+    def select_tasks_tags(self, sourcefilesTagList, rundef_name):
         """
-        This function builds a list of SourcefileSets (containing filename with options).
-        The files and their options are taken from the list of sourcefilesTags.
+        Return the selected tags from the list of sourcefilesTags,
+        each together with its index in the list.
         """
-        base_dir = self.benchmark.base_dir
-        # runs are structured as sourcefile sets, one set represents one sourcefiles tag
-        blocks = []
-
+        selected_tags = []
         for index, sourcefilesTag in enumerate(sourcefilesTagList):
             sourcefileSetName = sourcefilesTag.get("name")
             matchName = sourcefileSetName or str(index)
@@ -598,6 +860,34 @@ class RunSet(object):
                 for sourcefile_set in self.benchmark.config.selected_sourcefile_sets
             ):
                 continue
+            selected_tags.append((index, sourcefilesTag))
+
+        if self.benchmark.config.selected_sourcefile_sets:
+            for selected in self.benchmark.config.selected_sourcefile_sets:
+                if not any(
+                    util.wildcard_match(sourcefilesTag.get("name"), selected)
+                    for _index, sourcefilesTag in selected_tags
+                ):
+                    logging.warning(
+                        'For run definition "%s" the selected tasks "%s" '
+                        "do not exist in the benchmark definition, skipping them.",
+                        rundef_name,
+                        selected,
+                    )
+        return selected_tags
+
+    def extract_runs_from_xml(self, sourcefilesTags, global_required_files_pattern):
+        """
+        This function builds a list of SourcefileSets (containing filename with options).
+        The files and their options are taken from the list of sourcefilesTags,
+        which contains pairs of index and tag.
+        """
+        base_dir = self.benchmark.base_dir
+        # runs are structured as sourcefile sets, one set represents one sourcefiles tag
+        blocks = []
+
+        for index, sourcefilesTag in sourcefilesTags:
+            sourcefileSetName = sourcefilesTag.get("name")
 
             required_files_pattern = global_required_files_pattern.union(
                 {tag.text for tag in sourcefilesTag.findall("requiredfiles")}
@@ -605,6 +895,9 @@ class RunSet(object):
 
             # get lists of filenames
             task_def_files = self.get_task_def_files_from_xml(sourcefilesTag, base_dir)
+            self.benchmark.task_definitions.preload(
+                [f for f in task_def_files if f.endswith(".yml")]
+            )
 
             # get file-specific options for filenames
             fileOptions = util.get_list_from_xml(sourcefilesTag)
@@ -655,18 +948,6 @@ class RunSet(object):
 
             blocks.append(SourcefileSet(sourcefileSetName, index, currentRuns))
 
-        if self.benchmark.config.selected_sourcefile_sets:
-            for selected in self.benchmark.config.selected_sourcefile_sets:
-                if not any(
-                    util.wildcard_match(sourcefile_set.real_name, selected)
-                    for sourcefile_set in blocks
-                ):
-                    logging.warning(
-                        'For run definition "%s" the selected tasks "%s" '
-                        "do not exist in the benchmark definition, skipping them.",
-                        rundef_name,
-                        selected,
-                    )
         return blocks
 
     def get_task_def_files_from_xml(self, sourcefilesTag, base_dir):
@@ -777,17 +1058,17 @@ class RunSet(object):
         self, task_def_file, options, local_propertytag, required_files_pattern
     ):
         """Create a Run from a task definition in yaml format"""
-        task_def = load_task_definition_file(task_def_file)
+        task_defs = self.benchmark.task_definitions
+        cached_task_def = task_defs.get(task_def_file)
+        task_def = cached_task_def.content
 
-        input_files = handle_files_from_task_definition(
-            task_def.get("input_files"), task_def_file
-        )
+        input_files = cached_task_def.files("input_files", task_defs.directory_index)
         if not input_files:
             raise BenchExecException(
                 f"Task-definition file {task_def_file} does not define any input files."
             )
-        required_files = handle_files_from_task_definition(
-            task_def.get("required_files"), task_def_file
+        required_files = cached_task_def.files(
+            "required_files", task_defs.directory_index
         )
 
         run = Run(
@@ -816,7 +1097,7 @@ class RunSet(object):
                     f"Missing property file for property "
                     f"in task-definition file {task_def_file}."
                 )
-            expanded = util.expand_filename_pattern(
+            expanded = task_defs.expand_pattern(
                 prop_dict["property_file"], os.path.dirname(task_def_file)
             )
             if len(expanded) != 1:
@@ -826,9 +1107,7 @@ class RunSet(object):
                     f"does not refer to exactly one file."
                 )
 
-            # TODO We could reduce I/O by checking absolute paths and using os.path.samestat
-            # with cached stat calls.
-            if prop.filename == expanded[0] or os.path.samefile(
+            if prop.filename == expanded[0] or task_defs.is_same_file(
                 prop.filename, expanded[0]
             ):
                 expected_result = prop_dict.get("expected_verdict")
@@ -899,7 +1178,9 @@ class RunSet(object):
                 "Expanded variables in expression %r to %r.", pattern, expandedPattern
             )
 
-        fileList = util.expand_filename_pattern(expandedPattern, base_dir)
+        fileList = util.expand_filename_pattern(
+            expandedPattern, base_dir, self.benchmark.task_definitions.directory_index
+        )
 
         # sort alphabetical,
         fileList.sort()
@@ -915,6 +1196,8 @@ class SourcefileSet(object):
     A SourcefileSet contains a list of runs and a name.
     """
 
+    __slots__ = ["real_name", "name", "runs"]
+
     def __init__(self, name, index, runs):
         self.real_name = name  # this name is optional
         self.name = name or str(index)  # this name is always non-empty
@@ -927,8 +1210,34 @@ _logged_missing_property_files = set()
 class Run(object):
     """
     A Run contains some sourcefile, some options, propertyfiles and some other stuff, that is needed for the Run.
+    There can be millions of instances, so the memory consumption per run is kept
+    small: values that are equal for many runs are shared, values that can be
+    derived are computed on demand, and the details of the result are released
+    with release_result_details() after the result was persisted.
     """
 
+    __slots__ = [
+        "identifier",
+        "sourcefiles",
+        "task_options",
+        "runSet",
+        "specific_options",
+        "expected_results",
+        "required_files",
+        "options",
+        "propertytag",
+        "propertyfile",
+        "properties",
+        "values",
+        "status",
+        "category",
+        "restored",
+        "resultline",  # set by OutputHandler
+        "xml",  # set by OutputHandler
+        "_columns",
+        "_cmdline",
+    ]
+
     def __init__(
         self,
         identifier,
@@ -948,10 +1257,6 @@ class Run(object):
         self.task_options = task_options
         self.runSet = runSet
         self.specific_options = fileOptions  # options that are specific for this run
-        self.log_file = f"{runSet.log_folder}{os.path.basename(self.identifier)}.log"
-        self.result_files_folder = os.path.join(
-            runSet.result_files_folder, os.path.basename(self.identifier)
-        )
         self.expected_results = expected_results or {}  # filled externally
 
         self.required_files = set(required_files)
@@ -970,10 +1275,15 @@ class Run(object):
 
         # combine all options to be used when executing this run
         # (reduce memory-consumption: if 2 lists are equal, do not use the second one)
-        self.options = runSet.options + fileOptions if fileOptions else runSet.options
+        self.options = (
+            runSet.share_list(runSet.options + fileOptions)
+            if fileOptions
+            else runSet.options
+        )
         substitutedOptions = substitute_vars(self.options, runSet, self.identifier)
         if substitutedOptions != self.options:
-            self.options = substitutedOptions  # for less memory again
+            # for less memory again
+            self.options = runSet.share_list(substitutedOptions)
 
         self.propertytag = (
             local_propertytag if local_propertytag is not None else runSet.propertytag
@@ -994,8 +1304,8 @@ class Run(object):
         else:
             # we check two cases: direct filename or user-defined substitution, one of them must be a 'file'
             # TODO: do we need the second case? it is equal to previous used option "-spec ${inputfile_path}/ALL.prp"
-            expandedPropertyFiles = util.expand_filename_pattern(
-                self.propertyfile, self.runSet.benchmark.base_dir
+            expandedPropertyFiles = runSet.benchmark.task_definitions.expand_pattern(
+                self.propertyfile, runSet.benchmark.base_dir
             )
             substitutedPropertyfiles = substitute_vars(
                 [self.propertyfile], runSet, self.identifier
@@ -1024,14 +1334,12 @@ class Run(object):
         if self.propertyfile:
             self.required_files.add(self.propertyfile)
 
-        self.required_files = list(self.required_files)
+        self.required_files = runSet.share_list(sorted(self.required_files))
 
-        # Copy columns for having own objects in run
-        # (we need this for storing the results in them).
-        self.columns = [
-            Column(c.text, c.title, c.number_of_digits)
-            for c in self.runSet.benchmark.columns
-        ]
+        # Copies of the columns are created only when they are needed
+        # (we need them for storing the results in them).
+        self._columns = None
+        self._cmdline = None
 
         # here we store the optional result values, e.g. memory usage, energy, host name
         # keys need to be strings, if first character is "@" the value is marked as hidden (e.g., debug info)
@@ -1041,6 +1349,39 @@ class Run(object):
         self.status = ""
         self.category = result.CATEGORY_UNKNOWN
 
+        # whether the result was taken over from a previous execution (--resume)
+        self.restored = False
+
+    @property
+    def log_file(self):
+        return f"{self.runSet.log_folder}{os.path.basename(self.identifier)}.log"
+
+    @property
+    def result_files_folder(self):
+        return os.path.join(
+            self.runSet.result_files_folder, os.path.basename(self.identifier)
+        )
+
+    @property
+    def columns(self):
+        """The columns of this run with their values, copied from the benchmark."""
+        if self._columns is None:
+            self._columns = [
+                Column(c.text, c.title, c.number_of_digits)
+                for c in self.runSet.benchmark.columns
+            ]
+        return self._columns
+
+    def release_result_details(self):
+        """
+        Release the measured values, column values, and the command line of this run.
+        This is intended to be called after the result of this run was persisted,
+        the status, category, and XML representation of the result are kept.
+        """
+        self.values = {}
+        self._columns = []
+        self._cmdline = None
+
     def cmdline(self):
         assert (
             self.runSet.benchmark.executable is not None
@@ -1053,7 +1394,7 @@ class Run(object):
             self.identifier,
             self.propertyfile,
             self.task_options,
-            self.runSet.benchmark.rlimits,
+            self.runSet.rlimits,
         )
         return self._cmdline
 
@@ -1168,7 +1509,7 @@ class Run(object):
 
     def _is_timeout(self):
         """try to find out whether the tool terminated because of a timeout"""
-        rlimits = self.runSet.benchmark.rlimits
+        rlimits = self.runSet.rlimits
         cputime = self.values.get("cputime")
         walltime = self.values.get("walltime")
 
@@ -1183,6 +1524,8 @@ class Column(object):
     The class Column contains text, title and number_of_digits of a column.
     """
 
+    __slots__ = ["text", "title", "number_of_digits", "value"]
+
     def __init__(self, text, title, numOfDigits):
         self.text = text
         self.title = title
@@ -7,22 +7,19 @@
 
 import logging
 import os
-import threading
+import select
 
 from benchexec.cgroups import MEMORY
+from benchexec import libc
+from benchexec import limitmonitor
 from benchexec import util
 
-from ctypes import cdll
-
-_libc = cdll.LoadLibrary("libc.so.6")
-_EFD_CLOEXEC = 0x80000  # from <sys/eventfd.h>: mark eventfd as close-on-exec
-
 _BYTE_FACTOR = 1000  # byte in kilobyte
 
 
-class KillProcessOnOomThread(threading.Thread):
+class KillProcessOnOom(limitmonitor.Limit):
     """
-    Thread that kills the process when they run out of memory.
+    Limit that kills the process when they run out of memory.
     Usually the kernel would do this by itself,
     but sometimes the process still hangs because it does not even have
     enough memory left to get killed
@@ -34,31 +31,27 @@ class KillProcessOnOomThread(threading.Thread):
     The notification works by opening an "event file descriptor" with eventfd,
     and telling the kernel to notify us about OOMs by writing the event file
     descriptor and an file descriptor of the memory.oom_control file
-    to cgroup.event_control.
+    to cgroup.event_control. The LimitMonitor waits for events on the eventfd.
     The kernel-side process killing is disabled by writing 1 to memory.oom_control.
     Sources:
     https://www.kernel.org/doc/Documentation/cgroups/memory.txt
     https://access.redhat.com/site/documentation//en-US/Red_Hat_Enterprise_Linux/6/html/Resource_Management_Guide/sec-memory.html#ex-OOM-control-notifications
 
     @param cgroups: The cgroups instance to monitor
-    @param process: The process instance to kill
+    @param pid_to_kill: The process to kill
     @param callbackFn: A one-argument function that is called in case of OOM with a string for the reason as argument
     """
 
     def __init__(self, cgroups, pid_to_kill, callbackFn=lambda reason: None):
-        super(KillProcessOnOomThread, self).__init__()
-        self.name = "KillProcessOnOomThread-" + self.name
-        self._finished = threading.Event()
-        self._pid_to_kill = pid_to_kill
+        super(KillProcessOnOom, self).__init__(pid_to_kill, callbackFn)
         self._cgroups = cgroups
-        self._callback = callbackFn
 
         cgroup = cgroups[MEMORY]  # for raw access
         ofd = os.open(os.path.join(cgroup, "memory.oom_control"), os.O_WRONLY)
         try:
             # Important to use CLOEXEC, otherwise the benchmarked tool inherits
             # the file descriptor.
-            self._efd = _libc.eventfd(0, _EFD_CLOEXEC)
+            self._efd = libc.eventfd(0, libc.EFD_CLOEXEC | libc.EFD_NONBLOCK)
 
             try:
                 util.write_file(f"{self._efd} {ofd}", cgroup, "cgroup.event_control")
@@ -80,40 +73,32 @@ class KillProcessOnOomThread(threading.Thread):
         finally:
             os.close(ofd)
 
-    def run(self):
-        # os.close gets called in finally,
-        # which sometimes is executed while the process is shutting down already.
-        # It happens that the Python interpreter has already cleaned up at this point
-        # and "os" resolves to None, leading to an AttributeError.
-        # Thus we keep our own reference to this function.
-        # (Should not happen anymore since this is no longer a daemon thread,
-        # but should not hurt anyway.)
-        close = os.close
-        try:
-            # In an eventfd, there are always 8 bytes for the event number.
-            # We just do a blocking read to wait for the event.
-            _ = os.read(self._efd, 8)
-            # If read returned, this means the kernel sent us an event.
-            # It does so either on OOM or if the cgroup is removed.
-            if not self._finished.is_set():
-                self._callback("memory")
-                logging.debug(
-                    "Killing process %s due to out-of-memory event from kernel.",
-                    self._pid_to_kill,
-                )
-                util.kill_process(self._pid_to_kill)
-                # Also kill all children of subprocesses directly.
-                with open(os.path.join(self._cgroups[MEMORY], "tasks"), "rt") as tasks:
-                    for task in tasks:
-                        util.kill_process(int(task))
-
-                # We now need to increase the memory limit of this cgroup
-                # to give the process a chance to terminate
-                self._reset_memory_limit("memory.memsw.limit_in_bytes")
-                self._reset_memory_limit("memory.limit_in_bytes")
-
-        finally:
-            close(self._efd)
+    def fileno(self):
+        return self._efd
+
+    def _handle_event(self):
+        # In an eventfd, there are always 8 bytes for the event number.
+        _ = os.read(self._efd, 8)
+        # The kernel sends us an event either on OOM or if the cgroup is removed,
+        # but the latter happens only after this limit was cancelled.
+        logging.debug(
+            "Killing process %s due to out-of-memory event from kernel.",
+            self._pid_to_kill,
+        )
+        self._kill("memory")
+        # Also kill all children of subprocesses directly.
+        with open(os.path.join(self._cgroups[MEMORY], "tasks"), "rt") as tasks:
+            for task in tasks:
+                util.kill_process(int(task))
+
+        # We now need to increase the memory limit of this cgroup
+        # to give the process a chance to terminate
+        self._reset_memory_limit("memory.memsw.limit_in_bytes")
+        self._reset_memory_limit("memory.limit_in_bytes")
+        return None
+
+    def _close(self):
+        os.close(self._efd)
 
     def _reset_memory_limit(self, limitFile):
         if self._cgroups.has_value(MEMORY, limitFile):
@@ -139,5 +124,56 @@ class KillProcessOnOomThread(threading.Thread):
                     e.strerror,
                 )
 
-    def cancel(self):
-        self._finished.set()
+
+class KillProcessOnOomV2(limitmonitor.Limit):
+    """
+    Limit that records when processes of a cgroup (v2) run out of memory
+    and kills the remaining processes.
+    With cgroups v2, the kernel reliably kills processes that exceed the limit
+    given in memory.max, and with memory.oom.group it kills all processes
+    of the cgroup together. We only need to notice this in order to record
+    the reason for the termination of the run.
+
+    The kernel signals changes of the file memory.events with a priority event
+    on its file descriptor, which the LimitMonitor waits for.
+    Source: https://www.kernel.org/doc/html/latest/admin-guide/cgroup-v2.html
+
+    @param cgroups: The cgroups instance to monitor
+    @param pid_to_kill: The process to kill
+    @param callbackFn: A one-argument function that is called in case of OOM with a string for the reason as argument
+    """
+
+    event_mask = select.EPOLLPRI
+
+    def __init__(self, cgroups, pid_to_kill, callbackFn=lambda reason: None):
+        super(KillProcessOnOomV2, self).__init__(pid_to_kill, callbackFn)
+        self._events_file = open(
+            os.path.join(cgroups[MEMORY], "memory.events"), "rb", buffering=0
+        )
+        self._oom_kills = self._read_oom_kills()
+
+    def fileno(self):
+        return self._events_file.fileno()
+
+    def _read_oom_kills(self):
+        self._events_file.seek(0)
+        for line in self._events_file.read().decode().splitlines():
+            key, value = line.split(" ", 1)
+            if key == "oom_kill":
+                return int(value)
+        return 0
+
+    def _handle_event(self):
+        # Reading the file again acknowledges the event.
+        oom_kills = self._read_oom_kills()
+        if oom_kills > self._oom_kills:
+            self._oom_kills = oom_kills
+            logging.debug(
+                "Killing process %s due to out-of-memory event from kernel.",
+                self._pid_to_kill,
+            )
+            self._kill("memory")
+        return None
+
+    def _close(self):
+        self._events_file.close()
@@ -7,15 +7,21 @@
 
 import bz2
 import collections
+import concurrent.futures
 import datetime
+import fcntl
+import glob
 import io
+import json
+import logging
 import os
+import re
 import threading
 import time
 import sys
-from xml.dom import minidom
 from xml.etree import ElementTree
 import zipfile
+from decimal import Decimal
 
 import benchexec
 from benchexec.model import MEMLIMIT, TIMELIMIT, CORELIMIT
@@ -60,6 +66,8 @@ LEN_OF_STATUS = 25
 # the number of digits after the decimal separator for text output of time columns with times
 TIME_PRECISION = 2
 _BYTE_FACTOR = 1000  # byte in kilobyte
+# title of result column with energy of one domain of one CPU package
+_ENERGY_COLUMN_PATTERN = re.compile(r"cpuenergy-pkg(\d+)-([a-z]+)")
 
 
 class OutputHandler(object):
@@ -78,6 +86,9 @@ class OutputHandler(object):
         self.all_created_files = set()
         self.benchmark = benchmark
         self.statistics = Statistics()
+        # result lines of finished runs whose run set is still running,
+        # written temporarily into the txt file (pairs of run set and line)
+        self._temporary_txt_lines = []
 
         version = self.benchmark.tool_version
 
@@ -111,11 +122,22 @@ class OutputHandler(object):
             )
         self.xml_file_names = []
 
+        # results of runs that were finished in a previous execution (--resume),
+        # as a dict from each run set to the result XML element and
+        # a dict from the attributes of the finished runs to their XML elements
+        self._previous_results = {}
+        self._recover_interrupted_results()
+        if benchmark.config.resume:
+            self._load_previous_results()
+
         if compress_results:
-            self.log_zip = zipfile.ZipFile(
-                benchmark.log_zip, mode="w", compression=zipfile.ZIP_DEFLATED
+            zip_mode = "w"
+            if self._previous_results and os.path.exists(benchmark.log_zip):
+                self._remove_unfinished_runs_from_log_zip()
+                zip_mode = "a"
+            self.log_zip = _LogArchive(
+                benchmark.log_zip, zip_mode, threads=benchmark.num_of_threads
             )
-            self.log_zip_lock = threading.Lock()
             self.all_created_files.add(benchmark.log_zip)
 
     def store_system_info(
@@ -307,12 +329,15 @@ class OutputHandler(object):
         self.txt_file = filewriter.FileWriter(txt_file_name, self.description)
         self.all_created_files.add(txt_file_name)
 
-    def output_before_run_set(self, runSet, start_time=None):
+    def output_before_run_set(self, runSet, start_time=None, defer_log_header=False):
         """
         The method output_before_run_set() calculates the length of the
         first column for the output in terminal and stores information
         about the runSet in XML.
         @param runSet: current run set
+        @param defer_log_header: write the information about the run set into the
+            txt file only together with its results in output_after_run_set(),
+            necessary if runs of several run sets are executed interleaved
         """
         xml_file_name = self.get_filename(runSet.name, "xml")
 
@@ -344,39 +369,16 @@ class OutputHandler(object):
         )
 
         # write information about the run set into txt_file
-        self.writeRunSetInfoToLog(runSet)
+        runSet.pending_log_header = self.writeRunSetInfoToLog(
+            runSet, write=not defer_log_header
+        )
 
         # prepare information for text output
         for run in runSet.runs:
             run.resultline = self.format_sourcefile_name(run.identifier, runSet)
 
-            if run.sourcefiles:
-                adjusted_identifier = util.relative_path(run.identifier, xml_file_name)
-            else:
-                # If no source files exist the task doesn't point to any file that could be downloaded.
-                # In this case, the name doesn't have to be adjusted because it's no path.
-                adjusted_identifier = run.identifier
-
             # prepare XML structure for each run and runSet
-            run.xml = ElementTree.Element("run", name=adjusted_identifier)
-            if run.sourcefiles:
-                adjusted_sourcefiles = (
-                    util.relative_path(s, xml_file_name) for s in run.sourcefiles
-                )
-                run.xml.set("files", "[" + ", ".join(adjusted_sourcefiles) + "]")
-            if run.specific_options:
-                run.xml.set("options", " ".join(run.specific_options))
-            if run.properties:
-                all_properties = (prop.name for prop in run.properties)
-                run.xml.set("properties", " ".join(sorted(all_properties)))
-            if len(run.properties) == 1:
-                prop = run.properties[0]
-                run.xml.set(
-                    "propertyFile", util.relative_path(prop.filename, xml_file_name)
-                )
-                expected_result = str(run.expected_results.get(prop.filename, ""))
-                if expected_result:
-                    run.xml.set("expectedVerdict", expected_result)
+            run.xml = self._create_run_xml(run, xml_file_name)
 
         block_name = runSet.blocks[0].name if len(runSet.blocks) == 1 else None
         runSet.xml = self.runs_to_xml(runSet, runSet.runs, block_name)
@@ -385,13 +387,207 @@ class OutputHandler(object):
         elif not self.benchmark.config.start_time:
             runSet.xml.set("starttime", util.read_local_time().isoformat())
 
-        # write (empty) results to XML
+        if runSet in self._previous_results:
+            self._restore_previous_results(runSet)
+
+        # write (empty) results to XML,
+        # results of finished runs are added to the journal until the end
         runSet.xml_file_name = xml_file_name
         self._write_rough_result_xml_to_file(runSet.xml, runSet.xml_file_name)
-        runSet.xml_file_last_modified_time = time.monotonic()
+        runSet.result_journal = _ResultJournal(
+            self.get_filename(runSet.name, "journal")
+        )
         self.all_created_files.add(runSet.xml_file_name)
         self.xml_file_names.append(runSet.xml_file_name)
 
+    def _create_run_xml(self, run, xml_file_name):
+        """
+        Create the XML element for a run with the attributes that identify it,
+        but without results.
+        """
+        if run.sourcefiles:
+            adjusted_identifier = util.relative_path(run.identifier, xml_file_name)
+        else:
+            # If no source files exist the task doesn't point to any file that could be downloaded.
+            # In this case, the name doesn't have to be adjusted because it's no path.
+            adjusted_identifier = run.identifier
+
+        run_xml = ElementTree.Element("run", name=adjusted_identifier)
+        if run.sourcefiles:
+            adjusted_sourcefiles = (
+                util.relative_path(s, xml_file_name) for s in run.sourcefiles
+            )
+            run_xml.set("files", "[" + ", ".join(adjusted_sourcefiles) + "]")
+        if run.specific_options:
+            run_xml.set("options", " ".join(run.specific_options))
+        if run.properties:
+            all_properties = (prop.name for prop in run.properties)
+            run_xml.set("properties", " ".join(sorted(all_properties)))
+        if len(run.properties) == 1:
+            prop = run.properties[0]
+            run_xml.set(
+                "propertyFile", util.relative_path(prop.filename, xml_file_name)
+            )
+            expected_result = str(run.expected_results.get(prop.filename, ""))
+            if expected_result:
+                run_xml.set("expectedVerdict", expected_result)
+        return run_xml
+
+    def _recover_interrupted_results(self):
+        """
+        Add the results from the journals of previous executions of this benchmark
+        that were interrupted (e.g., killed) to their result files,
+        which otherwise contain no results.
+        Journals that are still written by a running execution are skipped.
+        """
+        config = self.benchmark.config
+        pattern = glob.escape(f"{config.output_path}{self.benchmark.name}.")
+        for journal_file_name in glob.glob(pattern + "*.results.*journal"):
+            xml_file_name = journal_file_name[: -len("journal")] + "xml"
+            try:
+                with open(journal_file_name, "rb") as journal_file:
+                    try:
+                        fcntl.flock(journal_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # still in use
+                    result_xml = ElementTree.ElementTree().parse(xml_file_name)
+                    if result_xml.get("error") == "incomplete":
+                        count = merge_result_journal(result_xml, journal_file_name)
+                        self._write_rough_result_xml_to_file(result_xml, xml_file_name)
+                        logging.info(
+                            "Recovered results of %d runs of interrupted execution "
+                            "in %s.",
+                            count,
+                            xml_file_name,
+                        )
+                    # otherwise the final results were written already
+                    os.remove(journal_file_name)
+            except (OSError, ElementTree.ParseError) as e:
+                logging.warning(
+                    "Cannot recover results from %s: %s", journal_file_name, e
+                )
+
+    def _load_previous_results(self):
+        """
+        Read the result files of a previous execution of this benchmark
+        (with the same start time) and remember all runs that were finished.
+        """
+        for runSet in self.benchmark.run_sets:
+            if not runSet.should_be_executed():
+                continue
+            xml_file_name = self.get_filename(runSet.name, "xml")
+            result_xml = _read_previous_result_xml(
+                xml_file_name, self.get_filename(runSet.name, "journal")
+            )
+            if result_xml is None:
+                continue
+            finished_runs = {
+                _get_run_xml_key(run_xml): run_xml
+                for run_xml in result_xml.findall("run")
+                # runs that were not finished have no status
+                if any(c.get("title") == "status" for c in run_xml.findall("column"))
+            }
+            self._previous_results[runSet] = (result_xml, finished_runs)
+            logging.debug(
+                "Found %d finished runs of run set %s in %s.",
+                len(finished_runs),
+                runSet.full_name,
+                xml_file_name,
+            )
+
+    def _is_finished_in_previous_results(self, run):
+        if run.runSet not in self._previous_results:
+            return False
+        unused_result_xml, finished_runs = self._previous_results[run.runSet]
+        run_xml = self._create_run_xml(run, self.get_filename(run.runSet.name, "xml"))
+        return _get_run_xml_key(run_xml) in finished_runs
+
+    def _remove_unfinished_runs_from_log_zip(self):
+        """
+        Remove the log files of runs that will be executed again
+        from the ZIP archive of a previous execution,
+        such that it can be appended to afterwards.
+        """
+        log_files_to_keep = {
+            self._get_log_file_path_in_zip(run)
+            for runSet in self._previous_results
+            for run in runSet.runs
+            if self._is_finished_in_previous_results(run)
+        }
+        # Write to a temporary file first such that the previous logs are not lost
+        # if this is interrupted.
+        temp_filename = self.benchmark.log_zip + ".tmp"
+        with zipfile.ZipFile(self.benchmark.log_zip) as previous_zip:
+            with zipfile.ZipFile(
+                temp_filename, mode="w", compression=zipfile.ZIP_DEFLATED
+            ) as new_zip:
+                for info in previous_zip.infolist():
+                    if info.filename in log_files_to_keep:
+                        new_zip.writestr(info, previous_zip.read(info))
+        os.replace(temp_filename, self.benchmark.log_zip)
+
+    def _restore_previous_results(self, runSet):
+        """
+        Take over the results of all runs of a run set that were finished
+        in a previous execution, such that only the remaining runs are executed.
+        """
+        result_xml, finished_runs = self._previous_results[runSet]
+        if result_xml.get("starttime"):
+            runSet.xml.set("starttime", result_xml.get("starttime"))
+
+        restored_runs = 0
+        for run in runSet.runs:
+            run_xml = finished_runs.get(_get_run_xml_key(run.xml))
+            if run_xml is not None:
+                self._restore_run(run, run_xml)
+                restored_runs += 1
+            elif os.path.isdir(run.result_files_folder):
+                # remove files from the unfinished previous execution of this run
+                util.rmtree(run.result_files_folder)
+
+        if restored_runs:
+            util.printOut(
+                f"Taking over results of {restored_runs} of {len(runSet.runs)} runs "
+                f"from previous execution."
+            )
+
+    def _restore_run(self, run, run_xml):
+        """Set the results of a run from its XML element in a previous result file."""
+        run.restored = True
+        run.xml[:] = list(run_xml)
+
+        columns = {column.title: column for column in run.columns}
+        for column_xml in run_xml.findall("column"):
+            title = column_xml.get("title")
+            value = column_xml.get("value")
+            hidden = column_xml.get("hidden") == "true"
+            if title == "status" and not hidden:
+                run.status = value
+            elif title == "category" and hidden:
+                run.category = value
+            elif title in columns and not hidden:
+                columns[title].value = value
+            elif title in ["cputime", "walltime"] and value.endswith("s"):
+                run.values[title] = float(value[:-1])
+            else:
+                run.values[("@" if hidden else "") + title] = value
+
+        run.resultline = self.create_output_line(
+            run.runSet,
+            run.identifier,
+            run.status,
+            util.format_number(run.values.get("cputime"), TIME_PRECISION),
+            util.format_number(run.values.get("walltime"), TIME_PRECISION),
+            run.values.get("host"),
+            run.columns,
+        )
+        self.statistics.add_result(run)
+
+        if not self.compress_results and os.path.exists(run.log_file):
+            self.all_created_files.add(run.log_file)
+        if os.path.isdir(run.result_files_folder):
+            self.all_created_files.add(run.result_files_folder)
+
     def output_for_skipping_run_set(self, runSet, reason=None):
         """
         This function writes a simple message to terminal and logfile,
@@ -417,9 +613,10 @@ class OutputHandler(object):
         runSetInfo += "\n"
         self.txt_file.append(runSetInfo)
 
-    def writeRunSetInfoToLog(self, runSet):
+    def writeRunSetInfoToLog(self, runSet, write=True):
         """
         This method writes the information about a run set into the txt_file.
+        If write is False, the information is only returned and not written.
         """
 
         runSetInfo = "\n\n"
@@ -428,8 +625,17 @@ class OutputHandler(object):
         runSetInfo += (
             f"Run set {runSet.index} of {len(self.benchmark.run_sets)} "
             f"with options '{' '.join(runSet.options)}' and "
-            f"propertyfile '{util.text_or_none(runSet.propertytag)}'\n\n"
+            f"propertyfile '{util.text_or_none(runSet.propertytag)}'\n"
         )
+        if runSet.rlimits != self.benchmark.rlimits:
+            limits = []
+            if runSet.rlimits.memory:
+                memory = runSet.rlimits.memory / _BYTE_FACTOR / _BYTE_FACTOR
+                limits.append(f"memory {memory} MB")
+            if runSet.rlimits.cpu_cores:
+                limits.append(f"{runSet.rlimits.cpu_cores} cpu cores")
+            runSetInfo += f"and resource limits {', '.join(limits)}\n"
+        runSetInfo += "\n"
 
         titleLine = self.create_output_line(
             runSet,
@@ -446,8 +652,11 @@ class OutputHandler(object):
 
         runSetInfo += titleLine + "\n" + runSet.simpleLine + "\n"
 
+        if not write:
+            return runSetInfo
         # write into txt_file
         self.txt_file.append(runSetInfo)
+        return None
 
     def output_before_run(self, run):
         """
@@ -540,35 +749,34 @@ class OutputHandler(object):
                     + valueStr
                 )
 
-            # write result in txt_file and XML
+            # write result in txt_file
             self.txt_file.append(run.resultline + "\n", keep=False)
+            self._temporary_txt_lines.append((run.runSet, run.resultline + "\n"))
             self.statistics.add_result(run)
 
-            # we don't want to write this file to often, it can slow down the whole script,
-            # so we wait at least 10 seconds between two write-actions
-            currentTime = time.monotonic()
-            if currentTime - run.runSet.xml_file_last_modified_time > 60:
-                self._write_rough_result_xml_to_file(
-                    run.runSet.xml, run.runSet.xml_file_name
-                )
-                run.runSet.xml_file_last_modified_time = time.monotonic()
-
         finally:
             OutputHandler.print_lock.release()
 
+        # The XML file is written only once at the end of the run set.
+        run.runSet.result_journal.add_run(run.xml)
+
         if self.compress_results:
-            log_file_path = os.path.relpath(
-                run.log_file, os.path.join(self.benchmark.log_folder, os.pardir)
-            )
-            with self.log_zip_lock:
-                self.log_zip.write(run.log_file, log_file_path)
-            os.remove(run.log_file)
+            # compressed and removed in the background
+            self.log_zip.add(run.log_file, self._get_log_file_path_in_zip(run))
         else:
             self.all_created_files.add(run.log_file)
 
         if os.path.isdir(run.result_files_folder):
             self.all_created_files.add(run.result_files_folder)
 
+        # all necessary information is now in the journal and in run.xml
+        run.release_result_details()
+
+    def _get_log_file_path_in_zip(self, run):
+        return os.path.relpath(
+            run.log_file, os.path.join(self.benchmark.log_folder, os.pardir)
+        )
+
     def output_after_run_set(
         self, runSet, cputime=None, walltime=None, energy={}, cache={}, end_time=None
     ):
@@ -577,27 +785,96 @@ class OutputHandler(object):
         @params cputime, walltime: accumulated times of the run set
         """
 
-        self.add_values_to_run_set_xml(runSet, cputime, walltime, energy, cache)
-
-        if end_time:
-            runSet.xml.set("endtime", end_time.isoformat())
-        elif not self.benchmark.config.start_time:
-            runSet.xml.set("endtime", util.read_local_time().isoformat())
-
-        # Write results to files. This overwrites the intermediate files written
-        # from output_after_run with the proper results.
-        self._write_pretty_result_xml_to_file(runSet.xml, runSet.xml_file_name)
+        previous_result_xml = self._get_previous_result_of_complete_run_set(runSet)
+        if previous_result_xml is not None:
+            # all runs were finished previously, so take over the values of the
+            # previous execution instead of the (empty) ones of this execution
+            for column_xml in previous_result_xml.findall("column"):
+                runSet.xml.append(column_xml)
+                if column_xml.get("title") == "cputime":
+                    cputime = float(column_xml.get("value").rstrip("s"))
+                elif column_xml.get("title") == "walltime":
+                    walltime = float(column_xml.get("value").rstrip("s"))
+            if previous_result_xml.get("endtime"):
+                runSet.xml.set("endtime", previous_result_xml.get("endtime"))
+        else:
+            if runSet in self._previous_results:
+                # some runs were executed previously, so their time and energy
+                # are part of the totals of the run set
+                cputime, walltime, energy = self._add_previous_run_set_totals(
+                    runSet, cputime, walltime, energy
+                )
+            self.add_values_to_run_set_xml(runSet, cputime, walltime, energy, cache)
+
+            if end_time:
+                runSet.xml.set("endtime", end_time.isoformat())
+            elif not self.benchmark.config.start_time:
+                runSet.xml.set("endtime", util.read_local_time().isoformat())
+
+        # Write results to files. This overwrites the intermediate file written
+        # from output_before_run_set with the proper results.
+        self._write_pretty_result_xml_files(runSet)
+        runSet.result_journal.close()
+        runSet.result_journal.remove()
+
+        run_set_text = self.run_set_to_text(runSet, cputime, walltime, energy)
+        if runSet.pending_log_header:
+            run_set_text = runSet.pending_log_header + run_set_text
+            runSet.pending_log_header = None
+        # Runs of other run sets may still be executing and writing to txt_file.
+        # Appending the final text removes all temporary lines,
+        # so those of the other run sets need to be written again.
+        with OutputHandler.print_lock:
+            self._temporary_txt_lines = [
+                (run_set, line)
+                for run_set, line in self._temporary_txt_lines
+                if run_set is not runSet
+            ]
+            self.txt_file.append(run_set_text)
+            if self._temporary_txt_lines:
+                self.txt_file.append(
+                    "".join(line for _, line in self._temporary_txt_lines),
+                    keep=False,
+                )
 
-        if len(runSet.blocks) > 1:
-            for block in runSet.blocks:
-                blockFileName = self.get_filename(runSet.name, block.name + ".xml")
-                block_xml = self.runs_to_xml(runSet, block.runs, block.name)
-                block_xml.set("starttime", runSet.xml.get("starttime"))
-                if runSet.xml.get("endtime"):
-                    block_xml.set("endtime", runSet.xml.get("endtime"))
-                self._write_pretty_result_xml_to_file(block_xml, blockFileName)
+    def _add_previous_run_set_totals(self, runSet, cputime, walltime, energy):
+        """
+        Add the CPU time, wall time, and energy of the run set in a previous
+        (interrupted) execution to the given values of this execution.
+        The previous values are available only if the previous execution
+        wrote its final result file, i.e., if it was not killed.
+        @return: a tuple of the summed cputime, walltime, and energy
+        """
+        result_xml, unused_finished_runs = self._previous_results[runSet]
+        energy = {pkg: dict(domains) for pkg, domains in (energy or {}).items()}
+        for column_xml in result_xml.findall("column"):
+            title = column_xml.get("title")
+            value = column_xml.get("value")
+            if title == "cputime":
+                cputime = (cputime or 0) + float(value.rstrip("s"))
+            elif title == "walltime":
+                walltime = (walltime or 0) + float(value.rstrip("s"))
+            else:
+                match = _ENERGY_COLUMN_PATTERN.fullmatch(title)
+                if match:
+                    domains = energy.setdefault(int(match.group(1)), {})
+                    domain = match.group(2)
+                    domains[domain] = domains.get(domain, 0) + Decimal(
+                        value.rstrip("J")
+                    )
+        return cputime, walltime, energy
 
-        self.txt_file.append(self.run_set_to_text(runSet, cputime, walltime, energy))
+    def _get_previous_result_of_complete_run_set(self, runSet):
+        """
+        Return the result XML of a previous execution of the given run set
+        if this previous execution was complete, otherwise None.
+        """
+        if runSet not in self._previous_results:
+            return None
+        result_xml, finished_runs = self._previous_results[runSet]
+        if result_xml.get("error") or not all(run.restored for run in runSet.runs):
+            return None
+        return result_xml
 
     def run_set_to_text(self, runSet, cputime=0, walltime=0, energy={}):
         lines = []
@@ -642,6 +919,12 @@ class OutputHandler(object):
         elif runSet.real_name:
             runsElem.set("name", runSet.real_name)
 
+        # run sets can override the limits of the benchmark
+        if runSet.rlimits.memory:
+            runsElem.set(MEMLIMIT, str(runSet.rlimits.memory) + "B")
+        if runSet.rlimits.cpu_cores:
+            runsElem.set(CORELIMIT, str(runSet.rlimits.cpu_cores))
+
         # collect XMLelements from all runs
         for run in runs:
             runsElem.append(run.xml)
@@ -706,7 +989,7 @@ class OutputHandler(object):
             hidden = False
 
         if not value_suffix and not isinstance(value, (str, bytes)):
-            if title.startswith("cputime") or title.startswith("walltime"):
+            if title.startswith(("cputime", "walltime", "overhead-")):
                 value_suffix = "s"
             elif title.startswith("cpuenergy"):
                 value_suffix = "J"
@@ -826,14 +1109,12 @@ class OutputHandler(object):
         self.txt_file.close()
 
         if self.compress_results:
-            with self.log_zip_lock:
-                zip_is_empty = not self.log_zip.namelist()
-                self.log_zip.close()
+            zip_is_empty = self.log_zip.close()
 
-                if zip_is_empty:
-                    # remove useless ZIP file, e.g., because all runs were skipped
-                    os.remove(self.benchmark.log_zip)
-                    self.all_created_files.remove(self.benchmark.log_zip)
+            if zip_is_empty:
+                # remove useless ZIP file, e.g., because all runs were skipped
+                os.remove(self.benchmark.log_zip)
+                self.all_created_files.remove(self.benchmark.log_zip)
 
         # remove useless log folder if it is empty,
         # e.g., because all logs were written to the ZIP file
@@ -879,43 +1160,344 @@ class OutputHandler(object):
         else:
             del xml.attrib["error"]
 
-    def _write_pretty_result_xml_to_file(self, xml, filename):
-        """Writes a nicely formatted XML file with DOCTYPE, and compressed if necessary."""
-        if self.compress_results:
-            actual_filename = filename + ".bz2"
-            open_func = bz2.BZ2File
-        else:
-            # write content to temp file first to prevent losing data
-            # in existing file if writing fails
-            actual_filename = filename + ".tmp"
-            open_func = open
-
-        with io.TextIOWrapper(
-            open_func(actual_filename, "wb"), encoding="utf-8"
-        ) as file:
-            rough_string = ElementTree.tostring(xml, encoding="unicode")
-            reparsed = minidom.parseString(rough_string)
-            doctype = minidom.DOMImplementation().createDocumentType(
-                "result", RESULT_XML_PUBLIC_ID, RESULT_XML_SYSTEM_ID
-            )
-            reparsed.insertBefore(doctype, reparsed.documentElement)
-            reparsed.writexml(
-                file, indent="", addindent="  ", newl="\n", encoding="utf-8"
-            )
+    def _write_pretty_result_xml_files(self, runSet):
+        """
+        Write the final result file of a run set and, if the run set has several
+        blocks, the result files of the blocks. All files are written in a single
+        pass over the runs, which are not copied.
+        """
+        writer = self._open_pretty_result_xml_file(runSet.xml, runSet.xml_file_name)
+        runs_written = False
+        for elem in runSet.xml:
+            if elem.tag != "run":
+                writer.write_element(elem)
+            elif not runs_written:
+                # the run elements are in the same order as runSet.runs
+                self._write_runs_and_block_files(runSet, writer)
+                runs_written = True
+        if not runs_written:
+            self._write_runs_and_block_files(runSet, writer)
+        self._close_pretty_result_xml_file(writer)
+
+    def _write_runs_and_block_files(self, runSet, writer):
+        for block in runSet.blocks:
+            block_writer = None
+            if len(runSet.blocks) > 1:
+                block_xml = self.runs_to_xml(runSet, [], block.name)
+                block_xml.set("starttime", runSet.xml.get("starttime"))
+                if runSet.xml.get("endtime"):
+                    block_xml.set("endtime", runSet.xml.get("endtime"))
+                block_writer = self._open_pretty_result_xml_file(
+                    block_xml, self.get_filename(runSet.name, block.name + ".xml")
+                )
+                for elem in block_xml:
+                    block_writer.write_element(elem)
+
+            for run in block.runs:
+                writer.write_element(run.xml)
+                if block_writer:
+                    block_writer.write_element(run.xml)
+
+            if block_writer:
+                self._close_pretty_result_xml_file(block_writer)
+
+    def _open_pretty_result_xml_file(self, xml, filename):
+        """
+        Start writing a nicely formatted XML file with DOCTYPE,
+        compressed if necessary. Only the start tag of the given element is
+        written, its children need to be passed to write_element() of the result.
+        """
+        return _PrettyXmlWriter(filename, xml, compress=self.compress_results)
 
+    def _close_pretty_result_xml_file(self, writer):
+        writer.close()
         if self.compress_results:
             # try to delete uncompressed file (would have been overwritten in no-compress-mode)
             try:
-                os.remove(filename)
+                os.remove(writer.uncompressed_file_name)
             except OSError:
                 pass
-            self.all_created_files.discard(filename)
-            self.all_created_files.add(actual_filename)
+            self.all_created_files.discard(writer.uncompressed_file_name)
+        self.all_created_files.add(writer.file_name)
+
+
+def _read_previous_result_xml(xml_file_name, journal_file_name):
+    """
+    Read a result file (compressed or uncompressed) written by a previous execution.
+    If both exist (because the previous execution was interrupted
+    while writing results), the newer one is used.
+    If the previous execution was interrupted while executing the runs,
+    the results of finished runs are taken from the journal.
+    @return: the root XML element or None if no result file exists
+    """
+    candidates = []
+    for filename, open_func in [
+        (xml_file_name + ".bz2", bz2.open),
+        (xml_file_name, open),
+    ]:
+        try:
+            candidates.append((os.path.getmtime(filename), filename, open_func))
+        except OSError:
+            pass
+    if not candidates:
+        return None
+    unused_mtime, filename, open_func = max(candidates)
+    try:
+        with open_func(filename, "rb") as f:
+            result_xml = ElementTree.ElementTree().parse(f)
+    except (OSError, EOFError, ElementTree.ParseError) as e:
+        logging.warning(
+            "Cannot read previous results from %s, executing all runs again: %s",
+            filename,
+            e,
+        )
+        return None
+
+    merge_result_journal(result_xml, journal_file_name)
+
+    # remove indentation, the elements will be pretty-printed again when written
+    for elem in result_xml.iter():
+        if elem.text and not elem.text.strip():
+            elem.text = None
+        elem.tail = None
+    return result_xml
+
+
+def merge_result_journal(result_xml, journal_file_name):
+    """
+    Replace the run elements of an incomplete result XML by the elements
+    of the finished runs from the journal of the same run set, if it exists.
+    @return: the number of replaced run elements
+    """
+    journal_runs = {
+        _get_run_xml_key(run_xml): run_xml
+        for run_xml in _ResultJournal.read_runs(journal_file_name)
+    }
+    count = 0
+    if journal_runs:
+        for i, run_xml in enumerate(result_xml):
+            if run_xml.tag == "run":
+                journal_run_xml = journal_runs.get(_get_run_xml_key(run_xml))
+                if journal_run_xml is not None:
+                    result_xml[i] = journal_run_xml
+                    count += 1
+    return count
+
+
+def _get_run_xml_key(run_xml):
+    """Return a key that identifies a run by the attributes of its XML element."""
+    return tuple(sorted(run_xml.attrib.items()))
+
+
+class _ResultJournal(object):
+    """
+    An append-only journal of the results of the finished runs of a run set.
+    Each line is a JSON string with the XML element of one run.
+    Adding a run is cheap (in contrast to writing the complete result XML),
+    and the journal is synced to disk regularly,
+    such that the results can be recovered after an interruption.
+    The journal is locked while it is written, such that later executions
+    can see whether it belongs to an interrupted execution.
+    """
+
+    _SYNC_INTERVAL = 10  # seconds
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._file = open(file_name, "w", encoding="utf-8")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+
+    def add_run(self, run_xml):
+        line = json.dumps(ElementTree.tostring(run_xml, encoding="unicode")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if time.monotonic() - self._last_sync > self._SYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def remove(self):
+        """Remove the journal after the results were written to the result XML."""
+        try:
+            os.remove(self.file_name)
+        except OSError as e:
+            logging.warning("Could not remove %s: %s", self.file_name, e)
+
+    @staticmethod
+    def read_runs(file_name):
+        """
+        Read the XML elements of the runs from a journal
+        written by a previous execution.
+        An incomplete last line (e.g., because of a crash) is ignored.
+        @return: a list of XML elements
+        """
+        try:
+            with open(file_name, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            logging.warning("Cannot read journal of previous results: %s", e)
+            return []
+
+        runs = []
+        for line in lines:
+            try:
+                runs.append(ElementTree.fromstring(json.loads(line)))
+            except (ValueError, ElementTree.ParseError):
+                logging.debug("Ignoring incomplete entry in %s: %s", file_name, line)
+        return runs
+
+
+def _escape_xml_text(text):
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def _escape_xml_attribute(value):
+    # whitespace characters would be normalized when parsing the attribute
+    return (
+        _escape_xml_text(value)
+        .replace("\n", "&#10;")
+        .replace("\r", "&#13;")
+        .replace("\t", "&#09;")
+    )
+
+
+def _format_xml_element(elem, indent, parts):
+    """
+    Append the formatted XML of an element and its children to a list of strings.
+    The format is the same as produced by xml.dom.minidom with two spaces of
+    indentation and each element on its own line.
+    """
+    parts.append(indent)
+    parts.append("<")
+    parts.append(elem.tag)
+    for name, value in elem.items():
+        parts.append(f' {name}="{_escape_xml_attribute(value)}"')
+
+    if len(elem) == 0:
+        if elem.text:
+            parts.append(f">{_escape_xml_text(elem.text)}</{elem.tag}>\n")
         else:
-            os.rename(actual_filename, filename)
-            self.all_created_files.add(filename)
+            parts.append("/>\n")
+        return
+
+    parts.append(">\n")
+    child_indent = indent + "  "
+    if elem.text:
+        parts.append(_escape_xml_text(child_indent + elem.text) + "\n")
+    for child in elem:
+        _format_xml_element(child, child_indent, parts)
+        if child.tail:
+            parts.append(_escape_xml_text(child_indent + child.tail) + "\n")
+    parts.append(f"{indent}</{elem.tag}>\n")
+
+
+class _PrettyXmlWriter(object):
+    """
+    Writes an indented XML file with DOCTYPE directly from an ElementTree element,
+    without converting the element into a string or a DOM first.
+    The start tag of the root element is written immediately,
+    its children are passed one by one to write_element().
+    """
+
+    def __init__(self, file_name, root, compress):
+        self.uncompressed_file_name = file_name
+        if compress:
+            self.file_name = file_name + ".bz2"
+            self._temp_file_name = None
+            raw_file = bz2.BZ2File(self.file_name, "wb")
+        else:
+            self.file_name = file_name
+            # write content to temp file first to prevent losing data
+            # in existing file if writing fails
+            self._temp_file_name = file_name + ".tmp"
+            raw_file = open(self._temp_file_name, "wb")
+        self._file = io.TextIOWrapper(raw_file, encoding="utf-8")
+        self._root_tag = root.tag
+
+        parts = [
+            '<?xml version="1.0" encoding="utf-8"?>\n',
+            f"<!DOCTYPE {root.tag}\n",
+            f"  PUBLIC '{RESULT_XML_PUBLIC_ID}'\n",
+            f"  '{RESULT_XML_SYSTEM_ID}'>\n",
+            f"<{root.tag}",
+        ]
+        for name, value in root.items():
+            parts.append(f' {name}="{_escape_xml_attribute(value)}"')
+        parts.append(">\n")
+        self._file.write("".join(parts))
 
-        return filename
+    def write_element(self, elem):
+        """Write a child of the root element."""
+        parts = []
+        _format_xml_element(elem, "  ", parts)
+        self._file.write("".join(parts))
+
+    def close(self):
+        self._file.write(f"</{self._root_tag}>\n")
+        self._file.close()
+        if self._temp_file_name:
+            os.rename(self._temp_file_name, self.file_name)
+
+
+class _LogArchive(object):
+    """
+    A ZIP archive for the log files of runs.
+    A single background thread adds the files one after another to the archive
+    with DEFLATE compression, such that the workers do not compress the files.
+    Callers of add() only need to wait if too many files are pending.
+    """
+
+    def __init__(self, file_name, mode, threads):
+        self._zip = zipfile.ZipFile(
+            file_name, mode=mode, compression=zipfile.ZIP_DEFLATED
+        )
+        self._write_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="BenchExec-log-archive"
+        )
+        self._pending = threading.BoundedSemaphore(2 * threads)
+
+    def add(self, file_name, arcname):
+        """Add a file to the archive and delete the file afterwards."""
+        self._pending.acquire()
+        try:
+            self._write_executor.submit(self._write, file_name, arcname)
+        except BaseException:
+            self._pending.release()
+            raise
+
+    def close(self):
+        """
+        Wait until all pending files are added and close the archive.
+        @return: whether the archive is empty
+        """
+        self._write_executor.shutdown()
+        is_empty = not self._zip.namelist()
+        self._zip.close()
+        return is_empty
+
+    def _write(self, file_name, arcname):
+        try:
+            self._zip.write(file_name, arcname)
+            os.remove(file_name)
+        except BaseException as e:
+            logging.warning(
+                "Could not add log file %s to ZIP archive: %s", file_name, e
+            )
+        finally:
+            self._pending.release()
 
 
 class Statistics(object):
@@ -7,13 +7,15 @@
 
 """
     This module contains the Pqos class which is used to interact with pqos_wrapper cli
-    to allocate equal cache for each thread and isolate cache of two individual threads.
+    to allocate equal cache for each thread and isolate cache of two individual threads,
+    and the PqosMonitoringSession class for monitoring the runs of all threads.
 """
 
 import os
 import logging
 import json
 import grp
+import threading
 from signal import SIGINT
 from subprocess import check_output, CalledProcessError, STDOUT, Popen, PIPE
 from benchexec.util import find_executable2, get_capability, check_msr
@@ -144,26 +146,35 @@ class Pqos(object):
         """
         ret = {}
         if self.mon_process:
-            self.mon_process.send_signal(SIGINT)
-            mon_output = self.mon_process.communicate()
-            if self.mon_process.returncode == 0:
-                mon_data = json.loads(mon_output[0])
-                logging.debug(mon_data["monitor_events"]["message"])
-                ret = self.flatten_mon_data(
-                    mon_data["monitor_events"]["function_output"]["monitoring_data"]
-                )
-            else:
-                if self.show_warnings:
-                    self.print_error_message(
-                        mon_output[1], "mon", self.mon_process.args
-                    )
-            self.mon_process.kill()
+            ret = self.read_monitoring_result(self.mon_process)
             self.mon_process = None
         else:
             if self.show_warnings:
                 logging.warning("No monitoring process started")
         return ret
 
+    def read_monitoring_result(self, mon_process):
+        """
+        Stop the given monitoring process by sending SIGINT
+        and return its monitoring data as flattened dictionary.
+
+            @mon_process: The monitoring process of pqos_wrapper
+        """
+        ret = {}
+        mon_process.send_signal(SIGINT)
+        mon_output = mon_process.communicate()
+        if mon_process.returncode == 0:
+            mon_data = json.loads(mon_output[0])
+            logging.debug(mon_data["monitor_events"]["message"])
+            ret = self.flatten_mon_data(
+                mon_data["monitor_events"]["function_output"]["monitoring_data"]
+            )
+        else:
+            if self.show_warnings:
+                self.print_error_message(mon_output[1], "mon", mon_process.args)
+        mon_process.kill()
+        return ret
+
     def reset_monitoring(self):
         """
         Reset monitoring RMID to 0 for all cores
@@ -235,3 +246,60 @@ class Pqos(object):
                 )
         else:
             logging.warning("Load msr module for using cache allocation/monitoring")
+
+
+class PqosMonitoringSession(object):
+    """
+    The PqosMonitoringSession class monitors cache and memory-bandwidth events
+    of the runs of all threads of a benchmark. Unlike a separate Pqos instance per run,
+    pqos_wrapper is searched and its monitoring capability is checked only once
+    for the whole session, such that each run only starts its monitoring process.
+    The session can be used by several threads concurrently.
+
+        @pqos: The Pqos instance to use for executing pqos_wrapper
+    """
+
+    def __init__(self, pqos):
+        self.pqos = pqos
+        self._lock = threading.Lock()
+        self._available = None  # unknown until first use
+
+    def is_available(self):
+        """
+        Check (once) whether monitoring is possible with pqos_wrapper.
+        """
+        with self._lock:
+            if self._available is None:
+                self._available = self.pqos.check_capacity("mon")
+            return self._available
+
+    def start(self, cores):
+        """
+        Start monitoring events on the given cores of a single run.
+
+            @cores: The list of cores assigned to the run
+            @return: A handle for stop(), or None if monitoring is not possible
+        """
+        if not self.is_available():
+            return None
+        args_list = [
+            self.pqos.executable_path,
+            "-m",
+            self.pqos.convert_core_list([cores]),
+        ]
+        try:
+            return Popen(args_list, stdout=PIPE, stderr=PIPE, universal_newlines=True)
+        except OSError as e:
+            logging.debug("Could not start pqos_wrapper for monitoring: %s", e)
+            return None
+
+    def stop(self, mon_process):
+        """
+        Stop monitoring of a single run.
+
+            @mon_process: The handle returned by start()
+            @return: A dictionary with the same keys as Pqos.flatten_mon_data
+        """
+        if mon_process is None:
+            return {}
+        return self.pqos.read_monitoring_result(mon_process)
@@ -10,6 +10,7 @@ This module contains functions for computing assignments of resources to runs.
 """
 
 import collections
+import glob
 import itertools
 import logging
 import math
@@ -21,6 +22,8 @@ from benchexec import util
 
 __all__ = [
     "check_memory_size",
+    "create_resource_pool",
+    "get_cpu_core_classes",
     "get_cpu_cores_per_run",
     "get_memory_banks_per_run",
     "get_cpu_package_for_core",
@@ -28,7 +31,12 @@ __all__ = [
 
 
 def get_cpu_cores_per_run(
-    coreLimit, num_of_threads, use_hyperthreading, my_cgroups, coreSet=None
+    coreLimit,
+    num_of_threads,
+    use_hyperthreading,
+    my_cgroups,
+    coreSet=None,
+    core_class=None,
 ):
     """
     Calculate an assignment of the available CPU cores to a number
@@ -51,18 +59,43 @@ def get_cpu_cores_per_run(
     The list of available cores is read from the cgroup file system,
     such that the assigned cores are a subset of the cores
     that the current process is allowed to use.
-    This script does currently not support situations
-    where the available cores are asymmetrically split over CPUs,
-    e.g. 3 cores on one CPU and 5 on another.
+    If the available cores are asymmetrically split over CPUs
+    (e.g. 3 cores on one CPU and 5 on another),
+    or if physical cores have different numbers of usable sibling cores
+    (e.g., on hybrid CPUs with performance and efficiency cores),
+    a simpler assignment is used that never splits physical cores among runs.
 
     @param coreLimit: the number of cores for each run
     @param num_of_threads: the number of parallel benchmark executions
     @param coreSet: the list of CPU cores identifiers provided by a user, None makes benchexec using all cores
+    @param core_class: the class of cores to use on hybrid CPUs ("performance" or "efficiency"), None for all cores
     @return a list of lists, where each inner list contains the cores for one run
     """
+    allCpus, cores_of_unit, siblings_of_core = _get_cpu_topology(
+        my_cgroups, coreSet, core_class
+    )
+    return _get_cpu_cores_per_run0(
+        coreLimit,
+        num_of_threads,
+        use_hyperthreading,
+        allCpus,
+        cores_of_unit,
+        siblings_of_core,
+    )
+
+
+def _get_cpu_topology(my_cgroups, coreSet=None, core_class=None):
+    """
+    Read the available CPU cores and their topology from the file system.
+    @param coreSet: the list of CPU cores identifiers provided by a user, None makes benchexec using all cores
+    @param core_class: the class of cores to use on hybrid CPUs, None for all cores
+    @return a tuple of the list of all available cores,
+        a mapping from each CPU/memory region to the list of its cores,
+        and a mapping from each core to its siblings
+    """
     try:
         # read list of available CPU cores
-        allCpus = util.parse_int_list(my_cgroups.get_value(cgroups.CPUSET, "cpus"))
+        allCpus = my_cgroups.read_allowed_cpus()
 
         # Filter CPU cores according to the list of identifiers provided by a user
         if coreSet:
@@ -74,6 +107,27 @@ def get_cpu_cores_per_run(
                 )
             allCpus = [core for core in allCpus if core in coreSet]
 
+        # Filter CPU cores according to their class on hybrid CPUs
+        core_classes = get_cpu_core_classes(allCpus)
+        logging.debug("Classes of CPU cores are %s.", core_classes)
+        if core_class:
+            if not core_classes:
+                logging.warning(
+                    "All CPU cores belong to the same class, ignoring core class %s.",
+                    core_class,
+                )
+            elif not core_classes.get(core_class):
+                sys.exit(f"No CPU cores of class {core_class} are available.")
+            else:
+                allCpus = core_classes[core_class]
+        elif len(core_classes) > 1:
+            logging.warning(
+                "CPU has cores of different classes (%s), "
+                "results of runs on different classes of cores are not comparable. "
+                "Consider restricting the runs to one class of cores.",
+                ", ".join(core_classes),
+            )
+
         logging.debug("List of available CPU cores is %s.", allCpus)
 
         # read mapping of core to memory region
@@ -119,14 +173,7 @@ def get_cpu_cores_per_run(
         logging.debug("Siblings of cores are %s.", siblings_of_core)
     except ValueError as e:
         sys.exit(f"Could not read CPU information from kernel: {e}")
-    return _get_cpu_cores_per_run0(
-        coreLimit,
-        num_of_threads,
-        use_hyperthreading,
-        allCpus,
-        cores_of_unit,
-        siblings_of_core,
-    )
+    return allCpus, cores_of_unit, siblings_of_core
 
 
 def _get_cpu_cores_per_run0(
@@ -187,27 +234,30 @@ def _get_cpu_cores_per_run0(
 
     unit_size = len(next(iter(cores_of_unit.values())))  # Number of units per core
     if any(len(cores) != unit_size for cores in cores_of_unit.values()):
-        sys.exit(
-            "Asymmetric machine architecture not supported: "
+        logging.debug(
+            "Asymmetric machine architecture: "
             "CPUs/memory regions with different number of cores."
         )
+        return _get_cpu_cores_per_run_asymmetric(
+            coreLimit, num_of_threads, allCpus, cores_of_unit, siblings_of_core
+        )
 
     core_size = len(next(iter(siblings_of_core.values())))  # Number of threads per core
     if any(len(siblings) != core_size for siblings in siblings_of_core.values()):
-        sys.exit(
-            "Asymmetric machine architecture not supported: "
+        logging.debug(
+            "Asymmetric machine architecture: "
             "CPU cores with different number of sibling cores."
         )
+        return _get_cpu_cores_per_run_asymmetric(
+            coreLimit, num_of_threads, allCpus, cores_of_unit, siblings_of_core
+        )
 
     all_cpus_set = set(allCpus)
     for core, siblings in siblings_of_core.items():
-        siblings_set = set(siblings)
-        if not siblings_set.issubset(all_cpus_set):
-            unusable_cores = siblings_set.difference(all_cpus_set)
-            sys.exit(
-                f"Core assignment is unsupported because siblings {unusable_cores} "
-                f"of core {core} are not usable. "
-                f"Please always make all virtual cores of a physical core available."
+        if not set(siblings).issubset(all_cpus_set):
+            # ResourcePool warns about this
+            return _get_cpu_cores_per_run_asymmetric(
+                coreLimit, num_of_threads, allCpus, cores_of_unit, siblings_of_core
             )
 
     # Second, compute some values we will need.
@@ -314,6 +364,289 @@ def _get_cpu_cores_per_run0(
     return result
 
 
+def _get_cpu_cores_per_run_asymmetric(
+    coreLimit, num_of_threads, allCpus, cores_of_unit, siblings_of_core
+):
+    """
+    Compute the core assignment for machines where the algorithm of
+    _get_cpu_cores_per_run0() is not applicable, i.e., where CPUs/memory regions
+    have different numbers of cores, physical cores have different numbers of
+    siblings (like on hybrid CPUs), or not all siblings of a core are usable.
+    The runs are spread evenly over the CPUs/memory regions by always using the one
+    with the most free cores, and each run gets only whole physical cores
+    as with a ResourcePool.
+    """
+    pool = ResourcePool(allCpus, cores_of_unit, siblings_of_core)
+    result = []
+    for unused_run in range(num_of_threads):
+        allocation = pool.allocate(coreLimit, spread=True)
+        if allocation is None:
+            sys.exit(
+                f"Cannot run {num_of_threads} benchmarks in parallel "
+                f"with {coreLimit} CPU cores each on this asymmetric machine "
+                f"without splitting physical cores among runs. "
+                f"Please reduce the number of threads to {len(result)}."
+            )
+        result.append(allocation.cores)
+
+    logging.debug("Final core assignment: %s.", result)
+    return result
+
+
+def create_resource_pool(use_hyperthreading, my_cgroups, coreSet=None, core_class=None):
+    """
+    Create a ResourcePool for assigning CPU cores and memory to runs
+    with individual resource limits while they are started.
+    The cores, memory banks, and their topology are read from the file system
+    like in get_cpu_cores_per_run().
+    @param coreSet: the list of CPU cores identifiers provided by a user, None makes benchexec using all cores
+    @param core_class: the class of cores to use on hybrid CPUs, None for all cores
+    """
+    allCpus, cores_of_unit, siblings_of_core = _get_cpu_topology(
+        my_cgroups, coreSet, core_class
+    )
+    memory_banks_of_core = None
+    memory_bank_sizes = None
+    try:
+        if os.path.isdir("/sys/devices/system/node/"):
+            allMems = set(my_cgroups.read_allowed_memory_banks())
+            memory_banks_of_core = {
+                core: sorted(
+                    allMems.intersection(
+                        _get_memory_banks_listed_in_dir(
+                            f"/sys/devices/system/cpu/cpu{core}/"
+                        )
+                    )
+                )
+                for core in allCpus
+            }
+            memory_bank_sizes = {
+                mem: _get_memory_bank_size(mem)
+                for mems in memory_banks_of_core.values()
+                for mem in mems
+            }
+            if not memory_bank_sizes:
+                memory_banks_of_core = None
+                memory_bank_sizes = None
+    except ValueError as e:
+        sys.exit(f"Could not read memory information from kernel: {e}")
+    return ResourcePool(
+        allCpus,
+        cores_of_unit,
+        siblings_of_core,
+        use_hyperthreading,
+        memory_banks_of_core,
+        memory_bank_sizes,
+    )
+
+
+# The resources assigned to one run by a ResourcePool: the list of CPU cores and
+# the list of memory banks (None without NUMA support) that the run should use,
+# and the information for giving back the resources (the physical cores that are
+# blocked for the run, their CPUs/memory regions, and the reserved bytes per bank).
+ResourceAllocation = collections.namedtuple(
+    "ResourceAllocation", "cores memory_banks physical_cores unit_of_cores memory"
+)
+
+
+class ResourcePool(object):
+    """
+    Assign CPU cores and memory banks to runs while the runs are started,
+    such that runs with different core and memory limits can be executed in parallel.
+    In contrast to get_cpu_cores_per_run(), which computes a fixed assignment
+    for a given number of identical runs, this keeps track of which cores and how much
+    memory of each memory bank are currently free.
+    Each run gets only whole physical cores (sibling cores that are not used by the run
+    are blocked), and the cores of a run are taken from a single CPU/memory region
+    whenever the run fits into one.
+    If several CPUs/memory regions are possible,
+    the one with the fewest free cores is chosen (best fit),
+    such that larger blocks of cores remain available for runs with more cores.
+    Runs that need more cores than one CPU/memory region has
+    get several completely free CPUs/memory regions.
+    If not all sibling cores of a physical core are available,
+    only the available ones are used as this physical core.
+    This class is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        allCpus,
+        cores_of_unit,
+        siblings_of_core,
+        use_hyperthreading=True,
+        memory_banks_of_core=None,
+        memory_bank_sizes=None,
+    ):
+        """
+        Create a pool of the given resources, which are described as for
+        _get_cpu_cores_per_run0().
+        @param memory_banks_of_core: a mapping from each core to the list of
+            memory banks that are local to it, or None if there is no NUMA support
+        @param memory_bank_sizes: a mapping from each memory bank to its size in bytes
+        """
+        all_cpus_set = set(allCpus)
+        self._unit_size = {}
+        self._free_physical_cores = {}
+        for unit, cores in sorted(cores_of_unit.items()):
+            physical_cores = []
+            for core in sorted(cores):
+                if core not in all_cpus_set:
+                    continue
+                siblings = sorted(all_cpus_set.intersection(siblings_of_core[core]))
+                if core != siblings[0]:
+                    continue  # physical core is represented by first usable sibling
+                unusable_cores = set(siblings_of_core[core]).difference(all_cpus_set)
+                if unusable_cores:
+                    logging.warning(
+                        "Siblings %s of core %s are not usable, "
+                        "which makes benchmarking on this core unreliable. "
+                        "Please always make all virtual cores of a physical core "
+                        "available.",
+                        sorted(unusable_cores),
+                        core,
+                    )
+                physical_cores.append(siblings if use_hyperthreading else [core])
+            self._free_physical_cores[unit] = physical_cores
+            self._unit_size[unit] = sum(len(cores) for cores in physical_cores)
+        self._all_physical_cores = {
+            unit: list(cores) for unit, cores in self._free_physical_cores.items()
+        }
+        self._memory_banks_of_core = memory_banks_of_core
+        self._total_memory = dict(memory_bank_sizes or {})
+        self._free_memory = dict(self._total_memory)
+        logging.debug(
+            "Physical cores available for runs are %s.", self._free_physical_cores
+        )
+
+    def can_ever_allocate(self, core_limit, memory_limit):
+        """
+        Check whether a run with the given limits could be started
+        if no other run is executing.
+        """
+        return (
+            self._find_allocation(
+                core_limit, memory_limit, self._all_physical_cores, self._total_memory
+            )
+            is not None
+        )
+
+    def allocate(self, core_limit, memory_limit=None, spread=False):
+        """
+        Reserve cores and memory for a run with the given limits
+        if enough resources are currently free.
+        @param core_limit: the number of cores for the run
+        @param memory_limit: the memory limit in bytes for the run, or None
+        @param spread: whether to use the CPU/memory region with the most free cores
+            instead of the one with the fewest free cores
+        @return a ResourceAllocation, or None if not enough resources are free
+        """
+        allocation = self._find_allocation(
+            core_limit,
+            memory_limit,
+            self._free_physical_cores,
+            self._free_memory,
+            spread,
+        )
+        if allocation is None:
+            return None
+
+        for unit, physical_core in zip(
+            allocation.unit_of_cores, allocation.physical_cores
+        ):
+            self._free_physical_cores[unit].remove(physical_core)
+        for mem, size in allocation.memory.items():
+            self._free_memory[mem] -= size
+        logging.debug(
+            "Assigning cores %s and memory banks %s to run.",
+            allocation.cores,
+            allocation.memory_banks,
+        )
+        return allocation
+
+    def release(self, allocation):
+        """Give back the resources of a finished run."""
+        for unit, physical_core in zip(
+            allocation.unit_of_cores, allocation.physical_cores
+        ):
+            self._free_physical_cores[unit].append(physical_core)
+            self._free_physical_cores[unit].sort()
+        for mem, size in allocation.memory.items():
+            self._free_memory[mem] += size
+
+    def _find_allocation(
+        self, core_limit, memory_limit, free_physical_cores, free_memory, spread=False
+    ):
+        def free_size(unit):
+            return sum(len(cores) for cores in free_physical_cores[unit])
+
+        max_unit_size = max(self._unit_size.values(), default=0)
+        if core_limit <= max_unit_size:
+            # best fit: the unit with the fewest free cores that is large enough,
+            # or worst fit if runs should be spread over the units
+            candidates = sorted(
+                (-free_size(unit) if spread else free_size(unit), unit)
+                for unit in free_physical_cores
+                if free_size(unit) >= core_limit
+            )
+            for unused_size, unit in candidates:
+                allocation = self._take_cores(
+                    core_limit, memory_limit, [unit], free_physical_cores, free_memory
+                )
+                if allocation:
+                    return allocation
+            return None
+
+        # run needs several units, use only units that are completely free
+        free_units = [
+            unit
+            for unit in sorted(free_physical_cores)
+            if free_size(unit) == self._unit_size[unit]
+        ]
+        units = []
+        for unit in free_units:
+            units.append(unit)
+            if sum(self._unit_size[u] for u in units) >= core_limit:
+                return self._take_cores(
+                    core_limit, memory_limit, units, free_physical_cores, free_memory
+                )
+        return None
+
+    def _take_cores(
+        self, core_limit, memory_limit, units, free_physical_cores, free_memory
+    ):
+        cores = []
+        physical_cores = []
+        unit_of_cores = []
+        for unit in units:
+            for physical_core in free_physical_cores[unit]:
+                if len(cores) >= core_limit:
+                    break
+                cores.extend(physical_core)
+                physical_cores.append(physical_core)
+                unit_of_cores.append(unit)
+        assert len(cores) >= core_limit
+        cores = sorted(cores[:core_limit])
+
+        memory_banks = None
+        memory = {}
+        if self._memory_banks_of_core is not None:
+            memory_banks = sorted(
+                {mem for core in cores for mem in self._memory_banks_of_core[core]}
+            )
+            if memory_limit:
+                remaining_memory = memory_limit
+                for mem in memory_banks:
+                    memory[mem] = min(free_memory[mem], remaining_memory)
+                    remaining_memory -= memory[mem]
+                if remaining_memory > 0:
+                    return None
+
+        return ResourceAllocation(
+            cores, memory_banks, physical_cores, unit_of_cores, memory
+        )
+
+
 def get_memory_banks_per_run(coreAssignment, cgroups):
     """Get an assignment of memory banks to runs that fits to the given coreAssignment,
     i.e., no run is allowed to use memory that is not local (on the same NUMA node)
@@ -389,14 +722,8 @@ def check_memory_size(memLimit, num_of_threads, memoryAssignment, my_cgroups):
             return
 
         if cgroups.MEMORY in my_cgroups:
-            # We use the entries hierarchical_*_limit in memory.stat and not memory.*limit_in_bytes
-            # because the former may be lower if memory.use_hierarchy is enabled.
-            for key, value in my_cgroups.get_key_value_pairs(cgroups.MEMORY, "stat"):
-                if (
-                    key == "hierarchical_memory_limit"
-                    or key == "hierarchical_memsw_limit"
-                ):
-                    check_limit(int(value))
+            for limit in my_cgroups.read_memory_limits():
+                check_limit(limit)
 
         # Get list of all memory banks, either from memory assignment or from system.
         if not memoryAssignment:
@@ -453,6 +780,64 @@ def _get_memory_bank_size(memBank):
     raise ValueError(f"Failed to read total memory from {fileName}.")
 
 
+# Files that list the cores of each class on hybrid Intel CPUs
+_CPU_CORE_CLASS_FILES = {
+    "performance": "/sys/devices/cpu_core/cpus",
+    "efficiency": "/sys/devices/cpu_atom/cpus",
+}
+
+
+def get_cpu_core_classes(allCpus):
+    """
+    Get the classes of the given cores on hybrid CPUs, which have cores with
+    different performance characteristics (e.g., Intel's P-cores and E-cores,
+    or ARM's big.LITTLE).
+    The classes are read from the kernel's information about hybrid Intel CPUs,
+    or otherwise derived from the relative capacity of each core,
+    where the cores with the highest capacity are considered "performance" cores
+    and all others "efficiency" cores.
+    @param allCpus: the list of cores that should be considered
+    @return a mapping from "performance" and "efficiency" to the list of cores of this
+        class that are among the given cores, or an empty dict if all cores of the
+        machine belong to the same class
+    """
+    core_classes = {}
+    for core_class, file_name in _CPU_CORE_CLASS_FILES.items():
+        if os.path.exists(file_name):
+            core_classes[core_class] = util.parse_int_list(util.read_file(file_name))
+
+    if not core_classes:
+        capacity_of_core = {}
+        for file_name in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpu_capacity"):
+            core = int(os.path.basename(os.path.dirname(file_name))[3:])
+            capacity_of_core[core] = int(util.read_file(file_name))
+        core_classes = _get_cpu_core_classes_by_capacity(capacity_of_core)
+
+    if len(core_classes) <= 1:
+        return {}
+    all_cpus_set = set(allCpus)
+    return {
+        core_class: sorted(all_cpus_set.intersection(cores))
+        for core_class, cores in core_classes.items()
+        if all_cpus_set.intersection(cores)
+    }
+
+
+def _get_cpu_core_classes_by_capacity(capacity_of_core):
+    """
+    Classify cores according to their relative capacity, c.f. get_cpu_core_classes().
+    @param capacity_of_core: a mapping from each core to its capacity
+    """
+    if len(set(capacity_of_core.values())) <= 1:
+        return {}
+    max_capacity = max(capacity_of_core.values())
+    core_classes = {"performance": [], "efficiency": []}
+    for core, capacity in sorted(capacity_of_core.items()):
+        core_class = "performance" if capacity == max_capacity else "efficiency"
+        core_classes[core_class].append(core)
+    return core_classes
+
+
 def get_cpu_package_for_core(core):
     """Get the number of the physical package (socket) a core belongs to."""
     return int(
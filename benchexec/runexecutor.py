@@ -6,27 +6,38 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+import atexit
 import collections
+import concurrent.futures
 import datetime
-import errno
 import logging
 import multiprocessing
 import os
 import signal
 import subprocess
 import sys
-import threading
 import time
 import tempfile
+import threading
+import weakref
 from typing import cast, Optional
 
 from benchexec import __version__
 from benchexec import baseexecutor
 from benchexec import BenchExecException
 from benchexec import containerexecutor
-from benchexec.cgroups import BLKIO, CPUACCT, CPUSET, FREEZER, MEMORY, find_my_cgroups
-from benchexec.filehierarchylimit import FileHierarchyLimitThread
+from benchexec.cgroups import (
+    BLKIO,
+    CGROUPS_V2,
+    CPUACCT,
+    CPUSET,
+    FREEZER,
+    MEMORY,
+    find_my_cgroups,
+)
+from benchexec.filehierarchylimit import FileHierarchyLimit
 from benchexec import intel_cpu_energy
+from benchexec import limitmonitor
 from benchexec import oomhandler
 from benchexec import resources
 from benchexec import systeminfo
@@ -35,7 +46,48 @@ from benchexec import util
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
 
 _WALLTIME_LIMIT_DEFAULT_OVERHEAD = 30  # seconds more than cputime limit
+# Minimal interval between checks of time limits, bounds the delay of kills
+_MIN_TIME_LIMIT_CHECK_INTERVAL = 0.1  # seconds
 _BYTE_FACTOR = 1000  # byte in kilobyte
+_CPUTIME_STABLE_MAX_DELAY = 0.1  # seconds between reads of cgroup cputime
+# Maximal time to wait for the output of processes of the tool that are still running
+_OUTPUT_CAPTURE_WAIT_TIMEOUT = 10  # seconds
+_CGROUP_POOL_SIZE = 2  # idle cgroups kept for reuse per RunExecutor and subsystems
+# Removing the cgroup and the temporary directory of a run is done in the background
+# such that the next run can start earlier.
+# Python waits for pending cleanup tasks on exit.
+_cleanup_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="BenchExec-cleanup"
+)
+# Bound for pending cleanups per RunExecutor, if it is reached
+# the next run waits such that the cleanups cannot pile up.
+_MAX_PENDING_CLEANUPS = 2
+
+_executors = weakref.WeakSet()  # all RunExecutor instances, for cleanup on exit
+
+
+def _wait_for_cleanup():
+    """Wait until the cleanup of all previously terminated runs is finished."""
+    _cleanup_executor.submit(util.dummy_fn).result()
+
+
+@atexit.register
+def _remove_all_pooled_cgroups():
+    """Remove the idle cgroups of all RunExecutor instances, called on exit."""
+    for executor in list(_executors):
+        executor._remove_pooled_cgroups()
+
+
+def _remove_cgroups_in_pool(cgroup_pool, lock):
+    """Remove all cgroups in the given pool of idle cgroups."""
+    with lock:
+        pools = list(cgroup_pool.values())
+        cgroup_pool.clear()
+    for pool in pools:
+        for cgroups in pool:
+            cgroups.remove()
+
+
 _LOG_SHRINK_MARKER = "\n\n\nWARNING: YOUR LOGFILE WAS TOO LONG, SOME LINES IN THE MIDDLE WERE REMOVED.\n\n\n\n"
 
 
@@ -296,6 +348,8 @@ def main(argv=None):
     print_optional_result("memory", "B")
     print_optional_result("blkio-read", "B")
     print_optional_result("blkio-write", "B")
+    print_optional_result("overhead-setup", "s")
+    print_optional_result("overhead-teardown", "s")
     energy = intel_cpu_energy.format_energy_results(result.get("cpuenergy"))
     for energy_key, energy_value in energy.items():
         print(f"{energy_key}={energy_value}J")
@@ -306,29 +360,44 @@ class RunExecutor(containerexecutor.ContainerExecutor):
     # --- object initialization ---
 
     def __init__(
-        self, cleanup_temp_dir=True, additional_cgroup_subsystems=[], *args, **kwargs
+        self,
+        cleanup_temp_dir=True,
+        additional_cgroup_subsystems=[],
+        *args,
+        my_cgroups=None,
+        **kwargs,
     ):
         """
         Create an instance of of RunExecutor.
         @param cleanup_temp_dir Whether to remove the temporary directories created for the run.
         @param additional_cgroup_subsystems List of additional cgroup subsystems that should be required and used for runs.
+        @param my_cgroups The cgroups of the current process as returned by find_my_cgroups(), which can be shared by several instances (optional).
         """
         super(RunExecutor, self).__init__(*args, **kwargs)
         self._termination_reason = None
         self._should_cleanup_temp_dir = cleanup_temp_dir
         self._cgroup_subsystems = additional_cgroup_subsystems
+        # Idle child cgroups that are reused for further runs, by set of subsystems
+        self._cgroup_pool = collections.defaultdict(list)
+        self._cgroup_pool_lock = threading.Lock()
+        self._pending_cleanups = threading.BoundedSemaphore(_MAX_PENDING_CLEANUPS)
 
         self._energy_measurement = (
             intel_cpu_energy.EnergyMeasurement.create_if_supported()
         )
 
-        self._init_cgroups()
+        self._init_cgroups(my_cgroups)
+        _executors.add(self)
+        # If this instance is garbage collected before exit, remove its idle cgroups.
+        weakref.finalize(
+            self, _remove_cgroups_in_pool, self._cgroup_pool, self._cgroup_pool_lock
+        ).atexit = False
 
-    def _init_cgroups(self):
+    def _init_cgroups(self, my_cgroups=None):
         """
         This function initializes the cgroups for the limitations and measurements.
         """
-        self.cgroups = find_my_cgroups()
+        self.cgroups = find_my_cgroups() if my_cgroups is None else my_cgroups
         critical_cgroups = set()
 
         for subsystem in self._cgroup_subsystems:
@@ -361,9 +430,7 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         if MEMORY not in self.cgroups:
             logging.warning("Cannot measure memory consumption without memory cgroup.")
         else:
-            if systeminfo.has_swap() and (
-                not self.cgroups.has_value(MEMORY, "memsw.max_usage_in_bytes")
-            ):
+            if systeminfo.has_swap() and not self.cgroups.has_swap_accounting():
                 logging.warning(
                     "Kernel misses feature for accounting swap memory, but machine has swap. "
                     "Memory usage may be measured inaccurately. "
@@ -377,15 +444,13 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         if CPUSET in self.cgroups:
             # Read available cpus/memory nodes:
             try:
-                self.cpus = util.parse_int_list(self.cgroups.get_value(CPUSET, "cpus"))
+                self.cpus = self.cgroups.read_allowed_cpus()
             except ValueError as e:
                 logging.warning("Could not read available CPU cores from kernel: %s", e)
             logging.debug("List of available CPU cores is %s.", self.cpus)
 
             try:
-                self.memory_nodes = util.parse_int_list(
-                    self.cgroups.get_value(CPUSET, "mems")
-                )
+                self.memory_nodes = self.cgroups.read_allowed_memory_banks()
             except ValueError as e:
                 logging.warning(
                     "Could not read available memory nodes from kernel: %s", str(e)
@@ -420,9 +485,12 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             subsystems.append(CPUSET)
         subsystems = [s for s in subsystems if s in self.cgroups]
 
-        cgroups = self.cgroups.create_fresh_child_cgroup(*subsystems)
-
-        logging.debug("Created cgroups %s.", cgroups)
+        cgroups = self._get_pooled_cgroup(frozenset(subsystems))
+        if cgroups is None:
+            cgroups = self.cgroups.create_fresh_child_cgroup(*subsystems)
+            logging.debug("Created cgroups %s.", cgroups)
+        else:
+            logging.debug("Reusing cgroups %s.", cgroups)
 
         # First, set user-specified values such that they get overridden by our settings if necessary.
         for ((subsystem, option), value) in cgroup_values.items():
@@ -456,44 +524,11 @@ class RunExecutor(containerexecutor.ContainerExecutor):
 
         # Setup memory limit
         if memlimit is not None:
-            limit = "limit_in_bytes"
-            cgroups.set_value(MEMORY, limit, memlimit)
-
-            swap_limit = "memsw.limit_in_bytes"
-            # We need swap limit because otherwise the kernel just starts swapping
-            # out our process if the limit is reached.
-            # Some kernels might not have this feature,
-            # which is ok if there is actually no swap.
-            if not cgroups.has_value(MEMORY, swap_limit):
-                if systeminfo.has_swap():
-                    sys.exit(
-                        'Kernel misses feature for accounting swap memory, but machine has swap. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
-                    )
-            else:
-                try:
-                    cgroups.set_value(MEMORY, swap_limit, memlimit)
-                except OSError as e:
-                    if e.errno == errno.ENOTSUP:
-                        # kernel responds with operation unsupported if this is disabled
-                        sys.exit(
-                            'Memory limit specified, but kernel does not allow limiting swap memory. Please set swapaccount=1 on your kernel command line or disable swap with "sudo swapoff -a".'
-                        )
-                    raise e
-
-            memlimit = cgroups.get_value(MEMORY, limit)
+            memlimit = cgroups.set_memory_limit(memlimit)
             logging.debug("Effective memory limit is %s bytes.", memlimit)
 
         if MEMORY in cgroups:
-            try:
-                # Note that this disables swapping completely according to
-                # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
-                # (unlike setting the global swappiness to 0).
-                # Our process might get killed because of this.
-                cgroups.set_value(MEMORY, "swappiness", "0")
-            except OSError as e:
-                logging.warning(
-                    "Could not disable swapping for benchmarked process: %s", e
-                )
+            cgroups.disable_swap()
 
         return cgroups
 
@@ -553,12 +588,11 @@ class RunExecutor(containerexecutor.ContainerExecutor):
     def _setup_cgroup_time_limit(
         self, hardtimelimit, softtimelimit, walltimelimit, cgroups, cores, pid_to_kill
     ):
-        """Start time-limit handler.
-        @return None or the time-limit handler for calling cancel()
+        """Create time-limit handler.
+        @return None or the time-limit handler for the LimitMonitor
         """
         if any([hardtimelimit, softtimelimit, walltimelimit]):
-            # Start a timer to periodically check timelimit
-            timelimitThread = _TimelimitThread(
+            return _TimeLimit(
                 cgroups=cgroups,
                 hardtimelimit=hardtimelimit,
                 softtimelimit=softtimelimit,
@@ -567,26 +601,28 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 cores=cores,
                 callbackFn=self._set_termination_reason,
             )
-            timelimitThread.start()
-            return timelimitThread
         return None
 
     def _setup_cgroup_memory_limit(self, memlimit, cgroups, pid_to_kill):
-        """Start memory-limit handler.
-        @return None or the memory-limit handler for calling cancel()
+        """Create memory-limit handler.
+        @return None or the memory-limit handler for the LimitMonitor
         """
         if memlimit is not None:
+            if cgroups.version == CGROUPS_V2:
+                return oomhandler.KillProcessOnOomV2(
+                    cgroups=cgroups,
+                    pid_to_kill=pid_to_kill,
+                    callbackFn=self._set_termination_reason,
+                )
             try:
-                oomThread = oomhandler.KillProcessOnOomThread(
+                return oomhandler.KillProcessOnOom(
                     cgroups=cgroups,
                     pid_to_kill=pid_to_kill,
                     callbackFn=self._set_termination_reason,
                 )
-                oomThread.start()
-                return oomThread
             except OSError as e:
                 logging.critical(
-                    "OSError %s during setup of OomEventListenerThread: %s.",
+                    "OSError %s during setup of OOM event listener: %s.",
                     e.errno,
                     e.strerror,
                 )
@@ -595,17 +631,17 @@ class RunExecutor(containerexecutor.ContainerExecutor):
     def _setup_file_hierarchy_limit(
         self, files_count_limit, files_size_limit, temp_dir, cgroups, pid_to_kill
     ):
-        """Start thread that enforces any file-hiearchy limits."""
+        """Create handler that enforces any file-hiearchy limits.
+        @return None or the file-hierarchy-limit handler for the LimitMonitor
+        """
         if files_count_limit is not None or files_size_limit is not None:
-            file_hierarchy_limit_thread = FileHierarchyLimitThread(
+            return FileHierarchyLimit(
                 self._get_result_files_base(temp_dir),
                 files_count_limit=files_count_limit,
                 files_size_limit=files_size_limit,
                 pid_to_kill=pid_to_kill,
                 callbackFn=self._set_termination_reason,
             )
-            file_hierarchy_limit_thread.start()
-            return file_hierarchy_limit_thread
         return None
 
     # --- run execution ---
@@ -816,9 +852,9 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         This method executes the command line and waits for the termination of it,
         handling all setup and cleanup, but does not check whether arguments are valid.
         """
-        timelimitThread = None
-        oomThread = None
-        file_hierarchy_limit_thread = None
+        setup_start = time.monotonic()
+        monitor = limitmonitor.get_monitor()
+        limits = []
 
         if self._energy_measurement is not None:
             # Calculate which packages we should use for energy measurements
@@ -868,21 +904,16 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             # For a similar reason, we cancel all limits. Otherwise a run could have
             # terminationreason=walltime because copying output files took a long time.
             # Can be removed if #433 gets implemented properly.
-            if timelimitThread:
-                timelimitThread.cancel()
-            if oomThread:
-                oomThread.cancel()
-            if file_hierarchy_limit_thread:
-                file_hierarchy_limit_thread.cancel()
+            for limit in limits:
+                monitor.unregister(limit)
 
             if exit_code.value not in [0, 1]:
-                _get_debug_output_after_crash(output_filename, base_path)
+                if output_capture is None or output_capture.wait(
+                    _OUTPUT_CAPTURE_WAIT_TIMEOUT
+                ):
+                    _get_debug_output_after_crash(output_filename, base_path)
 
-            return starttime, walltime, energy
-
-        def preSubprocess():
-            """Setup that is executed in the forked process before the actual tool is started."""
-            os.setpgrp()  # make subprocess to group-leader
+            return starttime, walltime_before, walltime, energy
 
         # preparations that are not time critical
         cgroups = self._setup_cgroups(cores, memlimit, memory_nodes, cgroup_values)
@@ -898,6 +929,20 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 error_filename, args, write_header=write_header
             )
 
+        # With a size limit, the output is read through a pipe and never written
+        # completely to disk. Otherwise, the tool writes directly to the file.
+        output_capture = None
+        error_capture = None
+        tool_stdout = outputFile
+        tool_stderr = errorFile
+        if max_output_size is not None:
+            output_capture = _BoundedOutputCapture(outputFile, max_output_size)
+            tool_stdout = tool_stderr = output_capture.write_fd
+            if errorFile is not outputFile:
+                error_capture = _BoundedOutputCapture(errorFile, max_output_size)
+                tool_stderr = error_capture.write_fd
+        output_captures = [c for c in [output_capture, error_capture] if c]
+
         pid = None
         returnvalue = 0
         ru_child = None
@@ -913,8 +958,8 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             pid, result_fn = self._start_execution(
                 args=args,
                 stdin=stdin,
-                stdout=outputFile,
-                stderr=errorFile,
+                stdout=tool_stdout,
+                stderr=tool_stderr,
                 env=run_environment,
                 cwd=workingDir,
                 temp_dir=temp_dir,
@@ -922,27 +967,41 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 memory_nodes=memory_nodes,
                 cgroups=cgroups,
                 parent_setup_fn=preParent,
-                child_setup_fn=preSubprocess,
+                # make subprocess to group-leader (module-level function such that
+                # it can be passed to the zygote process of ContainerExecutor)
+                child_setup_fn=os.setpgrp,
                 parent_cleanup_fn=postParent,
                 **kwargs,
             )
+            for capture in output_captures:
+                capture.close_write_end()
 
             with self.SUB_PROCESS_PIDS_LOCK:
                 self.SUB_PROCESS_PIDS.add(pid)
 
-            timelimitThread = self._setup_cgroup_time_limit(
-                hardtimelimit, softtimelimit, walltimelimit, cgroups, cores, pid
-            )
-            oomThread = self._setup_cgroup_memory_limit(memlimit, cgroups, pid)
-            file_hierarchy_limit_thread = self._setup_file_hierarchy_limit(
-                files_count_limit, files_size_limit, temp_dir, cgroups, pid
+            limits.extend(
+                limit
+                for limit in [
+                    self._setup_cgroup_time_limit(
+                        hardtimelimit, softtimelimit, walltimelimit, cgroups, cores, pid
+                    ),
+                    self._setup_cgroup_memory_limit(memlimit, cgroups, pid),
+                    self._setup_file_hierarchy_limit(
+                        files_count_limit, files_size_limit, temp_dir, cgroups, pid
+                    ),
+                ]
+                if limit
             )
+            for limit in limits:
+                monitor.register(limit)
 
             # wait until process has terminated
-            returnvalue, ru_child, (starttime, walltime, energy) = result_fn()
+            returnvalue, ru_child, parent_result = result_fn()
+            starttime, walltime_before, walltime, energy = parent_result
             if starttime:
                 result["starttime"] = starttime
             result["walltime"] = walltime
+            result["overhead-setup"] = walltime_before - setup_start
         finally:
             # cleanup steps that need to get executed even in case of failure
             logging.debug("Process terminated, exit code %s.", returnvalue)
@@ -950,37 +1009,34 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             with self.SUB_PROCESS_PIDS_LOCK:
                 self.SUB_PROCESS_PIDS.discard(pid)
 
-            if timelimitThread:
-                timelimitThread.cancel()
-
-            if oomThread:
-                oomThread.cancel()
-
-            if file_hierarchy_limit_thread:
-                file_hierarchy_limit_thread.cancel()
+            # This waits for checks of limits that are currently executing,
+            # such that they do not interfere with the cleanup.
+            for limit in limits:
+                monitor.unregister(limit)
 
             # Make sure to kill all processes if there are still some
             # (needs to come early to avoid accumulating more CPU time)
             cgroups.kill_all_tasks()
 
             # normally subprocess closes file, we do this again after all tasks terminated
+            for capture in output_captures:
+                capture.close_write_end()
+                if not capture.wait(_OUTPUT_CAPTURE_WAIT_TIMEOUT):
+                    logging.warning(
+                        "Output of tool is incomplete "
+                        "because some of its processes are still running."
+                    )
             outputFile.close()
             if errorFile is not outputFile:
                 errorFile.close()
 
             # measurements are not relevant in case of failure, but need to come before cgroup cleanup
             self._get_cgroup_measurements(cgroups, ru_child, result)
-            logging.debug("Cleaning up cgroups.")
-            cgroups.remove()
-
-            self._cleanup_temp_dir(temp_dir)
-
-            if timelimitThread:
-                _try_join_cancelled_thread(timelimitThread)
-            if oomThread:
-                _try_join_cancelled_thread(oomThread)
-            if file_hierarchy_limit_thread:
-                _try_join_cancelled_thread(file_hierarchy_limit_thread)
+            # Cgroups with user-specified values cannot be reset for reuse.
+            self._pending_cleanups.acquire()
+            _cleanup_executor.submit(
+                self._cleanup, cgroups, temp_dir, reuse_cgroups=not cgroup_values
+            )
 
             if self._energy_measurement:
                 self._energy_measurement.stop()
@@ -997,10 +1053,11 @@ class RunExecutor(containerexecutor.ContainerExecutor):
                 "Benchmark results are unreliable!"
             )
 
-        if error_filename is not None:
-            _reduce_file_size_if_necessary(error_filename, max_output_size)
-
-        _reduce_file_size_if_necessary(output_filename, max_output_size)
+        if not output_captures:
+            # size limit is disabled, but we log the size of the files
+            if error_filename is not None:
+                _reduce_file_size_if_necessary(error_filename, max_output_size)
+            _reduce_file_size_if_necessary(output_filename, max_output_size)
 
         result["exitcode"] = util.ProcessExitCode.from_raw(returnvalue)
         if energy:
@@ -1017,8 +1074,57 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             # does not always run even in case of OOM. We detect this there and report OOM.
             result["terminationreason"] = "memory"
 
+        if "walltime" in result:
+            result["overhead-teardown"] = time.monotonic() - (
+                walltime_before + result["walltime"]
+            )
         return result
 
+    def _cleanup(self, cgroups, temp_dir, reuse_cgroups):
+        """
+        Clean up after a terminated run: Keep its cgroups for reuse if possible
+        (or prepare fresh ones for the next run) and remove the temporary directory.
+        """
+        try:
+            subsystems = frozenset(cgroups.per_subsystem)
+            if reuse_cgroups and cgroups.reset(self.cgroups):
+                self._add_pooled_cgroup(subsystems, cgroups)
+            else:
+                logging.debug("Cleaning up cgroups.")
+                cgroups.remove()
+                if reuse_cgroups:
+                    try:
+                        fresh_cgroups = self.cgroups.create_fresh_child_cgroup(
+                            *subsystems
+                        )
+                    except OSError as e:
+                        logging.debug("Could not create cgroups for next run: %s", e)
+                    else:
+                        self._add_pooled_cgroup(subsystems, fresh_cgroups)
+
+            self._cleanup_temp_dir(temp_dir)
+        finally:
+            self._pending_cleanups.release()
+
+    def _get_pooled_cgroup(self, subsystems):
+        """Take an idle cgroup with the given set of subsystems from the pool."""
+        with self._cgroup_pool_lock:
+            pool = self._cgroup_pool.get(subsystems)
+            return pool.pop() if pool else None
+
+    def _add_pooled_cgroup(self, subsystems, cgroups):
+        """Put an idle cgroup into the pool, or remove it if the pool is full."""
+        with self._cgroup_pool_lock:
+            pool = self._cgroup_pool[subsystems]
+            if len(pool) < _CGROUP_POOL_SIZE:
+                pool.append(cgroups)
+                return
+        cgroups.remove()
+
+    def _remove_pooled_cgroups(self):
+        """Remove all idle cgroups."""
+        _remove_cgroups_in_pool(self._cgroup_pool, self._cgroup_pool_lock)
+
     def _get_cgroup_measurements(self, cgroups, ru_child, result):
         """
         This method calculates the exact results for time and memory measurements.
@@ -1031,14 +1137,17 @@ class RunExecutor(containerexecutor.ContainerExecutor):
         if CPUACCT in cgroups:
             # We want to read the value from the cgroup.
             # The documentation warns about outdated values.
-            # So we read twice with 0.1s time difference,
-            # and continue reading as long as the values differ.
-            # This has never happened except when interrupting the script with Ctrl+C,
+            # So we read until two consecutive values are equal,
+            # waiting increasingly longer (up to 0.1s) between reads.
+            # All processes are already killed, so the first two values are
+            # equal except when interrupting the script with Ctrl+C,
             # but just try to be on the safe side here.
             tmp = cgroups.read_cputime()
             tmp2 = None
+            delay = 0
             while tmp != tmp2:
-                time.sleep(0.1)
+                time.sleep(delay)
+                delay = min(max(2 * delay, 0.001), _CPUTIME_STABLE_MAX_DELAY)
                 tmp2 = tmp
                 tmp = cgroups.read_cputime()
             cputime_cgroups = tmp
@@ -1064,57 +1173,18 @@ class RunExecutor(containerexecutor.ContainerExecutor):
             else:
                 result["cputime"] = cputime_cgroups
 
-            for (core, coretime) in enumerate(
-                cgroups.get_value(CPUACCT, "usage_percpu").split(" ")
-            ):
-                try:
-                    coretime = int(coretime)
-                    if coretime != 0:
-                        # convert nanoseconds to seconds
-                        result[f"cputime-cpu{core}"] = coretime / 1_000_000_000
-                except (OSError, ValueError) as e:
-                    logging.debug(
-                        "Could not read CPU time for core %s from kernel: %s", core, e
-                    )
+            for core, coretime in cgroups.read_usage_per_cpu().items():
+                result[f"cputime-cpu{core}"] = coretime
 
         if MEMORY in cgroups:
-            # This measurement reads the maximum number of bytes of RAM+Swap the process used.
-            # For more details, c.f. the kernel documentation:
-            # https://www.kernel.org/doc/Documentation/cgroups/memory.txt
-            memUsageFile = "memsw.max_usage_in_bytes"
-            if not cgroups.has_value(MEMORY, memUsageFile):
-                memUsageFile = "max_usage_in_bytes"
-            if not cgroups.has_value(MEMORY, memUsageFile):
-                logging.warning("Memory-usage is not available due to missing files.")
-            else:
-                try:
-                    result["memory"] = int(cgroups.get_value(MEMORY, memUsageFile))
-                except OSError as e:
-                    if e.errno == errno.ENOTSUP:
-                        # kernel responds with operation unsupported if this is disabled
-                        logging.critical(
-                            "Kernel does not track swap memory usage, cannot measure memory usage."
-                            " Please set swapaccount=1 on your kernel command line."
-                        )
-                    else:
-                        raise e
+            memory = cgroups.read_max_mem_usage()
+            if memory is not None:
+                result["memory"] = memory
 
         if BLKIO in cgroups:
-            blkio_bytes_file = "throttle.io_service_bytes"
-            if cgroups.has_value(BLKIO, blkio_bytes_file):
-                bytes_read = 0
-                bytes_written = 0
-                for blkio_line in cgroups.get_file_lines(BLKIO, blkio_bytes_file):
-                    try:
-                        dev_no, io_type, bytes_amount = blkio_line.split(" ")
-                        if io_type == "Read":
-                            bytes_read += int(bytes_amount)
-                        elif io_type == "Write":
-                            bytes_written += int(bytes_amount)
-                    except ValueError:
-                        pass  # There are irrelevant lines in this file with a different structure
-                result["blkio-read"] = bytes_read
-                result["blkio-write"] = bytes_written
+            io_stat = cgroups.read_io_stat()
+            if io_stat is not None:
+                result["blkio-read"], result["blkio-write"] = io_stat
 
         logging.debug(
             "Resource usage of run: walltime=%s, cputime=%s, cgroup-cputime=%s, memory=%s",
@@ -1157,6 +1227,138 @@ def _reduce_file_size_if_necessary(fileName, maxSize):
     util.shrink_text_file(fileName, maxSize, _LOG_SHRINK_MARKER)
 
 
+class _BoundedOutputCapture(object):
+    """
+    Capture the output of a tool through a pipe and write it to a log file
+    such that the log file never grows much beyond a given size.
+    The result is the same as writing the whole output to the log file
+    and calling _reduce_file_size_if_necessary() afterwards:
+    The start of the output is written to the file directly,
+    the end of the output is kept in memory until the tool has terminated.
+    """
+
+    _READ_SIZE = 1024 * 1024
+    _MAX_LINE_LENGTH = 1024 * 1024
+
+    def __init__(self, output_file, max_size):
+        """
+        @param output_file: the log file, which may contain a header already
+        @param max_size: the number of bytes to which the log file is reduced
+        """
+        output_file.flush()
+        self._file = open(os.dup(output_file.fileno()), "wb")
+        self._file_name = output_file.name
+        self._max_size = max_size
+        self._head_end = max_size // 2
+        self._tail_size = -(-max_size // 2)  # cf. util.shrink_text_file
+        self._file_size = os.fstat(self._file.fileno()).st_size
+        self._in_head = True
+        self._pending = collections.deque()  # output after the head
+        self._pending_size = 0
+        self.dropped_bytes = 0
+
+        read_fd, self.write_fd = os.pipe()
+        self._thread = threading.Thread(
+            target=self._capture, args=(read_fd,), name="BenchExec-output"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close_write_end(self):
+        """Close our copy of the write end of the pipe after the tool was started."""
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+            self.write_fd = None
+
+    def wait(self, timeout=None):
+        """
+        Wait until all output of the tool was written to the log file,
+        i.e., until all processes that could write to the pipe have terminated.
+        @return: whether the log file is complete
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _capture(self, read_fd):
+        try:
+            with open(read_fd, "rb", buffering=0) as pipe, self._file:
+                for data in iter(lambda: pipe.read(self._READ_SIZE), b""):
+                    if self._in_head:
+                        data = self._write_head(data)
+                    if data:
+                        self._add_pending(data)
+                self._write_tail()
+        except OSError as e:
+            logging.warning(
+                "Could not write output of tool to '%s': %s", self._file_name, e
+            )
+
+    def _write_head(self, data):
+        """Write the part of data that belongs to the start of the output,
+        which ends with the first line break after the first half of max_size.
+        @return the remaining part of data
+        """
+        # Huge lines would be kept completely by util.shrink_text_file(),
+        # but we cut them.
+        max_split = max(self._head_end + self._MAX_LINE_LENGTH - self._file_size, 0)
+        split = data.find(b"\n", max(self._head_end - self._file_size, 0), max_split)
+        if split >= 0:
+            split += 1
+            self._in_head = False
+        elif len(data) >= max_split:
+            split = max_split
+            self._in_head = False
+        else:
+            split = len(data)
+        self._file.write(data[:split])
+        self._file_size += split
+        return data[split:]
+
+    def _add_pending(self, data):
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._file_size + self._pending_size < self._max_size + 500:
+            return  # log file would not be reduced, so we need to keep everything
+        # Drop data from the middle, but keep enough for the end of the output.
+        while (
+            self._pending
+            and self._pending_size - len(self._pending[0]) >= self._tail_size
+        ):
+            dropped = self._pending.popleft()
+            self._pending_size -= len(dropped)
+            self.dropped_bytes += len(dropped)
+
+    def _write_tail(self):
+        tail = b"".join(self._pending)
+        self._pending.clear()
+        total_size = self._file_size + len(tail) + self.dropped_bytes
+        if self._in_head or total_size < self._max_size + 500:
+            self._file.write(tail)
+            logging.debug(
+                "Size of logfile '%s' is %s bytes, nothing to do.",
+                self._file_name,
+                total_size,
+            )
+            return
+
+        if len(tail) >= self._tail_size:
+            # Keep the end of the output, starting with a complete line.
+            # (If the end overlaps with the start of the output, we keep everything
+            # after the start, which is easier than what util.shrink_text_file does.)
+            tail = tail[len(tail) - self._tail_size :]
+            line_start = tail.find(b"\n") + 1 or len(tail)
+            tail = tail[line_start:]
+            self.dropped_bytes = total_size - self._file_size - len(tail)
+
+        logging.warning(
+            "Logfile '%s' is too big (size %s bytes). Removed %s bytes in the middle.",
+            self._file_name,
+            total_size,
+            self.dropped_bytes,
+        )
+        self._file.write(_LOG_SHRINK_MARKER.encode() + tail)
+
+
 def _get_debug_output_after_crash(output_filename, base_path):
     """
     Segmentation faults and some memory failures reference a file
@@ -1202,21 +1404,11 @@ def _get_debug_output_after_crash(output_filename, base_path):
         )
 
 
-def _try_join_cancelled_thread(thread):
-    """Join a thread, but if the thread doesn't terminate for some time, ignore it
-    instead of waiting infinitely."""
-    thread.join(10)
-    if thread.is_alive():
-        logging.warning(
-            "Thread %s did not terminate within grace period after cancellation",
-            thread.name,
-        )
-
-
-class _TimelimitThread(threading.Thread):
+class _TimeLimit(limitmonitor.Limit):
     """
-    Thread that periodically checks whether the given process has already
-    reached its timelimit. After this happens, the process is terminated.
+    Limit that checks whether the given process has already reached its timelimit
+    whenever this is possible given the remaining CPU and wall time.
+    After this happens, the process is terminated.
     """
 
     def __init__(
@@ -1229,9 +1421,7 @@ class _TimelimitThread(threading.Thread):
         cores,
         callbackFn=lambda reason: None,
     ):
-        super(_TimelimitThread, self).__init__()
-        self.name = "TimelimitThread-" + self.name
-        self.finished = threading.Event()
+        super(_TimeLimit, self).__init__(pid_to_kill, callbackFn)
 
         if hardtimelimit or softtimelimit:
             assert CPUACCT in cgroups
@@ -1250,64 +1440,56 @@ class _TimelimitThread(threading.Thread):
         self.timelimit = hardtimelimit or (60 * 60 * 24 * 365 * 100)
         self.softtimelimit = softtimelimit or (60 * 60 * 24 * 365 * 100)
         self.latestKillTime = time.monotonic() + walltimelimit
-        self.pid_to_kill = pid_to_kill
-        self.callback = callbackFn
 
-    def read_cputime(self):
-        while True:
-            try:
-                return self.cgroups.read_cputime()
-            except ValueError:
-                # Sometimes the kernel produces strange values with linebreaks in them
-                time.sleep(1)
-
-    def run(self):
-        while not self.finished.is_set():
-            usedCpuTime = self.read_cputime() if CPUACCT in self.cgroups else 0
-            remainingCpuTime = self.timelimit - usedCpuTime
-            remainingSoftCpuTime = self.softtimelimit - usedCpuTime
-            remainingWallTime = self.latestKillTime - time.monotonic()
+    def first_check_time(self):
+        return time.monotonic()
+
+    def _check(self):
+        now = time.monotonic()
+        try:
+            usedCpuTime = self.cgroups.read_cputime() if CPUACCT in self.cgroups else 0
+        except ValueError:
+            # Sometimes the kernel produces strange values with linebreaks in them
+            return now + 1
+        remainingCpuTime = self.timelimit - usedCpuTime
+        remainingSoftCpuTime = self.softtimelimit - usedCpuTime
+        remainingWallTime = self.latestKillTime - now
+        logging.debug(
+            "TimeLimit for process %s: used CPU time: %s, remaining CPU time: %s, "
+            "remaining soft CPU time: %s, remaining wall time: %s.",
+            self._pid_to_kill,
+            usedCpuTime,
+            remainingCpuTime,
+            remainingSoftCpuTime,
+            remainingWallTime,
+        )
+        if remainingCpuTime <= 0:
             logging.debug(
-                "TimelimitThread for process %s: used CPU time: %s, remaining CPU time: %s, "
-                "remaining soft CPU time: %s, remaining wall time: %s.",
-                self.pid_to_kill,
-                usedCpuTime,
-                remainingCpuTime,
-                remainingSoftCpuTime,
-                remainingWallTime,
+                "Killing process %s due to CPU time timeout.", self._pid_to_kill
             )
-            if remainingCpuTime <= 0:
-                self.callback("cputime")
-                logging.debug(
-                    "Killing process %s due to CPU time timeout.", self.pid_to_kill
-                )
-                util.kill_process(self.pid_to_kill)
-                self.finished.set()
-                return
-            if remainingWallTime <= 0:
-                self.callback("walltime")
-                logging.warning(
-                    "Killing process %s due to wall time timeout.", self.pid_to_kill
-                )
-                util.kill_process(self.pid_to_kill)
-                self.finished.set()
-                return
-
-            if remainingSoftCpuTime <= 0:
-                self.callback("cputime-soft")
-                # soft time limit violated, ask process to terminate
-                util.kill_process(self.pid_to_kill, signal.SIGTERM)
-                self.softtimelimit = self.timelimit
-
-            remainingTime = min(
-                remainingCpuTime / self.cpuCount,
-                remainingSoftCpuTime / self.cpuCount,
-                remainingWallTime,
+            self._kill("cputime")
+            return None
+        if remainingWallTime <= 0:
+            logging.warning(
+                "Killing process %s due to wall time timeout.", self._pid_to_kill
             )
-            self.finished.wait(remainingTime + 1)
-
-    def cancel(self):
-        self.finished.set()
+            self._kill("walltime")
+            return None
+
+        if remainingSoftCpuTime <= 0:
+            self._callback("cputime-soft")
+            # soft time limit violated, ask process to terminate
+            util.kill_process(self._pid_to_kill, signal.SIGTERM)
+            self.softtimelimit = self.timelimit
+
+        # The CPU time cannot be used up faster than with all cores,
+        # so the limits cannot be violated before this time.
+        remainingTime = min(
+            remainingCpuTime / self.cpuCount,
+            remainingSoftCpuTime / self.cpuCount,
+            remainingWallTime,
+        )
+        return now + max(remainingTime, _MIN_TIME_LIMIT_CHECK_INTERVAL)
 
 
 if __name__ == "__main__":
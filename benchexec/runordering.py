@@ -0,0 +1,154 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Ordering of runs based on measurements from previous executions of a benchmark,
+such that runs that are expected to take long are started first.
+This reduces the time until all runs of a benchmark are finished (the makespan)
+if several runs are executed in parallel.
+"""
+
+import bz2
+import collections
+import gzip
+import heapq
+import logging
+import os
+from xml.etree import ElementTree
+
+from benchexec import BenchExecException
+
+
+class RuntimePredictor(object):
+    """
+    Predict the CPU time of runs from the results of previous executions,
+    which are read from result XML files as produced by BenchExec.
+    If several results are available for a task, their mean is used.
+    """
+
+    def __init__(self, result_files, default_cputime=0):
+        """
+        @param result_files: list of result XML files (may be compressed)
+        @param default_cputime: prediction for runs without previous results
+        """
+        self.default_cputime = default_cputime
+        cputimes = collections.defaultdict(list)
+        for result_file in result_files:
+            result_elem = _parse_result_file(result_file)
+            run_set_name = _get_run_set_name_from_xml(result_elem)
+            for run_elem in result_elem.findall("run"):
+                cputime = _get_cputime_from_xml(run_elem)
+                if cputime is None:
+                    continue
+                task = _get_task_key_from_xml(run_elem, result_file)
+                cputimes[(run_set_name, task)].append(cputime)
+                cputimes[task].append(cputime)
+
+        self._predictions = {
+            key: sum(values) / len(values) for key, values in cputimes.items()
+        }
+        logging.debug(
+            "Loaded previous CPU times for %d tasks from %d result files.",
+            sum(1 for key in self._predictions if isinstance(key, str)),
+            len(result_files),
+        )
+
+    def predict(self, run):
+        """Return the expected CPU time of the given run in seconds."""
+        task = _get_task_key(run)
+        prediction = self._predictions.get((run.runSet.real_name or None, task))
+        if prediction is None:
+            prediction = self._predictions.get(task, self.default_cputime)
+        return prediction
+
+    def order_longest_first(self, runs):
+        """
+        Return the given runs sorted by their predicted CPU time, longest first.
+        Runs with equal predictions keep their original order.
+        """
+        return sorted(runs, key=self.predict, reverse=True)
+
+    def log_makespan(self, name, runs, num_of_workers, walltime):
+        """
+        Log the predicted makespan of the given runs for the original and the
+        longest-first order together with the actually used wall time.
+        """
+        cputimes = [self.predict(run) for run in runs]
+        logging.info(
+            "Predicted makespan of %s: %.1fs in longest-first order "
+            "(%.1fs in order of definition), actual wall time: %.1fs.",
+            name,
+            estimate_makespan(sorted(cputimes, reverse=True), num_of_workers),
+            estimate_makespan(cputimes, num_of_workers),
+            walltime,
+        )
+
+
+def _parse_result_file(result_file):
+    if result_file.endswith(".bz2"):
+        open_func = bz2.open
+    elif result_file.endswith(".gz"):
+        open_func = gzip.open
+    else:
+        open_func = open
+    try:
+        with open_func(result_file, "rb") as f:
+            return ElementTree.ElementTree().parse(f)
+    except (OSError, EOFError, ElementTree.ParseError) as e:
+        raise BenchExecException(f"Could not read result file {result_file}: {e}")
+
+
+def _get_run_set_name_from_xml(result_elem):
+    """
+    Return the name of the run set of a result XML like RunSet.real_name,
+    i.e., without the name of the block that is appended for single-block
+    run sets (cf. OutputHandler.runs_to_xml()).
+    """
+    name = result_elem.get("name")
+    block = result_elem.get("block")
+    if name is not None and block is not None:
+        if name == block:
+            return None
+        if name.endswith("." + block):
+            return name[: -len(block) - 1]
+    return name or None
+
+
+def _get_task_key(run):
+    if run.sourcefiles:
+        return os.path.abspath(run.identifier)
+    return run.identifier  # <withoutfile> tasks have an arbitrary name
+
+
+def _get_task_key_from_xml(run_elem, result_file):
+    name = run_elem.get("name")
+    if run_elem.get("files"):
+        # name is relative to the result file, cf. OutputHandler
+        return os.path.abspath(os.path.join(os.path.dirname(result_file), name))
+    return name
+
+
+def _get_cputime_from_xml(run_elem):
+    for column in run_elem.findall("column"):
+        if column.get("title") == "cputime":
+            try:
+                return float(column.get("value").rstrip("s"))
+            except ValueError:
+                return None
+    return None
+
+
+def estimate_makespan(cputimes, num_of_workers):
+    """
+    Estimate the time until the given runs are finished if they are started
+    in the given order by the given number of parallel workers.
+    @param cputimes: the predicted CPU times of the runs
+    """
+    worker_finish_times = [0] * num_of_workers
+    for cputime in cputimes:
+        heapq.heapreplace(worker_finish_times, worker_finish_times[0] + cputime)
+    return max(worker_finish_times)
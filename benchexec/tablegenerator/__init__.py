@@ -28,6 +28,7 @@ from xml.etree import ElementTree
 
 from benchexec import __version__, BenchExecException
 import benchexec.model as model
+import benchexec.outputhandler as outputhandler
 import benchexec.result as result
 import benchexec.tooladapter as tooladapter
 import benchexec.util
@@ -638,6 +639,12 @@ def parse_results_file(resultFile, run_set_id=None, ignore_errors=False):
             "you should use the option '-x' or '--xml'."
         )
 
+    if resultElem.get("error") == "incomplete" and resultFile.endswith(".xml"):
+        # results of finished runs of a running or interrupted execution
+        journal_file = resultFile[: -len("xml")] + "journal"
+        if os.path.isfile(journal_file):
+            outputhandler.merge_result_journal(resultElem, journal_file)
+
     if ignore_errors and "error" in resultElem.attrib:
         logging.warning(
             'Ignoring file "%s" because of error: %s',
@@ -687,10 +694,21 @@ def merge_tasks(runset_results):
     and add dummy elements to the results.
     It also ensures the same order of tasks.
     """
-    task_list = []
-    task_set = set()
+    merge_task_lists(runset_results, get_merged_task_list(runset_results))
+
+
+def get_merged_task_list(runset_results):
+    """
+    Return the list of all tasks of the given RunSetResult objects.
+    Tasks that are not yet known are placed directly after the previous task
+    of the same RunSetResult (or at the beginning if there is none).
+    The tasks are kept in a linked list (a dict that maps each task to its successor)
+    such that each insertion takes constant time.
+    """
+    head = object()  # sentinel that precedes the first task
+    successors = {head: None}
     for runset in runset_results:
-        index = -1
+        previous = head
         currentresult_taskset = set()
         for task in runset.get_tasks():
             if task in currentresult_taskset:
@@ -699,14 +717,17 @@ def merge_tasks(runset_results):
                 )
             else:
                 currentresult_taskset.add(task)
-                if task not in task_set:
-                    task_list.insert(index + 1, task)
-                    task_set.add(task)
-                    index += 1
-                else:
-                    index = task_list.index(task)
+                if task not in successors:
+                    successors[task] = successors[previous]
+                    successors[previous] = task
+                previous = task
 
-    merge_task_lists(runset_results, task_list)
+    task_list = []
+    task = successors[head]
+    while task is not None:
+        task_list.append(task)
+        task = successors[task]
+    return task_list
 
 
 def merge_task_lists(runset_results, tasks):
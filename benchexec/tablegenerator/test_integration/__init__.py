@@ -12,9 +12,12 @@ import subprocess
 import sys
 import tempfile
 import unittest
+from xml.etree import ElementTree
 
 import benchexec
+import benchexec.outputhandler
 import benchexec.util
+import benchexec.tablegenerator
 import benchexec.tablegenerator.util
 
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
@@ -717,6 +720,33 @@ class TableGeneratorIntegrationTests(unittest.TestCase):
             [result_file(benchmark_name + ".xml.bz2")], table_prefix=benchmark_name
         )
 
+    def test_incomplete_results_with_journal(self):
+        name = "test.2015-03-03_1613.results.predicateAnalysis"
+        result_xml = ElementTree.ElementTree().parse(result_file(name + ".xml"))
+        finished_run_xml = result_xml.find("run")
+
+        # result file of a running benchmark has no results of runs
+        incomplete_xml = ElementTree.Element("result", result_xml.attrib)
+        incomplete_xml.set("error", "incomplete")
+        for run_xml in result_xml.findall("run"):
+            ElementTree.SubElement(incomplete_xml, "run", run_xml.attrib)
+        xml_file = os.path.join(self.tmp, name + ".xml")
+        ElementTree.ElementTree(incomplete_xml).write(xml_file)
+        journal = benchexec.outputhandler._ResultJournal(
+            os.path.join(self.tmp, name + ".journal")
+        )
+        journal.add_run(finished_run_xml)
+        journal.close()
+
+        parsed_xml = benchexec.tablegenerator.parse_results_file(xml_file)
+        run_xmls = parsed_xml.findall("run")
+        self.assertEqual(len(run_xmls), len(incomplete_xml))
+        self.assertEqual(
+            [c.attrib for c in run_xmls[0].findall("column")],
+            [c.attrib for c in finished_run_xml.findall("column")],
+        )
+        self.assertEqual(run_xmls[1].findall("column"), [])
+
     def test_results_via_url(self):
         try:
             self.generate_tables_and_compare_content(
@@ -0,0 +1,109 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import logging
+import random
+import sys
+import unittest
+
+from benchexec import tablegenerator
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class MockRunSetResult(object):
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def get_tasks(self):
+        return self.tasks
+
+
+def merged_task_list_with_insertion(runset_results):
+    """The previous (quadratic) implementation, which defines the expected order."""
+    task_list = []
+    task_set = set()
+    for runset in runset_results:
+        index = -1
+        currentresult_taskset = set()
+        for task in runset.get_tasks():
+            if task not in currentresult_taskset:
+                currentresult_taskset.add(task)
+                if task not in task_set:
+                    task_list.insert(index + 1, task)
+                    task_set.add(task)
+                    index += 1
+                else:
+                    index = task_list.index(task)
+    return task_list
+
+
+class TestMergeTasks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def assertMergedTaskList(self, task_lists, expected=None):
+        runset_results = [MockRunSetResult(tasks) for tasks in task_lists]
+        if expected is None:
+            expected = merged_task_list_with_insertion(runset_results)
+        self.assertEqual(
+            tablegenerator.get_merged_task_list(runset_results), expected, task_lists
+        )
+
+    def test_single(self):
+        self.assertMergedTaskList([["A", "B", "C"]], ["A", "B", "C"])
+
+    def test_missing_tasks(self):
+        self.assertMergedTaskList([["A", "C"], ["A", "B"]], ["A", "B", "C"])
+        self.assertMergedTaskList([["B", "C"], ["A", "C"]], ["A", "B", "C"])
+        self.assertMergedTaskList([["A", "B"], ["C", "D"]], ["C", "D", "A", "B"])
+        self.assertMergedTaskList([[], ["A"]], ["A"])
+
+    def test_different_order(self):
+        self.assertMergedTaskList([["A", "B"], ["B", "C", "A", "D"]])
+        self.assertMergedTaskList([["A", "B", "C"], ["C", "B", "D", "A", "E"]])
+
+    def test_duplicate_tasks(self):
+        self.assertMergedTaskList([["A", "B", "A", "C"], ["B", "D", "B"]])
+
+    def test_random(self):
+        rnd = random.Random(0)
+        for _ in range(200):
+            tasks = [f"task{i}" for i in range(rnd.randint(0, 20))]
+            task_lists = [
+                rnd.sample(tasks, rnd.randint(0, len(tasks)))
+                for _ in range(rnd.randint(1, 5))
+            ]
+            self.assertMergedTaskList(task_lists)
+
+    def test_many_tasks(self):
+        # 20 result files with 20000 tasks each,
+        # each result file has 20 tasks that are missing in the others
+        task_lists = [
+            [
+                (f"task{i:05}", run_set) if i % 1000 == 0 else f"task{i:05}"
+                for i in range(20000)
+            ]
+            for run_set in range(20)
+        ]
+        runset_results = [MockRunSetResult(tasks) for tasks in task_lists]
+
+        expected = []
+        for i in range(20000):
+            if i % 1000 == 0:
+                # new tasks are inserted before the tasks of previous result files
+                expected.extend((f"task{i:05}", r) for r in reversed(range(20)))
+            else:
+                expected.append(f"task{i:05}")
+        self.assertEqual(tablegenerator.get_merged_task_list(runset_results), expected)
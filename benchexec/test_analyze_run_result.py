@@ -9,6 +9,7 @@ import logging
 import sys
 import unittest
 import types
+from unittest.mock import patch
 
 from benchexec.util import ProcessExitCode
 from benchexec.model import Run
@@ -36,6 +37,7 @@ class TestResult(unittest.TestCase):
         runSet.log_folder = "."
         runSet.result_files_folder = "."
         runSet.options = []
+        runSet.share_list = lambda values: values
         runSet.real_name = None
         runSet.propertytag = None
         runSet.benchmark = lambda: None
@@ -44,6 +46,7 @@ class TestResult(unittest.TestCase):
         runSet.benchmark.columns = []
         runSet.benchmark.name = "Test"
         runSet.benchmark.instance = "Test"
+        runSet.rlimits = {}
         runSet.benchmark.rlimits = {}
         runSet.benchmark.tool = BaseTool()
 
@@ -104,8 +107,8 @@ class TestResult(unittest.TestCase):
         self.assertEqual("TIMEOUT", run._analyze_result(normal_result, "", "cputime"))
 
         run = self.create_run(info_result=RESULT_ERROR)
-        run._is_timeout = lambda: True
-        self.assertEqual("TIMEOUT", run._analyze_result(normal_result, "", None))
+        with patch.object(Run, "_is_timeout", return_value=True):
+            self.assertEqual("TIMEOUT", run._analyze_result(normal_result, "", None))
 
     def test_out_of_memory(self):
         run = self.create_run(info_result=RESULT_UNKNOWN)
@@ -138,33 +141,37 @@ class TestResult(unittest.TestCase):
 
     def test_timeout_and_out_of_memory(self):
         run = self.create_run(info_result=RESULT_UNKNOWN)
-        run._is_timeout = lambda: True
-        self.assertEqual("TIMEOUT", run._analyze_result(normal_result, "", "memory"))
+        with patch.object(Run, "_is_timeout", return_value=True):
+            self.assertEqual(
+                "TIMEOUT", run._analyze_result(normal_result, "", "memory")
+            )
 
         run = self.create_run(info_result=RESULT_TRUE_PROP)
-        run._is_timeout = lambda: True
-        self.assertEqual(
-            f"TIMEOUT ({RESULT_TRUE_PROP})",
-            run._analyze_result(normal_result, "", "memory"),
-        )
+        with patch.object(Run, "_is_timeout", return_value=True):
+            self.assertEqual(
+                f"TIMEOUT ({RESULT_TRUE_PROP})",
+                run._analyze_result(normal_result, "", "memory"),
+            )
 
         run = self.create_run(info_result=RESULT_FALSE_REACH)
-        run._is_timeout = lambda: True
-        self.assertEqual(
-            f"TIMEOUT ({RESULT_FALSE_REACH})",
-            run._analyze_result(normal_result, "", "memory"),
-        )
+        with patch.object(Run, "_is_timeout", return_value=True):
+            self.assertEqual(
+                f"TIMEOUT ({RESULT_FALSE_REACH})",
+                run._analyze_result(normal_result, "", "memory"),
+            )
 
         run = self.create_run(info_result="SOME OTHER RESULT")
-        run._is_timeout = lambda: True
-        self.assertEqual(
-            "TIMEOUT (SOME OTHER RESULT)",
-            run._analyze_result(normal_result, "", "memory"),
-        )
+        with patch.object(Run, "_is_timeout", return_value=True):
+            self.assertEqual(
+                "TIMEOUT (SOME OTHER RESULT)",
+                run._analyze_result(normal_result, "", "memory"),
+            )
 
         run = self.create_run(info_result=RESULT_ERROR)
-        run._is_timeout = lambda: True
-        self.assertEqual("TIMEOUT", run._analyze_result(normal_result, "", "memory"))
+        with patch.object(Run, "_is_timeout", return_value=True):
+            self.assertEqual(
+                "TIMEOUT", run._analyze_result(normal_result, "", "memory")
+            )
 
     def test_returnsignal(self):
         def signal(sig):
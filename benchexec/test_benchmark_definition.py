@@ -6,12 +6,17 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import collections
+import logging
 import os
+import shutil
 import tempfile
+import time
 import unittest
 from unittest.mock import patch
 import yaml
 
+from benchexec import BenchExecException
+from benchexec import model
 from benchexec.model import Benchmark
 import benchexec.result
 import benchexec.util as util
@@ -47,7 +52,7 @@ ALL_TEST_TASKS = {
 }
 
 
-def mock_expand_filename_pattern(pattern, base_dir):
+def mock_expand_filename_pattern(pattern, base_dir, directory_index=None):
     if pattern == "*.yml":
         return list(ALL_TEST_TASKS.keys()) + ["other_task.yml"]
     return [pattern]
@@ -86,7 +91,11 @@ class TestBenchmarkDefinition(unittest.TestCase):
 
             # Because we mocked everything that accesses the file system,
             # we can parse the benchmark definition although task files do not exist.
-            return Benchmark(temp.name, DummyConfig, util.read_local_time())
+            benchmark = Benchmark(temp.name, DummyConfig, util.read_local_time())
+            # runs are created lazily, this also needs to happen with mocks
+            for run_set in benchmark.run_sets:
+                run_set.expand_runs()
+            return benchmark
 
     def check_task_filter(self, filter_attr, expected):
         # The following three benchmark definitions are equivalent, we check each.
@@ -157,3 +166,176 @@ class TestBenchmarkDefinition(unittest.TestCase):
         benchmark = self.parse_benchmark_definition(benchmark_definition)
         run_ids = [run.identifier for run in benchmark.run_sets[0].runs]
         self.assertListEqual(run_ids, ["false_sub_task.yml", "false_sub2_task.yml"])
+
+
+class TestTaskDefinitionCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_benchmark_definition_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.cache = model._TaskDefinitionCache()
+
+    def create_task_def(self, name, input_file="input.c"):
+        with open(os.path.join(self.base_dir, input_file), "w"):
+            pass
+        task_def_file = os.path.join(self.base_dir, name)
+        with open(task_def_file, "w") as f:
+            f.write(f"format_version: '2.0'\ninput_files: '{input_file}'\n")
+        return task_def_file
+
+    def test_get_cached(self):
+        task_def_file = self.create_task_def("task.yml")
+        task_def = self.cache.get(task_def_file)
+        self.assertEqual(task_def.content["input_files"], "input.c")
+        self.assertEqual(
+            task_def.files("input_files"), [os.path.join(self.base_dir, "input.c")]
+        )
+        self.assertEqual(task_def.files("required_files"), [])
+        self.assertIs(self.cache.get(task_def_file), task_def)
+
+    def test_get_modified(self):
+        task_def_file = self.create_task_def("task.yml")
+        task_def = self.cache.get(task_def_file)
+        self.create_task_def("task.yml", input_file="other_input.c")
+        task_def = self.cache.get(task_def_file)
+        self.assertEqual(
+            task_def.files("input_files"),
+            [os.path.join(self.base_dir, "other_input.c")],
+        )
+
+    def test_get_missing(self):
+        task_def_file = os.path.join(self.base_dir, "missing.yml")
+        self.assertRaises(BenchExecException, self.cache.get, task_def_file)
+
+    @patch("benchexec.model._PARALLEL_TASK_DEF_LOADING_THRESHOLD", new=2)
+    @patch("os.sched_getaffinity", new=lambda pid: {0, 1})
+    def test_preload(self):
+        task_def_files = [self.create_task_def(f"task{i}.yml") for i in range(10)]
+        invalid_task_def_file = os.path.join(self.base_dir, "invalid.yml")
+        with open(invalid_task_def_file, "w") as f:
+            f.write("format_version: '0.0'\n")
+
+        self.cache.preload(task_def_files + [invalid_task_def_file])
+        with patch("benchexec.model.load_task_definition_file") as load_mock:
+            for task_def_file in task_def_files:
+                task_def = self.cache.get(task_def_file)
+                self.assertEqual(task_def.content["input_files"], "input.c")
+            load_mock.assert_not_called()
+        self.assertRaises(BenchExecException, self.cache.get, invalid_task_def_file)
+
+
+class TestRunExpansion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        logging.disable(logging.NOTSET)  # need to make sure to get all messages
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_benchmark_definition_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        for i in range(3):
+            with open(os.path.join(self.base_dir, f"task{i}.yml"), "w") as f:
+                f.write(f"format_version: '2.0'\ninput_files: 'task{i}.yml'\n")
+        self.benchmark_file = os.path.join(self.base_dir, "benchmark.xml")
+        with open(self.benchmark_file, "w") as f:
+            f.write(
+                """
+                <benchmark tool="dummy">
+                  <columns><column title="steps">steps:</column></columns>
+                  <tasks name="tasks">
+                    <include>*.yml</include>
+                    <option name="--opt"/>
+                    <requiredfiles>benchmark.xml</requiredfiles>
+                  </tasks>
+                  <rundefinition name="a"/>
+                  <rundefinition name="b"/>
+                  <rundefinition name="c"/>
+                </benchmark>
+                """
+            )
+
+    def test_expand_runs_in_background(self):
+        benchmark = Benchmark(self.benchmark_file, DummyConfig, util.read_local_time())
+        self.assertEqual(
+            [run_set.name for run_set in benchmark.run_sets],
+            ["a.tasks", "b.tasks", "c.tasks"],
+        )
+        benchmark.expand_runs_in_background()
+        for run_set in benchmark.run_sets:
+            self.assertEqual(
+                [os.path.basename(run.identifier) for run in run_set.runs],
+                ["task0.yml", "task1.yml", "task2.yml"],
+            )
+            self.assertEqual([block.name for block in run_set.blocks], ["tasks"])
+
+    def check_error_in_background(self, broken_tasks, expected_error):
+        with open(self.benchmark_file, "w") as f:
+            f.write(
+                f"""
+                <benchmark tool="dummy">
+                  <rundefinition name="a">
+                    <tasks name="tasks"><include>*.yml</include></tasks>
+                  </rundefinition>
+                  <rundefinition name="b">
+                    <tasks name="broken">{broken_tasks}</tasks>
+                  </rundefinition>
+                </benchmark>
+                """
+            )
+        benchmark = Benchmark(self.benchmark_file, DummyConfig, util.read_local_time())
+        with self.assertLogs(level=logging.ERROR) as log:
+            benchmark.expand_runs_in_background()
+            self.assertEqual(len(benchmark.run_sets[0].runs), 3)
+            deadline = time.monotonic() + 10
+            with self.assertRaises(expected_error):
+                while time.monotonic() < deadline:
+                    benchmark.check_run_expansion()
+                    time.sleep(0.01)
+        self.assertIn("Creating runs of run set", log.output[0])
+        self.assertRaises(expected_error, lambda: benchmark.run_sets[1].runs)
+
+    def test_invalid_task_in_background(self):
+        os.mkdir(os.path.join(self.base_dir, "broken"))
+        open(os.path.join(self.base_dir, "broken", "task.yml"), "w").close()
+        self.check_error_in_background(
+            "<include>broken/task.yml</include>", BenchExecException
+        )
+
+    def test_exit_in_background(self):
+        open(os.path.join(self.base_dir, "empty.set"), "w").close()
+        self.check_error_in_background(
+            "<includesfile>empty.set</includesfile>", SystemExit
+        )
+
+    def test_runs_share_values(self):
+        benchmark = Benchmark(self.benchmark_file, DummyConfig, util.read_local_time())
+        run_set = benchmark.run_sets[0]
+        run0, run1, _ = run_set.runs
+        self.assertEqual(run0.options, ["--opt"])
+        self.assertIs(run0.options, run1.options)
+        self.assertEqual(run0.required_files, [self.benchmark_file])
+        self.assertIs(run0.required_files, run1.required_files)
+        self.assertEqual(run0.log_file, f"{run_set.log_folder}task0.yml.log")
+        self.assertEqual(
+            run0.result_files_folder,
+            os.path.join(run_set.result_files_folder, "task0.yml"),
+        )
+        self.assertFalse(hasattr(run0, "__dict__"))
+
+    def test_release_result_details(self):
+        benchmark = Benchmark(self.benchmark_file, DummyConfig, util.read_local_time())
+        run = benchmark.run_sets[0].runs[0]
+        self.assertEqual([column.title for column in run.columns], ["steps"])
+        self.assertIsNot(run.columns[0], benchmark.columns[0])
+        run.columns[0].value = "42"
+        run.values["cputime"] = 1.0
+        run.status = "true"
+
+        run.release_result_details()
+        self.assertEqual(run.values, {})
+        self.assertEqual(run.columns, [])
+        self.assertEqual(run.status, "true")
+        self.assertEqual(benchmark.columns[0].value, "")
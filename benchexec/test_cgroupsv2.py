@@ -0,0 +1,151 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchexec import cgroupsv2
+from benchexec.cgroups import BLKIO, CPUACCT, CPUSET, FREEZER, MEMORY
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestCgroupV2(unittest.TestCase):
+    """Test reading values from a fake cgroup directory."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory(prefix="BenchExec_test_")
+        self.parent = self.tmp_dir.name
+        self.path = os.path.join(self.parent, "run")
+        os.mkdir(self.path)
+        self.write_files(
+            self.parent, {"memory.max": "1000000000", "cgroup.controllers": ""}
+        )
+        self.write_files(
+            self.path,
+            {
+                "cgroup.controllers": "cpuset cpu io memory pids",
+                "cgroup.freeze": "0",
+                "cpu.stat": "usage_usec 1500000\nuser_usec 1000000\n",
+                "cpuset.cpus.effective": "0-2,5",
+                "cpuset.mems.effective": "0",
+                "io.stat": "8:0 rbytes=100 wbytes=200 rios=1 wios=2\n"
+                "8:16 rbytes=10 wbytes=20 rios=1 wios=2\n",
+                "memory.max": "max",
+                "memory.peak": "12345",
+            },
+        )
+        self.cgroup = cgroupsv2.CgroupV2(
+            self.path, cgroupsv2._read_available_subsystems(self.path)
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_files(self, path, files):
+        for name, content in files.items():
+            with open(os.path.join(path, name), "w") as f:
+                f.write(content)
+
+    def test_available_subsystems(self):
+        self.assertSetEqual(
+            set(self.cgroup.per_subsystem),
+            {BLKIO, CPUACCT, CPUSET, FREEZER, MEMORY, "cpu", "pids"},
+        )
+        self.assertSetEqual(
+            cgroupsv2._read_available_subsystems(self.parent), {CPUACCT}
+        )
+
+    def test_find_my_cgroups(self):
+        cgroup = cgroupsv2.find_my_cgroups(["0::/"])
+        self.assertEqual(cgroup.path, cgroupsv2._find_cgroup_mount())
+
+    def test_read_cputime(self):
+        self.assertEqual(self.cgroup.read_cputime(), 1.5)
+        self.assertDictEqual(self.cgroup.read_usage_per_cpu(), {})
+
+    def test_read_max_mem_usage(self):
+        self.assertEqual(self.cgroup.read_max_mem_usage(), 12345)
+
+    def test_read_io_stat(self):
+        self.assertTupleEqual(self.cgroup.read_io_stat(), (110, 220))
+
+    def test_read_allowed_resources(self):
+        self.assertListEqual(self.cgroup.read_allowed_cpus(), [0, 1, 2, 5])
+        self.assertListEqual(self.cgroup.read_allowed_memory_banks(), [0])
+
+    def test_read_memory_limits(self):
+        self.assertListEqual(self.cgroup.read_memory_limits(), [1000000000])
+
+    def test_get_all_tasks(self):
+        self.write_files(self.path, {"cgroup.procs": "1\n42\n"})
+        self.assertListEqual(list(self.cgroup.get_all_tasks()), [1, 42])
+
+    def test_remove_process_cgroups(self):
+        process_cgroup = os.path.join(self.parent, "benchexec_process_1")
+        os.mkdir(process_cgroup)
+        self.write_files(self.parent, {"cgroup.subtree_control": "cpuset memory\n"})
+        self.write_files(process_cgroup, {"cgroup.procs": "42\n"})
+        process_cgroups = [(self.parent, process_cgroup)]
+        with patch.object(cgroupsv2, "_process_cgroups", process_cgroups):
+            with patch("os.rmdir") as rmdir:
+                cgroupsv2._remove_process_cgroups()
+        self.assertListEqual(process_cgroups, [])
+        rmdir.assert_called_once_with(process_cgroup)
+        with open(os.path.join(self.parent, "cgroup.subtree_control")) as f:
+            self.assertEqual(f.read(), "-cpuset -memory")
+        with open(os.path.join(self.parent, "cgroup.procs")) as f:
+            self.assertEqual(f.read(), "42")
+
+    def test_find_my_cgroups_after_moving_process(self):
+        process_cgroups = [("/cgroup/a", "/cgroup/a/benchexec_process_1")]
+        with patch.object(cgroupsv2, "_process_cgroups", process_cgroups):
+            with patch.object(cgroupsv2, "_find_cgroup_mount", return_value="/cgroup"):
+                cgroup = cgroupsv2.find_my_cgroups(["0::/a/benchexec_process_1"])
+        self.assertEqual(cgroup.path, "/cgroup/a")
+
+    def test_enable_controllers_moves_process(self):
+        self.write_files(
+            self.path,
+            {"cgroup.procs": f"{os.getpid()}\n", "cgroup.subtree_control": ""},
+        )
+        process_cgroups = []
+        with patch.object(cgroupsv2, "_process_cgroups", process_cgroups):
+            with patch("atexit.register"):
+                self.cgroup._enable_controllers([MEMORY, CPUSET, CPUACCT])
+        self.assertEqual(len(process_cgroups), 1)
+        parent, process_cgroup = process_cgroups[0]
+        self.assertEqual(parent, self.path)
+        with open(os.path.join(process_cgroup, "cgroup.procs")) as f:
+            self.assertEqual(f.read(), str(os.getpid()))
+        with open(os.path.join(self.path, "cgroup.subtree_control")) as f:
+            self.assertEqual(f.read(), "+cpuset +memory")
+
+    def test_enable_controllers_with_other_processes(self):
+        self.write_files(
+            self.path,
+            {"cgroup.procs": f"{os.getpid()}\n1\n", "cgroup.subtree_control": ""},
+        )
+        with self.assertRaises(OSError):
+            self.cgroup._enable_controllers([MEMORY])
+        # only logged, require_subsystem() reports the problem later
+        self.cgroup.prepare_child_cgroups()
+
+    def test_wait_until_empty_timeout(self):
+        self.write_files(self.path, {"cgroup.events": "populated 1\nfrozen 0\n"})
+        with patch.object(cgroupsv2, "_KILL_TIMEOUT", 0.01):
+            with patch("logging.warning") as warning:
+                self.cgroup._wait_until_empty()
+        warning.assert_called_once()
@@ -11,7 +11,11 @@ import sys
 import unittest
 import math
 
-from benchexec.resources import _get_cpu_cores_per_run0
+from benchexec.resources import (
+    _get_cpu_core_classes_by_capacity,
+    _get_cpu_cores_per_run0,
+    ResourcePool,
+)
 
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
 
@@ -215,12 +219,15 @@ class TestCpuCoresPerRun_singleCPU_HT(TestCpuCoresPerRun_singleCPU):
     fourCore_assignment = [[0, 1, 4, 5], [2, 3, 6, 7]]
 
     def test_halfPhysicalCore(self):
-        # Cannot run if we have only half of one physical core
+        # Can use half of one physical core (with a warning), but not more
+        self.assertEqual(
+            [[0]], _get_cpu_cores_per_run0(1, 1, True, [0], {0: [0, 1]}, {0: [0, 1]})
+        )
         self.assertRaises(
             SystemExit,
             _get_cpu_cores_per_run0,
             1,
-            1,
+            2,
             True,
             [0],
             {0: [0, 1]},
@@ -697,5 +704,200 @@ class TestCpuCoresPerRun_quadCPU_no_ht(TestCpuCoresPerRun):
         self.assertInvalid(6, 3)
 
 
+class TestResourcePool(unittest.TestCase):
+    """Tests for a machine with two CPUs with 4 physical cores with 2 threads each."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+        logging.disable(logging.CRITICAL)
+
+    def create_pool(self, use_ht=True, with_memory=False):
+        cores_of_package = {
+            0: [0, 1, 2, 3, 8, 9, 10, 11],
+            1: [4, 5, 6, 7, 12, 13, 14, 15],
+        }
+        siblings_of_core = {core: [core % 8, core % 8 + 8] for core in range(16)}
+        memory_banks_of_core = None
+        memory_bank_sizes = None
+        if with_memory:
+            memory_banks_of_core = {core: [core % 8 // 4] for core in range(16)}
+            memory_bank_sizes = {0: 1000, 1: 1000}
+        return ResourcePool(
+            lrange(0, 16),
+            cores_of_package,
+            siblings_of_core,
+            use_ht,
+            memory_banks_of_core,
+            memory_bank_sizes,
+        )
+
+    def test_different_core_limits(self):
+        pool = self.create_pool()
+        big_run = pool.allocate(8)
+        self.assertEqual(big_run.cores, [0, 1, 2, 3, 8, 9, 10, 11])
+        small_runs = [pool.allocate(1) for _ in range(4)]
+        self.assertEqual([run.cores for run in small_runs], [[4], [5], [6], [7]])
+        self.assertIsNone(pool.allocate(1))
+
+        pool.release(big_run)
+        self.assertEqual(pool.allocate(1).cores, [0])
+        pool.release(small_runs[1])
+        self.assertEqual(pool.allocate(2).cores, [5, 13])
+
+    def test_no_shared_physical_cores(self):
+        pool = self.create_pool()
+        self.assertEqual(pool.allocate(3).cores, [0, 1, 8])
+        self.assertEqual(pool.allocate(1).cores, [2])
+        self.assertEqual(pool.allocate(3).cores, [4, 5, 12])
+        self.assertEqual(pool.allocate(2).cores, [3, 11])
+        self.assertEqual(pool.allocate(1).cores, [6])
+        self.assertEqual(pool.allocate(1).cores, [7])
+        self.assertIsNone(pool.allocate(1))
+
+    def test_best_fit(self):
+        pool = self.create_pool()
+        pool.allocate(2)
+        self.assertEqual(pool.allocate(6).cores, [1, 2, 3, 9, 10, 11])
+        self.assertEqual(pool.allocate(8).cores, [4, 5, 6, 7, 12, 13, 14, 15])
+
+    def test_several_units(self):
+        pool = self.create_pool()
+        self.assertTrue(pool.can_ever_allocate(16, None))
+        self.assertFalse(pool.can_ever_allocate(17, None))
+
+        small_run = pool.allocate(1)
+        self.assertIsNone(pool.allocate(10))
+        self.assertTrue(pool.can_ever_allocate(10, None))
+        pool.release(small_run)
+        self.assertEqual(pool.allocate(10).cores, lrange(0, 5) + lrange(8, 13))
+
+    def test_no_ht(self):
+        pool = self.create_pool(use_ht=False)
+        self.assertFalse(pool.can_ever_allocate(9, None))
+        self.assertEqual(pool.allocate(2).cores, [0, 1])
+        self.assertEqual(pool.allocate(4).cores, [4, 5, 6, 7])
+        self.assertEqual(pool.allocate(2).cores, [2, 3])
+        self.assertIsNone(pool.allocate(1))
+
+    def test_memory(self):
+        pool = self.create_pool(with_memory=True)
+        self.assertFalse(pool.can_ever_allocate(1, 1001))
+        self.assertTrue(pool.can_ever_allocate(16, 2000))
+
+        run1 = pool.allocate(1, 800)
+        self.assertEqual((run1.cores, run1.memory_banks), ([0], [0]))
+        run2 = pool.allocate(1, 800)
+        self.assertEqual((run2.cores, run2.memory_banks), ([4], [1]))
+        self.assertIsNone(pool.allocate(1, 800))
+        self.assertEqual(pool.allocate(1, 200).cores, [1])
+
+        pool.release(run1)
+        self.assertEqual(pool.allocate(1, 800).cores, [0])
+
+    def test_spread(self):
+        pool = self.create_pool()
+        self.assertEqual(pool.allocate(2, spread=True).cores, [0, 8])
+        self.assertEqual(pool.allocate(2, spread=True).cores, [4, 12])
+        self.assertEqual(pool.allocate(2, spread=True).cores, [1, 9])
+
+    def test_unusable_siblings(self):
+        siblings_of_core = {core: [core % 8, core % 8 + 8] for core in range(16)}
+        pool = ResourcePool(
+            lrange(0, 12), {0: lrange(0, 12)}, siblings_of_core, use_hyperthreading=True
+        )
+        self.assertEqual(pool.allocate(2).cores, [0, 8])
+        self.assertEqual(pool.allocate(2).cores, [1, 9])
+        self.assertEqual(pool.allocate(2).cores, [2, 10])
+        self.assertEqual(pool.allocate(2).cores, [3, 11])
+        self.assertEqual(pool.allocate(2).cores, [4, 5])
+        self.assertEqual(pool.allocate(1).cores, [6])
+
+
+class TestCpuCoresPerRunAsymmetric(unittest.TestCase):
+    """Tests for machines that are not supported by the default core assignment."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+        logging.disable(logging.CRITICAL)
+
+    def assertAssignment(self, expected, coreLimit, num_of_threads, *machine):
+        self.assertEqual(
+            expected, _get_cpu_cores_per_run0(coreLimit, num_of_threads, *machine)
+        )
+
+    def asymmetric_units(self):
+        return (
+            lrange(0, 8),
+            {0: lrange(0, 3), 1: lrange(3, 8)},
+            {core: [core] for core in range(8)},
+        )
+
+    def hybrid_cpu(self):
+        """One CPU with 4 performance cores with 2 threads and 8 efficiency cores."""
+        siblings_of_core = {
+            core: [core - core % 2, core - core % 2 + 1] for core in range(8)
+        }
+        siblings_of_core.update({core: [core] for core in range(8, 16)})
+        return lrange(0, 16), {0: lrange(0, 16)}, siblings_of_core
+
+    def test_asymmetric_units(self):
+        machine = self.asymmetric_units()
+        self.assertAssignment([[3], [4], [0], [5]], 1, 4, True, *machine)
+        self.assertAssignment([[3, 4], [0, 1], [5, 6]], 2, 3, True, *machine)
+        self.assertAssignment([[3, 4, 5, 6, 7]], 5, 1, True, *machine)
+        self.assertAssignment([lrange(0, 8)], 8, 1, True, *machine)
+        self.assertRaises(SystemExit, _get_cpu_cores_per_run0, 2, 4, True, *machine)
+
+    def test_hybrid_cpu(self):
+        self.assertAssignment(
+            [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9], [10, 11], [12, 13], [14, 15]],
+            2,
+            8,
+            True,
+            *self.hybrid_cpu(),
+        )
+        self.assertAssignment(
+            [[0], [2], [4], [6]] + [[core] for core in range(8, 16)],
+            1,
+            12,
+            True,
+            *self.hybrid_cpu(),
+        )
+        self.assertRaises(
+            SystemExit, _get_cpu_cores_per_run0, 1, 13, True, *self.hybrid_cpu()
+        )
+
+    def test_hybrid_cpu_no_ht(self):
+        self.assertAssignment(
+            [[0, 2], [4, 6], [8, 9], [10, 11], [12, 13], [14, 15]],
+            2,
+            6,
+            False,
+            *self.hybrid_cpu(),
+        )
+
+    def test_unusable_siblings(self):
+        siblings_of_core = {core: [core % 4, core % 4 + 4] for core in range(8)}
+        machine = (lrange(0, 6), {0: lrange(0, 6)}, siblings_of_core)
+        self.assertAssignment([[0], [1], [2], [3]], 1, 4, True, *machine)
+        self.assertAssignment([[0, 4], [1, 5], [2, 3]], 2, 3, True, *machine)
+
+
+class TestCpuCoreClasses(unittest.TestCase):
+    def test_by_capacity(self):
+        self.assertDictEqual(
+            _get_cpu_core_classes_by_capacity({0: 1024, 1: 1024, 2: 512, 3: 256}),
+            {"performance": [0, 1], "efficiency": [2, 3]},
+        )
+
+    def test_by_capacity_homogeneous(self):
+        self.assertDictEqual(_get_cpu_core_classes_by_capacity({0: 1024, 1: 1024}), {})
+        self.assertDictEqual(_get_cpu_core_classes_by_capacity({}), {})
+
+
 # prevent execution of base class as its own test
 del TestCpuCoresPerRun
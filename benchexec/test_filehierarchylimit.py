@@ -0,0 +1,99 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from benchexec import filehierarchylimit
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestIncrementalFileAccounting(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_filehierarchylimit_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+
+    def create_file(self, name, size):
+        with open(os.path.join(self.base_dir, name), "wb") as f:
+            f.write(b"x" * size)
+
+    def create_accounting(self):
+        try:
+            accounting = filehierarchylimit._IncrementalFileAccounting(self.base_dir)
+        except OSError as e:
+            self.skipTest(f"inotify not available: {e}")
+        self.addCleanup(accounting.close)
+        return accounting
+
+    def assertAccounting(self, accounting, files_count, files_size):
+        accounting.process_events()
+        self.assertTrue(accounting.active)
+        self.assertEqual(files_count, accounting.files_count, "wrong files count")
+        self.assertEqual(files_size, accounting.files_size, "wrong files size")
+
+    def test_existing_files(self):
+        os.makedirs(os.path.join(self.base_dir, "a/b"))
+        self.create_file("f", 10)
+        self.create_file("a/b/f", 20)
+        os.symlink("f", os.path.join(self.base_dir, "link"))
+        accounting = self.create_accounting()
+        self.assertAccounting(accounting, 2, 30)
+
+    def test_create_modify_delete_files(self):
+        accounting = self.create_accounting()
+        self.create_file("f", 10)
+        self.assertAccounting(accounting, 1, 10)
+        with open(os.path.join(self.base_dir, "f"), "ab") as f:
+            f.write(b"x" * 5)
+        self.assertAccounting(accounting, 1, 15)
+        os.rename(os.path.join(self.base_dir, "f"), os.path.join(self.base_dir, "g"))
+        self.assertAccounting(accounting, 1, 15)
+        os.remove(os.path.join(self.base_dir, "g"))
+        self.assertAccounting(accounting, 0, 0)
+
+    def test_directories(self):
+        accounting = self.create_accounting()
+        os.makedirs(os.path.join(self.base_dir, "a/b"))
+        self.create_file("a/b/f", 10)
+        self.assertAccounting(accounting, 1, 10)
+
+        os.rename(os.path.join(self.base_dir, "a"), os.path.join(self.base_dir, "c"))
+        self.create_file("c/b/g", 5)
+        self.assertAccounting(accounting, 2, 15)
+
+        outside_dir = tempfile.mkdtemp(prefix="BenchExec_test_filehierarchylimit_")
+        self.addCleanup(shutil.rmtree, outside_dir)
+        os.rename(os.path.join(self.base_dir, "c"), os.path.join(outside_dir, "c"))
+        self.assertAccounting(accounting, 0, 0)
+
+        os.rename(os.path.join(outside_dir, "c"), os.path.join(self.base_dir, "d"))
+        self.assertAccounting(accounting, 2, 15)
+        shutil.rmtree(os.path.join(self.base_dir, "d"))
+        self.assertAccounting(accounting, 0, 0)
+
+    def test_container_config_files_ignored(self):
+        os.makedirs(os.path.join(self.base_dir, "etc"))
+        accounting = self.create_accounting()
+        self.create_file("etc/passwd", 10)
+        self.create_file("etc/other", 5)
+        self.assertAccounting(accounting, 1, 5)
+
+    def test_stop(self):
+        accounting = self.create_accounting()
+        accounting.stop()
+        self.create_file("f", 10)
+        accounting.process_events()
+        self.assertFalse(accounting.active)
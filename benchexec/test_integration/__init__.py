@@ -297,6 +297,68 @@ class BenchExecIntegrationTests(unittest.TestCase):
             rundefs=["no options", "some options", "other options"],
         )
 
+    def test_pipeline_run_sets(self):
+        self.run_benchexec_and_compare_expected_files(
+            "--pipeline-run-sets",
+            "--numOfThreads",
+            "4",
+            test_name="benchmark-example-true",
+            test_file=os.path.join(base_dir, "doc", "benchmark-example-true.xml"),
+            rundefs=["no options", "some options", "other options"],
+        )
+
+    def test_resume(self):
+        test_file = os.path.join(base_dir, "doc", "benchmark-example-true.xml")
+        self.run_cmd(test_file, "--no-compress-results")
+        basename = os.path.join(
+            self.output_dir, "benchmark-example-true.2015-01-01_00-00-00."
+        )
+        previous_result_xml = basename + "results.no options.xml.previous"
+        shutil.copyfile(basename + "results.no options.xml", previous_result_xml)
+        for file in glob.glob(glob.escape(basename) + "results.other options.*"):
+            os.remove(file)
+
+        output = self.run_cmd(test_file, "--no-compress-results", "--resume")
+        self.assertEqual(output.count("Taking over results of"), 2)
+        self.assertSameRunResults(
+            basename + "results.no options.xml", previous_result_xml
+        )
+        self.assertTrue(os.path.exists(basename + "results.other options.xml"))
+
+    def test_resume_partially_finished_run_set(self):
+        test_file = os.path.join(base_dir, "doc", "benchmark-example-true.xml")
+        self.run_cmd(test_file, "--no-compress-results")
+        result_file = os.path.join(
+            self.output_dir,
+            "benchmark-example-true.2015-01-01_00-00-00.results.no options.xml",
+        )
+        # simulate an execution that was interrupted after the first run
+        result_xml = ElementTree.ElementTree().parse(result_file)
+        result_xml.set("error", "interrupted")
+        for run_xml in result_xml.findall("run")[1:]:
+            for column_xml in run_xml.findall("column"):
+                run_xml.remove(column_xml)
+        for column_xml in result_xml.findall("column"):
+            if column_xml.get("title") == "cputime":
+                column_xml.set("value", "1000s")
+            elif column_xml.get("title") == "walltime":
+                column_xml.set("value", "2000s")
+        ElementTree.ElementTree(result_xml).write(result_file)
+
+        output = self.run_cmd(test_file, "--no-compress-results", "--resume")
+        self.assertIn("Taking over results of 1 of", output)
+        result_xml = ElementTree.ElementTree().parse(result_file)
+        self.assertIsNone(result_xml.get("error"))
+        totals = {
+            column_xml.get("title"): float(column_xml.get("value").rstrip("s"))
+            for column_xml in result_xml.findall("column")
+            if column_xml.get("title") in ["cputime", "walltime"]
+        }
+        self.assertGreaterEqual(totals["cputime"], 1000)
+        self.assertLess(totals["cputime"], 1100)
+        self.assertGreaterEqual(totals["walltime"], 2000)
+        self.assertLess(totals["walltime"], 2100)
+
     def test_wildcard_rundefinition_3(self):
         self.run_benchexec_and_compare_expected_files(
             "--rundefinition",
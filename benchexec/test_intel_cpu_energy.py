@@ -0,0 +1,136 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+from benchexec import intel_cpu_energy
+from benchexec.intel_cpu_energy import RaplEnergyMeasurement
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+MAX_ENERGY_RANGE = 262143328850
+
+
+class TestRaplEnergyMeasurement(unittest.TestCase):
+    """Test reading RAPL counters from a fake sysfs."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory(prefix="BenchExec_test_")
+        self.powercap_dir = os.path.join(self.tmp_dir.name, "sys/class/powercap")
+        os.makedirs(self.powercap_dir)
+        self.create_zone("0", "package-0", 1_000_000)
+        self.create_zone("0:0", "core", 2_000_000)
+        self.create_zone("0:1", "dram", 3_000_000)
+        self.create_zone("1", "package-1", MAX_ENERGY_RANGE - 500_000)
+        os.mkdir(os.path.join(self.powercap_dir, "intel-rapl-mmio:0"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_zone(self, zone_id, name, energy):
+        zone_dir = os.path.join(self.powercap_dir, "intel-rapl:" + zone_id)
+        os.mkdir(zone_dir)
+        with open(os.path.join(zone_dir, "name"), "w") as f:
+            f.write(name + "\n")
+        with open(os.path.join(zone_dir, "max_energy_range_uj"), "w") as f:
+            f.write(f"{MAX_ENERGY_RANGE}\n")
+        self.set_energy(zone_id, energy)
+
+    def set_energy(self, zone_id, energy):
+        zone_dir = os.path.join(self.powercap_dir, "intel-rapl:" + zone_id)
+        with open(os.path.join(zone_dir, "energy_uj"), "w") as f:
+            f.write(f"{energy}\n")
+
+    def test_not_supported(self):
+        with tempfile.TemporaryDirectory(prefix="BenchExec_test_") as sysfs_root:
+            self.assertIsNone(RaplEnergyMeasurement.create_if_supported(sysfs_root))
+
+    def test_measurement(self):
+        measurement = RaplEnergyMeasurement.create_if_supported(self.tmp_dir.name)
+        self.assertIsNotNone(measurement)
+        self.assertIsNone(measurement.stop())
+
+        measurement.start()
+        self.assertTrue(measurement.is_running())
+        self.set_energy("0", 3_500_000)
+        self.set_energy("0:0", 3_000_000)
+        self.set_energy("1", 1_500_000)  # wrapped around
+        energy = measurement.stop()
+        self.assertFalse(measurement.is_running())
+
+        self.assertDictEqual(
+            energy,
+            {
+                0: {"package": Decimal("2.5"), "core": Decimal(1), "dram": Decimal(0)},
+                1: {"package": Decimal(2)},
+            },
+        )
+        self.assertDictEqual(
+            dict(intel_cpu_energy.format_energy_results(energy)),
+            {
+                "cpuenergy": Decimal("4.5"),
+                "cpuenergy-pkg0-package": Decimal("2.5"),
+                "cpuenergy-pkg0-core": Decimal(1),
+                "cpuenergy-pkg0-dram": Decimal(0),
+                "cpuenergy-pkg1-package": Decimal(2),
+            },
+        )
+
+    def test_repeated_wrap_around(self):
+        measurement = RaplEnergyMeasurement.create_if_supported(self.tmp_dir.name)
+        measurement.start()
+        for _ in range(3):
+            # each step consumes the whole counter range minus 1J
+            self.set_energy("0", 0)
+            measurement._sample()
+            self.set_energy("0", 1_000_000)
+            measurement._sample()
+        energy = measurement.stop()
+        self.assertEqual(
+            energy[0]["package"], Decimal(3 * MAX_ENERGY_RANGE) / 1_000_000
+        )
+
+    def test_unreadable_zone(self):
+        os.remove(os.path.join(self.powercap_dir, "intel-rapl:1", "energy_uj"))
+        measurement = RaplEnergyMeasurement.create_if_supported(self.tmp_dir.name)
+        measurement.start()
+        energy = measurement.stop()
+        self.assertSetEqual(set(energy.keys()), {0})
+
+    def test_multiple_dies(self):
+        self.create_zone("2", "package-1-die-1", 4_000_000)
+        self.create_zone("2:0", "core", 5_000_000)
+        self.create_zone("3", "package-0-die-1", 6_000_000)
+        measurement = RaplEnergyMeasurement.create_if_supported(self.tmp_dir.name)
+        measurement.start()
+        self.set_energy("0", 2_000_000)
+        self.set_energy("1", MAX_ENERGY_RANGE - 250_000)
+        self.set_energy("2", 5_000_000)
+        self.set_energy("2:0", 5_500_000)
+        self.set_energy("3", 6_500_000)
+        energy = measurement.stop()
+
+        self.assertDictEqual(
+            energy,
+            {
+                0: {"package": Decimal("1.5"), "core": Decimal(0), "dram": Decimal(0)},
+                1: {"package": Decimal("1.25"), "core": Decimal("0.5")},
+            },
+        )
+
+    def test_unknown_package_zone(self):
+        self.create_zone("2", "package-X", 0)
+        self.assertIsNone(RaplEnergyMeasurement.create_if_supported(self.tmp_dir.name))
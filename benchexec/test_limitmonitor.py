@@ -0,0 +1,118 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+from benchexec import limitmonitor
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class _CountingLimit(limitmonitor.Limit):
+    def __init__(self, checks, interval=0.01, duration=0):
+        super(_CountingLimit, self).__init__(pid_to_kill=None)
+        self.remaining_checks = checks
+        self.interval = interval
+        self.duration = duration
+        self.checked = threading.Semaphore(0)
+        self.checks = 0
+
+    def first_check_time(self):
+        return time.monotonic()
+
+    def _check(self):
+        time.sleep(self.duration)
+        self.checks += 1
+        self.checked.release()
+        self.remaining_checks -= 1
+        if self.remaining_checks <= 0:
+            return None
+        return time.monotonic() + self.interval
+
+
+class _PipeLimit(limitmonitor.Limit):
+    def __init__(self):
+        super(_PipeLimit, self).__init__(pid_to_kill=None)
+        self.read_fd, self.write_fd = os.pipe()
+        self.events = threading.Semaphore(0)
+
+    def fileno(self):
+        return self.read_fd
+
+    def _handle_event(self):
+        os.read(self.read_fd, 1)
+        self.events.release()
+        return None
+
+    def _close(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+
+class TestLimitMonitor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.monitor = limitmonitor.LimitMonitor()
+
+    def test_periodic_checks(self):
+        limit = _CountingLimit(checks=3)
+        self.monitor.register(limit)
+        for _ in range(3):
+            self.assertTrue(limit.checked.acquire(timeout=5))
+        self.assertFalse(limit.checked.acquire(timeout=0.1))
+        self.monitor.unregister(limit)
+        self.assertEqual(limit.checks, 3)
+
+    def test_unregister_stops_checks(self):
+        limit = _CountingLimit(checks=1000)
+        self.monitor.register(limit)
+        self.assertTrue(limit.checked.acquire(timeout=5))
+        self.monitor.unregister(limit)
+        checks = limit.checks
+        time.sleep(0.1)
+        self.assertEqual(limit.checks, checks)
+        self.monitor.unregister(limit)  # does not fail
+
+    def test_unregister_waits_for_check(self):
+        limit = _CountingLimit(checks=1, duration=0.2)
+        self.monitor.register(limit)
+        time.sleep(0.05)
+        self.monitor.unregister(limit)
+        self.assertEqual(limit.checks, 1)
+
+    def test_event(self):
+        limit = _PipeLimit()
+        self.monitor.register(limit)
+        self.assertFalse(limit.events.acquire(timeout=0.1))
+        os.write(limit.write_fd, b"x")
+        self.assertTrue(limit.events.acquire(timeout=5))
+        # consumed events are not reported again
+        self.assertFalse(limit.events.acquire(timeout=0.1))
+        os.write(limit.write_fd, b"x")
+        self.assertTrue(limit.events.acquire(timeout=5))
+        self.monitor.unregister(limit)
+
+    def test_slow_check_does_not_delay_others(self):
+        slow_limit = _CountingLimit(checks=1, duration=1)
+        slow_limit.slow_check = True
+        self.monitor.register(slow_limit)
+        fast_limit = _CountingLimit(checks=5)
+        self.monitor.register(fast_limit)
+        for _ in range(5):
+            self.assertTrue(fast_limit.checked.acquire(timeout=0.5))
+        self.assertEqual(slow_limit.checks, 0)
+        self.monitor.unregister(fast_limit)
+        self.monitor.unregister(slow_limit)
+        self.assertEqual(slow_limit.checks, 1)
@@ -0,0 +1,104 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+import threading
+import types
+import unittest
+
+from benchexec import localexecution
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class FakeResourcePool(object):
+    """A pool of a number of cores without memory limits."""
+
+    def __init__(self, cores):
+        self.free_cores = cores
+
+    def allocate(self, cores, memory):
+        if cores > self.free_cores:
+            return None
+        self.free_cores -= cores
+        return cores
+
+    def release(self, allocation):
+        self.free_cores += allocation
+
+
+def create_run(name, cores):
+    return types.SimpleNamespace(
+        name=name,
+        runSet=types.SimpleNamespace(
+            rlimits=types.SimpleNamespace(cpu_cores=cores, memory=None)
+        ),
+    )
+
+
+class TestResourceScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def create_scheduler(self, cores, runs, max_bypasses):
+        scheduler = localexecution._ResourceScheduler(
+            FakeResourcePool(cores), max_bypasses=max_bypasses
+        )
+        for run in runs:
+            scheduler.put(run)
+        return scheduler
+
+    def test_order_of_queue(self):
+        runs = [create_run(f"run{i}", 1) for i in range(3)]
+        scheduler = self.create_scheduler(4, runs, max_bypasses=2)
+        started = [scheduler.get()[0] for _ in runs]
+        self.assertListEqual(started, runs)
+
+    def test_backfilling(self):
+        large_run = create_run("large", 4)
+        small_runs = [create_run(f"small{i}", 1) for i in range(2)]
+        scheduler = self.create_scheduler(4, small_runs[:1], max_bypasses=2)
+        first_run, first_allocation = scheduler.get()
+        scheduler.put(large_run)
+        scheduler.put(small_runs[1])
+
+        # large run does not fit, so the small run is started before it
+        run, allocation = scheduler.get()
+        self.assertIs(run, small_runs[1])
+        scheduler.release(allocation)
+        scheduler.release(first_allocation)
+        self.assertIs(scheduler.get()[0], large_run)
+
+    def test_first_run_does_not_starve(self):
+        large_run = create_run("large", 2)
+        small_runs = [create_run(f"small{i}", 1) for i in range(10)]
+        scheduler = self.create_scheduler(2, small_runs[:1], max_bypasses=3)
+        _, allocation = scheduler.get()
+        scheduler.put(large_run)
+        for run in small_runs[1:]:
+            scheduler.put(run)
+
+        # one core is always occupied by a small run, so the large run does not fit
+        for expected_run in small_runs[1:4]:
+            run, next_allocation = scheduler.get()
+            self.assertIs(run, expected_run)
+            scheduler.release(allocation)
+            allocation = next_allocation
+
+        # after 3 bypasses, the free core is reserved for the large run
+        result = []
+        thread = threading.Thread(target=lambda: result.append(scheduler.get()))
+        thread.start()
+        thread.join(0.5)
+        self.assertTrue(thread.is_alive(), "small run was started before large run")
+        scheduler.release(allocation)
+        thread.join(10)
+        self.assertIs(result[0][0], large_run)
+        scheduler.release(result[0][1])
+        self.assertIs(scheduler.get()[0], small_runs[4])
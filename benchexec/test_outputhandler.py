@@ -0,0 +1,275 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import bz2
+import fcntl
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+import zipfile
+from xml.dom import minidom
+from xml.etree import ElementTree
+
+from benchexec import outputhandler
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+class TestLogArchive(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_outputhandler_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.zip_name = os.path.join(self.base_dir, "logfiles.zip")
+
+    def create_log_file(self, name, content):
+        file_name = os.path.join(self.base_dir, name)
+        with open(file_name, "wb") as f:
+            f.write(content)
+        return file_name
+
+    def add_logs(self, mode, logs):
+        archive = outputhandler._LogArchive(self.zip_name, mode, threads=2)
+        for name, content in logs.items():
+            log_file = self.create_log_file(name, content)
+            archive.add(log_file, "logfiles/" + name)
+        self.assertFalse(archive.close())
+        for name in logs:
+            self.assertFalse(os.path.exists(os.path.join(self.base_dir, name)))
+
+    def check_archive(self, logs):
+        with zipfile.ZipFile(self.zip_name) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertCountEqual(
+                zip_file.namelist(), ["logfiles/" + name for name in logs]
+            )
+            for name, content in logs.items():
+                info = zip_file.getinfo("logfiles/" + name)
+                self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(zip_file.read(info), content, name)
+
+    def test_add_logs(self):
+        logs = {
+            f"run{i}.log": (f"output of run {i}\n" * i * 1000).encode()
+            for i in range(20)
+        }
+        self.add_logs("w", logs)
+        self.check_archive(logs)
+
+    def test_append_to_archive(self):
+        logs = {"a.log": b"first\n", "b.log": b"second\n" * 1000}
+        self.add_logs("w", {"a.log": logs["a.log"]})
+        self.add_logs("a", {"b.log": logs["b.log"]})
+        self.check_archive(logs)
+
+    def test_large_and_empty_logs(self):
+        logs = {
+            "large.log": os.urandom(3 * 1024 * 1024),
+            "empty.log": b"",
+        }
+        self.add_logs("w", logs)
+        self.check_archive(logs)
+
+    def test_missing_log_file(self):
+        archive = outputhandler._LogArchive(self.zip_name, "w", threads=1)
+        archive.add(os.path.join(self.base_dir, "missing.log"), "missing.log")
+        archive.add(self.create_log_file("a.log", b"a\n"), "logfiles/a.log")
+        self.assertFalse(archive.close())
+        self.check_archive({"a.log": b"a\n"})
+
+    def test_empty_archive(self):
+        archive = outputhandler._LogArchive(self.zip_name, "w", threads=1)
+        self.assertTrue(archive.close())
+
+
+class TestResultJournal(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_outputhandler_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.xml_file_name = os.path.join(self.base_dir, "results.xml")
+        self.journal_file_name = os.path.join(self.base_dir, "results.journal")
+
+    def create_run_xml(self, name, status=None):
+        run_xml = ElementTree.Element("run", name=name)
+        if status:
+            ElementTree.SubElement(run_xml, "column", title="status", value=status)
+        return run_xml
+
+    def test_read_runs(self):
+        journal = outputhandler._ResultJournal(self.journal_file_name)
+        journal.add_run(self.create_run_xml("a", "true"))
+        journal.add_run(self.create_run_xml("b\nc", "false(unreach-call)"))
+        journal.close()
+        with open(self.journal_file_name, "a") as f:
+            f.write('"<run name=\\"incompl')  # interrupted while writing
+
+        runs = outputhandler._ResultJournal.read_runs(self.journal_file_name)
+        self.assertEqual([run.get("name") for run in runs], ["a", "b\nc"])
+        self.assertEqual(runs[1].find("column").get("value"), "false(unreach-call)")
+
+    def test_read_previous_results_with_journal(self):
+        result_xml = ElementTree.Element("result")
+        for name in ["a", "b", "c"]:
+            result_xml.append(self.create_run_xml(name))
+        ElementTree.ElementTree(result_xml).write(self.xml_file_name)
+
+        journal = outputhandler._ResultJournal(self.journal_file_name)
+        journal.add_run(self.create_run_xml("c", "true"))
+        journal.add_run(self.create_run_xml("a", "false"))
+        journal.close()
+
+        result_xml = outputhandler._read_previous_result_xml(
+            self.xml_file_name, self.journal_file_name
+        )
+        statuses = [
+            (run.get("name"), [c.get("value") for c in run.findall("column")])
+            for run in result_xml.findall("run")
+        ]
+        self.assertEqual(statuses, [("a", ["false"]), ("b", []), ("c", ["true"])])
+
+        journal.remove()
+        self.assertFalse(os.path.exists(self.journal_file_name))
+        result_xml = outputhandler._read_previous_result_xml(
+            self.xml_file_name, self.journal_file_name
+        )
+        self.assertEqual(len(result_xml.findall("run/column")), 0)
+
+    def write_incomplete_results_with_journal(self):
+        result_xml = ElementTree.Element("result", error="incomplete")
+        for name in ["a", "b"]:
+            result_xml.append(self.create_run_xml(name))
+        ElementTree.ElementTree(result_xml).write(self.xml_file_name)
+
+        journal = outputhandler._ResultJournal(self.journal_file_name)
+        journal.add_run(self.create_run_xml("b", "true"))
+        return journal
+
+    def test_journal_is_locked(self):
+        journal = self.write_incomplete_results_with_journal()
+        with open(self.journal_file_name) as f:
+            with self.assertRaises(BlockingIOError):
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            journal.close()
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_merge_result_journal(self):
+        self.write_incomplete_results_with_journal().close()
+        result_xml = ElementTree.ElementTree().parse(self.xml_file_name)
+        count = outputhandler.merge_result_journal(result_xml, self.journal_file_name)
+        self.assertEqual(count, 1)
+        self.assertEqual(len(result_xml.findall("run")), 2)
+        self.assertEqual(
+            result_xml.findall("run")[1].find("column").get("value"), "true"
+        )
+
+    def test_recover_interrupted_results(self):
+        self.xml_file_name = os.path.join(self.base_dir, "b.2015.results.xml")
+        self.journal_file_name = os.path.join(self.base_dir, "b.2015.results.journal")
+        journal = self.write_incomplete_results_with_journal()
+        output_handler = types.SimpleNamespace(
+            benchmark=types.SimpleNamespace(
+                name="b",
+                config=types.SimpleNamespace(output_path=self.base_dir + os.sep),
+            ),
+            _write_rough_result_xml_to_file=lambda xml, filename: (
+                outputhandler.OutputHandler._write_rough_result_xml_to_file(
+                    None, xml, filename
+                )
+            ),
+        )
+
+        # journal of a running execution is not touched
+        outputhandler.OutputHandler._recover_interrupted_results(output_handler)
+        self.assertTrue(os.path.exists(self.journal_file_name))
+
+        journal.close()
+        outputhandler.OutputHandler._recover_interrupted_results(output_handler)
+        self.assertFalse(os.path.exists(self.journal_file_name))
+        result_xml = ElementTree.ElementTree().parse(self.xml_file_name)
+        self.assertEqual(result_xml.get("error"), "incomplete")
+        self.assertEqual(len(result_xml.findall("run/column")), 1)
+
+
+class TestPrettyXmlWriter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_outputhandler_")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.file_name = os.path.join(self.base_dir, "results.xml")
+
+    def create_result_xml(self):
+        result_xml = ElementTree.Element("result", tool="tool", options="-a <b> & 'c'")
+        description = ElementTree.SubElement(result_xml, "description")
+        description.text = 'Description with "quotes" & <brackets>\nand lines'
+        columns = ElementTree.SubElement(result_xml, "columns")
+        ElementTree.SubElement(columns, "column", title="status")
+        ElementTree.SubElement(result_xml, "empty")
+        for i in range(3):
+            run = ElementTree.SubElement(result_xml, "run", name=f"task{i}.yml")
+            ElementTree.SubElement(run, "column", title="status", value="true")
+            ElementTree.SubElement(run, "column", title="cputime", value=f"{i}.5s")
+        ElementTree.SubElement(result_xml, "column", title="walltime", value="3s")
+        return result_xml
+
+    def write_with_minidom(self, xml):
+        """Produce the pretty XML as it was written in previous versions."""
+        file = io.StringIO()
+        reparsed = minidom.parseString(ElementTree.tostring(xml, encoding="unicode"))
+        doctype = minidom.DOMImplementation().createDocumentType(
+            "result",
+            outputhandler.RESULT_XML_PUBLIC_ID,
+            outputhandler.RESULT_XML_SYSTEM_ID,
+        )
+        reparsed.insertBefore(doctype, reparsed.documentElement)
+        reparsed.writexml(file, indent="", addindent="  ", newl="\n", encoding="utf-8")
+        return file.getvalue()
+
+    def write_with_writer(self, xml, compress):
+        writer = outputhandler._PrettyXmlWriter(self.file_name, xml, compress)
+        for elem in xml:
+            writer.write_element(elem)
+        writer.close()
+        return writer.file_name
+
+    def test_same_as_minidom(self):
+        xml = self.create_result_xml()
+        file_name = self.write_with_writer(xml, compress=False)
+        self.assertEqual(file_name, self.file_name)
+        self.assertFalse(os.path.exists(self.file_name + ".tmp"))
+        with open(file_name, encoding="utf-8") as file:
+            self.assertEqual(file.read(), self.write_with_minidom(xml))
+
+    def test_compressed(self):
+        xml = self.create_result_xml()
+        file_name = self.write_with_writer(xml, compress=True)
+        self.assertEqual(file_name, self.file_name + ".bz2")
+        with bz2.open(file_name, "rt", encoding="utf-8") as file:
+            self.assertEqual(file.read(), self.write_with_minidom(xml))
+
+    def test_attribute_with_newline(self):
+        xml = ElementTree.Element("result")
+        ElementTree.SubElement(xml, "run", name="a\nb\tc")
+        self.write_with_writer(xml, compress=False)
+        run = ElementTree.parse(self.file_name).getroot().find("run")
+        self.assertEqual(run.get("name"), "a\nb\tc")
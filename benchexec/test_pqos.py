@@ -11,10 +11,14 @@
 import json
 import copy
 import logging
+import os
+import sys
+import tempfile
+import time
 import unittest
 from subprocess import CalledProcessError
 from unittest.mock import patch, MagicMock
-from benchexec.pqos import Pqos
+from benchexec.pqos import Pqos, PqosMonitoringSession
 
 
 mock_pqos_wrapper_output = {
@@ -104,6 +108,28 @@ def mock_check_output_capability_error(args_list, **kwargs):
     mock_check_output_error(args_list, **kwargs)  # noqa: R503 always raises
 
 
+# A stand-in for the pqos_wrapper executable that supports capability checks
+# and monitoring, and logs its invocations to the file calls.log in its directory.
+fake_pqos_wrapper = """#!{python}
+import json, os, signal, sys, time
+base_dir = os.path.dirname(os.path.abspath(__file__))
+signal.signal(signal.SIGINT, lambda signum, frame: None)
+with open(os.path.join(base_dir, "calls.log"), "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+output = {output}
+if sys.argv[1] == "-c":
+    print(json.dumps({{"check_capability": output["check_capability"]}}))
+elif sys.argv[1] == "-m":
+    open(os.path.join(base_dir, "started"), "w").close()
+    signal.pause()
+    result = output["monitor_events"]
+    result["function_output"]["monitoring_data"][0]["cores"] = json.loads(
+        sys.argv[2]
+    )[0]
+    print(json.dumps({{"monitor_events": result}}))
+"""
+
+
 class MockPopen:
     """
     A Mock class for subprocess.Popen
@@ -366,3 +392,71 @@ class TestPqos(unittest.TestCase):
         """
         ret = Pqos.convert_core_list([[0, 1], [2, 3]])
         self.assertEqual(ret, "[[0,1],[2,3]]")
+
+
+class TestPqosMonitoringSession(unittest.TestCase):
+    """
+    Unit tests for PqosMonitoringSession with a fake pqos_wrapper executable
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory(prefix="BenchExec_test_")
+        executable = os.path.join(self.tmp_dir.name, "pqos_wrapper")
+        with open(executable, "w") as f:
+            f.write(
+                fake_pqos_wrapper.format(
+                    python=sys.executable, output=repr(mock_pqos_wrapper_output)
+                )
+            )
+        os.chmod(executable, 0o755)
+        with patch.dict(os.environ, {"PATH": self.tmp_dir.name}):
+            self.session = PqosMonitoringSession(Pqos())
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_calls(self):
+        with open(os.path.join(self.tmp_dir.name, "calls.log")) as f:
+            return f.read().splitlines()
+
+    def monitor_run(self, cores):
+        started_file = os.path.join(self.tmp_dir.name, "started")
+        mon_process = self.session.start(cores)
+        self.assertIsNotNone(mon_process)
+        # wait until the fake pqos_wrapper is ready to receive SIGINT
+        for _ in range(500):
+            if os.path.exists(started_file):
+                break
+            time.sleep(0.01)
+        os.remove(started_file)
+        return self.session.stop(mon_process)
+
+    def test_monitoring_data(self):
+        mon_data = self.monitor_run([0, 1])
+        self.assertDictEqual(
+            mon_data,
+            {
+                "ipc": 0.987,
+                "llc_misses": 10240,
+                "llc_avg": 25028,
+                "llc_max": 30000,
+                "mbm_local_avg": 25028,
+                "mbm_local_max": 30000,
+            },
+        )
+
+    def test_capability_checked_once(self):
+        self.monitor_run([0, 1])
+        self.monitor_run([2, 3])
+        self.assertListEqual(self.read_calls(), ["-c mon", "-m [[0,1]]", "-m [[2,3]]"])
+
+    @patch("benchexec.pqos.find_executable2", return_value=None)
+    def test_pqos_wrapper_missing(self, mock_find_executable):
+        session = PqosMonitoringSession(Pqos())
+        mon_process = session.start([0, 1])
+        self.assertIsNone(mon_process)
+        self.assertDictEqual(session.stop(mon_process), {})
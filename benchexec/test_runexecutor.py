@@ -6,6 +6,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import contextlib
+import gc
 import logging
 import os
 import re
@@ -15,7 +16,9 @@ import tempfile
 import threading
 import time
 import unittest
+import weakref
 import shutil
+from unittest.mock import patch
 
 from benchexec import container
 from benchexec import containerexecutor
@@ -23,6 +26,8 @@ from benchexec import filehierarchylimit
 from benchexec.runexecutor import RunExecutor
 from benchexec import runexecutor
 from benchexec import util
+from benchexec import test_zygote
+from benchexec import zygote
 
 sys.dont_write_bytecode = True  # prevent creation of .pyc files
 
@@ -150,6 +155,8 @@ class TestRunExecutor(unittest.TestCase):
             "blkio-read",
             "blkio-write",
             "starttime",
+            "overhead-setup",
+            "overhead-teardown",
         }
         expected_keys.update(additional_keys)
         for key in result.keys():
@@ -249,6 +256,8 @@ class TestRunExecutor(unittest.TestCase):
                 delta=trivial_run_grace_time,
                 msg="cputime of /bin/echo not as expected",
             )
+        self.assertIn("overhead-setup", result)
+        self.assertIn("overhead-teardown", result)
         self.check_result_keys(result)
 
     def test_wrong_command(self):
@@ -628,6 +637,36 @@ class TestRunExecutor(unittest.TestCase):
         self.assertIn(self.REDUCE_WARNING_MSG, new_content)
         self.assertTrue(new_content.startswith(line))
 
+    def test_output_size_limit(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (result, output) = self.execute_run(
+            "/bin/sh",
+            "-c",
+            "i=0; while [ $i -lt 100000 ]; do i=$((i+1)); echo $i; done",
+            maxLogfileSize=1000,
+        )
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        self.assertIn(self.REDUCE_WARNING_MSG, output)
+        self.assertEqual(output[-1], "100000", "log file misses end of output")
+        self.assertLess(len("\n".join(output)), 1000 + self.REDUCE_OVERHEAD)
+
+    def test_append_crash_dump_info_with_output_size_limit(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (result, output) = self.execute_run(
+            "/bin/sh",
+            "-c",
+            'echo "# An error report file with more information is saved as:";'
+            'echo "# $(pwd)/hs_err_pid_1234.txt";'
+            "echo TEST_TOKEN > hs_err_pid_1234.txt;"
+            "exit 2",
+            maxLogfileSize=1000,
+        )
+        self.assertEqual(
+            output[-1], "TEST_TOKEN", "log file misses content from crash dump file"
+        )
+
     def test_append_crash_dump_info(self):
         if not os.path.exists("/bin/sh"):
             self.skipTest("missing /bin/sh")
@@ -673,6 +712,7 @@ class TestRunExecutor(unittest.TestCase):
         self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
         home_dir = output[-1].split(" ")[0]
         temp_dir = output[-1].split(" ")[1]
+        runexecutor._wait_for_cleanup()
         self.assertFalse(
             os.path.exists(home_dir),
             f"temporary home directory {home_dir} was not cleaned up",
@@ -682,6 +722,67 @@ class TestRunExecutor(unittest.TestCase):
             f"temporary temp directory {temp_dir} was not cleaned up",
         )
 
+    def test_measurements_of_reused_cgroups(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (result, _) = self.execute_run(
+            "/bin/sh", "-c", "i=0; while [ $i -lt 200000 ]; do i=$((i+1)); done"
+        )
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        runexecutor._wait_for_cleanup()
+        # measurements of the second run must not contain those of the first
+        (result, _) = self.execute_run("/bin/echo", "TEST_TOKEN")
+        self.check_exitcode(result, 0, "exit code of /bin/echo is not zero")
+        if "cputime" in result:  # not present without cpuacct cgroup
+            self.assertAlmostEqual(
+                result["cputime"],
+                trivial_run_grace_time,
+                delta=trivial_run_grace_time,
+                msg="cputime of /bin/echo not as expected",
+            )
+
+    def test_pending_cleanups_are_bounded(self):
+        if not os.path.exists("/bin/echo"):
+            self.skipTest("missing /bin/echo")
+        runexecutor._wait_for_cleanup()
+        cleanup_started = threading.Event()
+        continue_cleanup = threading.Event()
+
+        def blocking_cleanup():
+            cleanup_started.set()
+            continue_cleanup.wait()
+
+        # block the cleanup thread such that cleanups of the following runs stay
+        runexecutor._cleanup_executor.submit(blocking_cleanup)
+        cleanup_started.wait()
+        try:
+            for _ in range(runexecutor._MAX_PENDING_CLEANUPS):
+                (result, _) = self.execute_run("/bin/echo", "TEST_TOKEN")
+                self.check_exitcode(result, 0, "exit code of /bin/echo is not zero")
+
+            run_finished = threading.Event()
+
+            def next_run():
+                self.execute_run("/bin/echo", "TEST_TOKEN")
+                run_finished.set()
+
+            thread = threading.Thread(target=next_run)
+            thread.start()
+            self.assertFalse(
+                run_finished.wait(1), "run did not wait for pending cleanups"
+            )
+        finally:
+            continue_cleanup.set()
+        thread.join(10)
+        self.assertTrue(run_finished.is_set())
+
+    def test_executor_registered_for_cleanup_on_exit(self):
+        self.assertIn(self.runexecutor, runexecutor._executors)
+        executor_ref = weakref.ref(self.runexecutor)
+        del self.runexecutor
+        gc.collect()
+        self.assertIsNone(executor_ref(), "RunExecutor is kept alive")
+
     def test_home_is_writable(self):
         if not os.path.exists("/bin/sh"):
             self.skipTest("missing /bin/sh")
@@ -813,6 +914,105 @@ class TestRunExecutorWithContainer(TestRunExecutor):
             use_namespaces=True, dir_modes=dir_modes, *args, **kwargs
         )
 
+    def test_zygote_is_reused(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        zygote = self.runexecutor._zygote
+        self.assertIsNotNone(zygote)
+
+        (result, _) = self.execute_run("/bin/sh", "-c", "exit 1")
+        self.check_exitcode(result, 256, "exit code of /bin/sh is not one")
+        self.assertIs(self.runexecutor._zygote, zygote)
+
+    def test_zygote_is_replaced_after_termination(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        old_zygote = self.runexecutor._zygote
+        test_zygote.kill_zygote(old_zygote)
+
+        # this run falls back to starting the child directly
+        (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        self.assertIsNone(self.runexecutor._zygote)
+
+        (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        self.assertIsNotNone(self.runexecutor._zygote)
+        self.assertIsNot(self.runexecutor._zygote, old_zygote)
+
+    def test_switch_interval_workaround_only_without_zygote(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        with patch.object(
+            containerexecutor, "NATIVE_CLONE_CALLBACK_SUPPORTED", False
+        ), patch.object(
+            containerexecutor, "_switch_interval_workaround_enabled", False
+        ), patch(
+            "sys.setswitchinterval"
+        ) as setswitchinterval:
+            (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+            self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+            setswitchinterval.assert_not_called()
+
+            self.setUp(use_zygote=False)
+            (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+            self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+            setswitchinterval.assert_called_once_with(1000)
+
+    def test_zygote_keeps_mount_plan(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        with patch.object(
+            zygote, "Zygote", side_effect=zygote.Zygote
+        ) as zygote_constructor:
+            (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        zygote_constructor.assert_called_once()
+        (_unused_clone_fn, keep_files) = zygote_constructor.call_args[0]
+        mount_plan = self.runexecutor._mount_plan
+        self.assertIsNotNone(mount_plan)
+        self.assertIn(mount_plan.fileno(), [f.fileno() for f in keep_files])
+
+        (result, _) = self.execute_run("/bin/sh", "-c", "exit 0")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+
+    def test_mount_plan_is_reused(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        # without zygote, the mount plan is kept in this process
+        self.setUp(use_zygote=False)
+        (result, _) = self.execute_run("/bin/sh", "-c", "true")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        mount_plan = self.runexecutor._mount_plan
+        self.assertIsNotNone(mount_plan)
+        self.assertFalse(mount_plan.is_outdated())
+
+        (result, _) = self.execute_run("/bin/sh", "-c", "true")
+        self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+        self.assertIs(self.runexecutor._mount_plan, mount_plan)
+
+    def test_network_namespace_pool(self):
+        if not os.path.exists("/bin/sh"):
+            self.skipTest("missing /bin/sh")
+        if container.get_network_namespace_pool() is None:
+            self.skipTest("network namespaces cannot be created in advance")
+        # binding to localhost works only if loopback interface is up
+        cmd = (
+            "readlink /proc/self/ns/net && python3 -c "
+            "\"import socket; socket.socket().bind(('127.0.0.1', 0))\""
+        )
+        network_namespaces = set()
+        for _ in range(3):
+            (result, output) = self.execute_run("/bin/sh", "-c", cmd)
+            self.check_exitcode(result, 0, "exit code of /bin/sh is not zero")
+            network_namespaces.add(output[-1])
+        network_namespaces.add(os.readlink("/proc/self/ns/net"))
+        self.assertEqual(len(network_namespaces), 4)
+
     def get_runexec_cmdline(self, *args, **kwargs):
         return [
             "python3",
@@ -979,6 +1179,16 @@ class TestRunExecutorWithContainer(TestRunExecutor):
             ],
         )
 
+    def test_result_file_hidden(self):
+        self.check_result_files(
+            "mkdir -p .TEST_DIR TEST_DIR; "
+            "echo TEST_TOKEN > .TEST_FILE; "
+            "echo TEST_TOKEN > .TEST_DIR/TEST_FILE; "
+            "echo TEST_TOKEN > TEST_DIR/.TEST_FILE; ",
+            ["*", "**/*FILE", ".TEST_DIR"],
+            ["TEST_DIR/.TEST_FILE", ".TEST_DIR/TEST_FILE"],
+        )
+
     def test_result_file_log_limit(self):
         file_count = containerexecutor._MAX_RESULT_FILE_LOG_COUNT + 10
         with self.assertLogs(level=logging.DEBUG) as log:
@@ -1103,6 +1313,63 @@ class _StopRunThread(threading.Thread):
 class TestRunExecutorUnits(unittest.TestCase):
     """unit tests for parts of RunExecutor"""
 
+    def check_bounded_output_capture(self, header, content, max_size):
+        """Check that _BoundedOutputCapture produces the same log file
+        as writing the complete output and reducing the file afterwards."""
+        with tempfile.NamedTemporaryFile(mode="w+b") as expected_file:
+            expected_file.write(header + content)
+            expected_file.flush()
+            runexecutor._reduce_file_size_if_necessary(expected_file.name, max_size)
+            expected_file.seek(0)
+            expected = expected_file.read()
+
+        with tempfile.NamedTemporaryFile(mode="w+b") as output_file:
+            output_file.write(header)
+            capture = runexecutor._BoundedOutputCapture(output_file, max_size)
+            with open(capture.write_fd, "wb", closefd=False) as pipe:
+                # write in several chunks
+                for i in range(0, len(content), 1000):
+                    pipe.write(content[i : i + 1000])
+            capture.close_write_end()
+            self.assertTrue(capture.wait(10))
+            output_file.seek(0)
+            self.assertEqual(output_file.read(), expected)
+        return capture
+
+    def test_bounded_output_capture_small(self):
+        self.check_bounded_output_capture(b"header\n", b"line\n" * 10, 1000)
+        self.check_bounded_output_capture(b"", b"line\n" * 250, 1000)
+
+    def test_bounded_output_capture(self):
+        lines = b"".join(b"line %d\n" % i for i in range(10000))
+        capture = self.check_bounded_output_capture(b"header\n" * 10, lines, 1000)
+        self.assertGreater(capture.dropped_bytes, len(lines) - 1000)
+        self.check_bounded_output_capture(b"", lines, 10000)
+        self.check_bounded_output_capture(b"", lines, 0)
+        self.check_bounded_output_capture(b"", lines, 1)
+
+    def test_bounded_output_capture_long_lines(self):
+        self.check_bounded_output_capture(b"", b"x" * 999 + b"\n" + b"y" * 999, 1000)
+
+    def test_bounded_output_capture_huge_line(self):
+        # In contrast to _reduce_file_size_if_necessary(), huge lines are cut.
+        max_line_length = runexecutor._BoundedOutputCapture._MAX_LINE_LENGTH
+        content = b"x" * 100 + b"\n" + b"y" * (2 * max_line_length) + b"\nz\n"
+        with tempfile.NamedTemporaryFile(mode="w+b") as output_file:
+            capture = runexecutor._BoundedOutputCapture(output_file, 1000)
+            with open(capture.write_fd, "wb", closefd=False) as pipe:
+                pipe.write(content)
+            capture.close_write_end()
+            self.assertTrue(capture.wait(10))
+            output_file.seek(0)
+            output = output_file.read()
+        self.assertLessEqual(len(output), 500 + max_line_length + 100)
+        self.assertTrue(output.startswith(b"x" * 100 + b"\nyyy"))
+        self.assertTrue(output.endswith(b"\nz\n"))
+        self.assertEqual(
+            capture.dropped_bytes, len(content) - (500 + max_line_length) - 2
+        )
+
     def test_get_debug_output_with_error_report_and_invalid_utf8(self):
         invalid_utf8 = b"\xFF"
         with tempfile.NamedTemporaryFile(mode="w+b", delete=False) as report_file:
@@ -1126,3 +1393,22 @@ More output
 
                 self.assertFalse(os.path.exists(report_file.name))
                 self.assertEqual(output.read(), output_content + report_content)
+
+    def test_transfer_output_files_outside_of_working_directory(self):
+        base_dir = tempfile.mkdtemp(prefix="BenchExec_test_runexecutor_")
+        self.addCleanup(shutil.rmtree, base_dir)
+        tool_output_dir = os.path.join(base_dir, "tool")
+        output_dir = os.path.join(base_dir, "output", "result")
+        os.makedirs(os.path.join(tool_output_dir, "home", "w"))
+        os.makedirs(output_dir)
+        for file in ["home/secret", "home/w/file"]:
+            with open(os.path.join(tool_output_dir, file), "w") as f:
+                f.write("TEST_TOKEN")
+
+        with self.assertLogs(level=logging.WARNING):
+            containerexecutor.ContainerExecutor._transfer_output_files(
+                None, tool_output_dir, "/home/w", output_dir, ["../secret", "file"]
+            )
+        self.assertEqual(os.listdir(output_dir), ["file"])
+        self.assertEqual(os.listdir(os.path.dirname(output_dir)), ["result"])
+        self.assertTrue(os.path.exists(os.path.join(tool_output_dir, "home/secret")))
@@ -0,0 +1,147 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import bz2
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+from benchexec import runordering
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+RESULT_XML = """<?xml version="1.0" ?>
+<result benchmarkname="test" name="rundef" tool="DummyTool">
+  <run files="[tasks/a.c]" name="tasks/a.c">
+    <column title="cputime" value="10.5s"/>
+    <column title="status" value="true"/>
+  </run>
+  <run files="[tasks/b.c]" name="tasks/b.c">
+    <column title="cputime" value="100.0s"/>
+    <column title="status" value="TIMEOUT"/>
+  </run>
+  <run name="dummy task">
+    <column title="cputime" value="1.0s"/>
+  </run>
+  <run files="[tasks/c.c]" name="tasks/c.c">
+    <column title="status" value="ERROR"/>
+  </run>
+</result>
+"""
+
+
+def create_run(identifier, run_set_name="rundef", with_file=True):
+    return types.SimpleNamespace(
+        identifier=identifier,
+        sourcefiles=[identifier] if with_file else [],
+        runSet=types.SimpleNamespace(real_name=run_set_name),
+    )
+
+
+class TestRunOrdering(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory(prefix="BenchExec_test_")
+        self.result_file = os.path.join(self.tmp_dir.name, "test.results.xml")
+        with open(self.result_file, "w") as f:
+            f.write(RESULT_XML)
+        self.predictor = runordering.RuntimePredictor(
+            [self.result_file], default_cputime=50
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def task(self, name):
+        return os.path.join(self.tmp_dir.name, "tasks", name)
+
+    def test_predict(self):
+        self.assertEqual(self.predictor.predict(create_run(self.task("a.c"))), 10.5)
+        self.assertEqual(self.predictor.predict(create_run(self.task("b.c"))), 100)
+        self.assertEqual(
+            self.predictor.predict(create_run("dummy task", with_file=False)), 1
+        )
+
+    def test_predict_default(self):
+        self.assertEqual(self.predictor.predict(create_run(self.task("c.c"))), 50)
+        self.assertEqual(self.predictor.predict(create_run(self.task("d.c"))), 50)
+
+    def test_predict_other_run_set(self):
+        run = create_run(self.task("a.c"), run_set_name="other")
+        self.assertEqual(self.predictor.predict(run), 10.5)
+
+    def test_predict_per_run_set(self):
+        other_result_file = os.path.join(self.tmp_dir.name, "test.other.xml")
+        with open(other_result_file, "w") as f:
+            f.write(
+                RESULT_XML.replace('name="rundef"', 'name="other"').replace(
+                    "10.5s", "20.5s"
+                )
+            )
+        predictor = runordering.RuntimePredictor([self.result_file, other_result_file])
+        self.assertEqual(predictor.predict(create_run(self.task("a.c"))), 10.5)
+        run = create_run(self.task("a.c"), run_set_name="other")
+        self.assertEqual(predictor.predict(run), 20.5)
+        run = create_run(self.task("a.c"), run_set_name="unknown")
+        self.assertEqual(predictor.predict(run), 15.5)
+
+    def test_predict_single_block_run_set(self):
+        # result files of run sets with a single block have the name of the block
+        block_result_file = os.path.join(self.tmp_dir.name, "test.block.xml")
+        with open(block_result_file, "w") as f:
+            f.write(
+                RESULT_XML.replace(
+                    'name="rundef"', 'block="tasks" name="rundef.tasks"'
+                ).replace("10.5s", "20.5s")
+            )
+        unnamed_result_file = os.path.join(self.tmp_dir.name, "test.unnamed.xml")
+        with open(unnamed_result_file, "w") as f:
+            f.write(RESULT_XML.replace('name="rundef"', 'block="tasks" name="tasks"'))
+        predictor = runordering.RuntimePredictor(
+            [self.result_file, block_result_file, unnamed_result_file]
+        )
+        self.assertEqual(predictor.predict(create_run(self.task("a.c"))), 15.5)
+        run = create_run(self.task("a.c"), run_set_name=None)
+        self.assertEqual(predictor.predict(run), 10.5)
+
+    def test_predict_mean_of_several_results(self):
+        second_result_file = os.path.join(self.tmp_dir.name, "test2.results.xml")
+        with open(second_result_file, "w") as f:
+            f.write(RESULT_XML.replace("10.5s", "20.5s"))
+        predictor = runordering.RuntimePredictor([self.result_file, second_result_file])
+        self.assertEqual(predictor.predict(create_run(self.task("a.c"))), 15.5)
+
+    def test_order_longest_first(self):
+        runs = [
+            create_run(self.task("a.c")),
+            create_run("dummy task", with_file=False),
+            create_run(self.task("c.c")),
+            create_run(self.task("b.c")),
+            create_run(self.task("d.c")),
+        ]
+        ordered = self.predictor.order_longest_first(runs)
+        self.assertListEqual(ordered, [runs[3], runs[2], runs[4], runs[0], runs[1]])
+
+    def test_estimate_makespan(self):
+        self.assertEqual(runordering.estimate_makespan([], 2), 0)
+        self.assertEqual(runordering.estimate_makespan([5], 2), 5)
+        self.assertEqual(runordering.estimate_makespan([1, 1, 1, 1, 4], 2), 6)
+        self.assertEqual(runordering.estimate_makespan([4, 1, 1, 1, 1], 2), 4)
+        self.assertEqual(runordering.estimate_makespan([1, 2, 3], 1), 6)
+
+    def test_compressed_result_file(self):
+        compressed_result_file = self.result_file + ".bz2"
+        with bz2.open(compressed_result_file, "wt") as f:
+            f.write(RESULT_XML.replace("10.5s", "20.5s"))
+        predictor = runordering.RuntimePredictor([compressed_result_file])
+        self.assertEqual(predictor.predict(create_run(self.task("a.c"))), 20.5)
@@ -5,6 +5,8 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import glob
+import shutil
 import sys
 import unittest
 from benchexec.util import ProcessExitCode
@@ -142,3 +144,60 @@ class TestRmtree(unittest.TestCase):
 
     def test_dir_without_any_permissions(self):
         self.create_and_delete_directory(0)
+
+
+class TestDirectoryIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp(prefix="BenchExec_test_util_index")
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        for name in ["a/x.c", "a/y.yml", "a/.hidden.c", "b/z.c", ".h/w.c", "[c]"]:
+            path = os.path.join(self.base_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            util.write_file("", path)
+        os.symlink("a", os.path.join(self.base_dir, "link_dir"))
+        os.symlink("a/x.c", os.path.join(self.base_dir, "link_file"))
+        os.symlink("missing", os.path.join(self.base_dir, "link_broken"))
+
+    def assert_same_as_glob(self, index, pattern):
+        pattern = os.path.join(self.base_dir, pattern)
+        self.assertEqual(index.glob(pattern), glob.glob(pattern), pattern)
+
+    def test_same_as_glob(self):
+        index = util.DirectoryIndex()
+        patterns = [
+            "*",
+            "*/",
+            ".*",
+            "*/*.c",
+            "*/*",
+            "*/.*",
+            "a/*.[cy]*",
+            "?/x.c",
+            "*/x.c",
+            "*/missing.c",
+            "a/x.c",
+            "a/",
+            "a/x.c/",
+            "link_*/*",
+            "link_broken",
+            "missing/*",
+            "[[]c]",
+            "",
+        ]
+        for pattern in patterns:
+            self.assert_same_as_glob(index, pattern)
+        # repeated usage with cached directory contents
+        for pattern in patterns:
+            self.assert_same_as_glob(index, pattern)
+
+    def test_expand_filename_pattern(self):
+        index = util.DirectoryIndex()
+        self.assertEqual(
+            util.expand_filename_pattern("a/../*/*.c", self.base_dir, index),
+            util.expand_filename_pattern("a/../*/*.c", self.base_dir),
+        )
@@ -0,0 +1,115 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import errno
+import os
+import signal
+import sys
+import time
+import unittest
+
+from benchexec import zygote
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+
+
+def _start_process(args, stdout=None):
+    """Start a process in the zygote with os.fork() and os.execv()."""
+    if not os.path.exists(args[0]):
+        raise FileNotFoundError(args[0])
+    pid = os.fork()
+    if pid == 0:
+        try:
+            if stdout is not None:
+                os.dup2(stdout, 1)
+            os.execv(args[0], args)
+        finally:
+            os._exit(127)
+    return pid
+
+
+def kill_zygote(zygote_process):
+    """Kill the given zygote process and wait until it has terminated."""
+    os.kill(zygote_process.pid, signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{zygote_process.pid}/stat") as f:
+                # zombie processes have already closed their sockets
+                if f.read().rpartition(")")[2].split()[0] in ["Z", "X"]:
+                    return
+        except FileNotFoundError:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"zygote process {zygote_process.pid} did not terminate")
+
+
+class TestZygote(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.longMessage = True
+        cls.maxDiff = None
+
+    def setUp(self):
+        if not os.path.exists("/bin/sh") or not os.path.exists("/bin/true"):
+            self.skipTest("missing /bin/sh or /bin/true")
+        self.zygote = zygote.Zygote(_start_process)
+
+    def tearDown(self):
+        self.zygote.close()
+
+    def test_exit_code(self):
+        child = self.zygote.start_child(args=["/bin/sh", "-c", "exit 3"])
+        exitcode, ru_child = child.wait()
+        self.assertEqual(os.WEXITSTATUS(exitcode), 3)
+        self.assertIsNotNone(ru_child)
+
+    def test_pass_fds(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            child = self.zygote.start_child(
+                {"stdout": write_fd}, args=["/bin/sh", "-c", "echo TEST_TOKEN"]
+            )
+            os.close(write_fd)
+            write_fd = None
+            with os.fdopen(read_fd) as f:
+                read_fd = None
+                self.assertEqual(f.read(), "TEST_TOKEN\n")
+            self.assertEqual(child.wait()[0], 0)
+        finally:
+            for fd in [read_fd, write_fd]:
+                if fd is not None:
+                    os.close(fd)
+
+    def test_concurrent_children(self):
+        children = [
+            self.zygote.start_child(args=["/bin/sh", "-c", f"exit {i}"])
+            for i in range(5)
+        ]
+        for i, child in reversed(list(enumerate(children))):
+            self.assertEqual(os.WEXITSTATUS(child.wait()[0]), i)
+
+    def test_error_in_zygote(self):
+        self.assertRaises(
+            FileNotFoundError,
+            lambda: self.zygote.start_child(args=["/does/not/exist"]),
+        )
+        # zygote needs to be still usable
+        self.assertEqual(self.zygote.start_child(args=["/bin/true"]).wait()[0], 0)
+
+    def test_unpicklable_arguments(self):
+        self.assertRaises(
+            ValueError, lambda: self.zygote.start_child(args=lambda: ["/bin/true"])
+        )
+
+    def test_terminated_zygote(self):
+        kill_zygote(self.zygote)
+        with self.assertRaises(OSError) as context:
+            self.zygote.start_child(args=["/bin/true"])
+        self.assertIn(
+            context.exception.errno, [errno.EPIPE, errno.ECONNRESET, errno.ECHILD]
+        )
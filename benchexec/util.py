@@ -17,6 +17,7 @@ import fnmatch
 import glob
 import logging
 import os
+import re
 import shutil
 import signal as _signal
 import stat
@@ -226,12 +227,13 @@ def non_empty_str(s):
     return s
 
 
-def expand_filename_pattern(pattern, base_dir):
+def expand_filename_pattern(pattern, base_dir, directory_index=None):
     """
     Expand a file name pattern containing wildcards, environment variables etc.
 
     @param pattern: The pattern string to expand.
     @param base_dir: The directory where relative paths are based on.
+    @param directory_index: An optional DirectoryIndex to use instead of glob.glob().
     @return: A list of file names (possibly empty).
     """
     # 'join' ignores base_dir, if expandedPattern is absolute.
@@ -242,11 +244,133 @@ def expand_filename_pattern(pattern, base_dir):
     pattern = os.path.expandvars(os.path.expanduser(pattern))
 
     # expand wildcards
-    fileList = glob.glob(pattern)
+    if directory_index is not None:
+        fileList = directory_index.glob(pattern)
+    else:
+        fileList = glob.glob(pattern)
 
     return fileList
 
 
+_GLOB_MAGIC = re.compile("[*?[]")
+
+
+class DirectoryIndex(object):
+    """
+    An in-memory index of the contents of directories for expanding many
+    file-name patterns, e.g., while loading a benchmark definition.
+    glob() returns the same result (including its order) as glob.glob(),
+    but each directory is listed only once and each path is checked only once.
+    Changes of the file system after a directory was indexed are not noticed,
+    so an instance should be used only for a limited time.
+    Instances can be used from several threads.
+    """
+
+    def __init__(self):
+        self._entries = {}  # directory -> list of os.DirEntry (None if not listable)
+        self._names = {}  # directory -> set of names
+        self._matches = {}  # (directory, pattern, dironly) -> list of names
+        self._lexists = {}  # path -> bool
+        self._isdir = {}  # path -> bool
+
+    def glob(self, pattern):
+        """Return a list of paths that match the pattern, like glob.glob()."""
+        return list(self._iglob(pattern, False))
+
+    def _iglob(self, pathname, dironly):
+        # This follows the (non-recursive) implementation of glob.glob().
+        dirname, basename = os.path.split(pathname)
+        if not _GLOB_MAGIC.search(pathname):
+            if basename:
+                if self._path_lexists(pathname):
+                    yield pathname
+            else:
+                # Patterns ending with a slash should match only directories
+                if self._path_isdir(dirname):
+                    yield pathname
+            return
+        if not dirname:
+            yield from self._glob_in_dir(dirname, basename, dironly)
+            return
+        if dirname != pathname and _GLOB_MAGIC.search(dirname):
+            dirs = self._iglob(dirname, True)
+        else:
+            dirs = [dirname]
+        if _GLOB_MAGIC.search(basename):
+            glob_in_dir = self._glob_in_dir
+        else:
+            glob_in_dir = self._glob_literal_in_dir
+        for dirname in dirs:
+            for name in glob_in_dir(dirname, basename, dironly):
+                yield os.path.join(dirname, name)
+
+    def _glob_in_dir(self, dirname, pattern, dironly):
+        key = (dirname, pattern, dironly)
+        matches = self._matches.get(key)
+        if matches is None:
+            names = self._list_dir(dirname, dironly)
+            if pattern[0] != ".":
+                names = [name for name in names if name[0] != "."]
+            matches = fnmatch.filter(names, pattern)
+            self._matches[key] = matches
+        return matches
+
+    def _glob_literal_in_dir(self, dirname, basename, dironly):
+        if basename:
+            if self._path_lexists(os.path.join(dirname, basename)):
+                return [basename]
+        else:
+            # 'q*x/' should match only directories.
+            if self._path_isdir(dirname):
+                return [basename]
+        return []
+
+    def _list_dir(self, dirname, dironly):
+        if dirname in self._entries:
+            entries = self._entries[dirname] or []
+        else:
+            entries = []
+            try:
+                with os.scandir(dirname or os.curdir) as it:
+                    entries.extend(it)
+                self._entries[dirname] = entries
+            except OSError:
+                self._entries[dirname] = None  # not listable
+        if not dironly:
+            return [entry.name for entry in entries]
+        names = []
+        for entry in entries:
+            try:
+                if entry.is_dir():  # result is cached by DirEntry
+                    names.append(entry.name)
+            except OSError:
+                pass
+        return names
+
+    def _path_lexists(self, path):
+        exists = self._lexists.get(path)
+        if exists is None:
+            dirname, name = os.path.split(path)
+            entries = self._entries.get(dirname)
+            if entries is not None and name not in (os.curdir, os.pardir):
+                names = self._names.get(dirname)
+                if names is None:
+                    names = {entry.name for entry in entries}
+                    self._names[dirname] = names
+                exists = name in names
+            else:
+                exists = os.path.lexists(path)
+            self._lexists[path] = exists
+        return exists
+
+    def _path_isdir(self, path):
+        isdir = self._isdir.get(path)
+        if isdir is None:
+            isdir = os.path.isdir(path)
+            self._isdir[path] = isdir
+        return isdir
+
+
 def get_files(paths):
     changed = False
     result = []
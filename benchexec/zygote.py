@@ -0,0 +1,263 @@
+# This file is part of BenchExec, a framework for reliable benchmarking:
+# https://github.com/sosy-lab/benchexec
+#
+# SPDX-FileCopyrightText: 2007-2020 Dirk Beyer <https://www.sosy-lab.org>
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This module contains a zygote: a helper process that is forked once
+and afterwards starts child processes on behalf of the process that created it.
+The zygote has only a single thread and few open file descriptors,
+and it keeps its state (e.g., the Python runtime and all imported modules)
+between child processes, so starting a child from it is cheap and does not suffer
+from the problems of cloning a process with many threads
+(cf. container.execute_in_namespace()).
+"""
+
+import array
+import errno
+import logging
+import os
+import pickle
+import select
+import signal
+import socket
+import sys
+
+from benchexec import container
+
+_MAX_MESSAGE_SIZE = 1024 * 1024
+_MAX_FDS = 16
+
+
+class Zygote(object):
+    """
+    A zygote process that calls a given function for each request,
+    which should start a child process.
+    The zygote process waits for all child processes it has started
+    and reports their exit code and resource usage.
+    It terminates automatically when this object is garbage collected or closed,
+    or when the current process terminates.
+    The PID of the zygote process is available as attribute pid.
+    """
+
+    def __init__(self, clone_fn, keep_files=[]):
+        """
+        Fork the zygote process.
+        @param clone_fn: a function that is called in the zygote process with the
+            arguments of each call to start_child(), starts a child process,
+            and returns its PID
+        @param keep_files: file descriptors or file-like objects
+            that clone_fn needs in addition to the arguments of start_child()
+        """
+        self._socket, zygote_socket = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_SEQPACKET
+        )
+        try:
+            pid = os.fork()
+            if pid == 0:
+                exitcode = 0
+                try:
+                    # Fork again such that the zygote is not our child
+                    # and we do not need to wait for it.
+                    zygote_pid = os.fork()
+                    if zygote_pid == 0:
+                        _serve(zygote_socket, clone_fn, keep_files)
+                    else:
+                        _send_result(zygote_socket, zygote_pid)
+                except BaseException:
+                    logging.exception("Error in zygote process")
+                    exitcode = 1
+                finally:
+                    # Never return to the code of the parent or run its exit handlers.
+                    os._exit(exitcode)
+            os.waitpid(pid, 0)
+            zygote_socket.close()
+            self.pid = _receive_result(self._socket)
+        except BaseException:
+            self._socket.close()
+            raise
+        finally:
+            zygote_socket.close()
+
+    def start_child(self, fds={}, **kwargs):
+        """
+        Let the zygote process call clone_fn to start a child process.
+        @param fds: a dict of file descriptors or file-like objects that are passed to
+            clone_fn as keyword arguments (as file descriptors),
+            None and negative values like subprocess.DEVNULL are passed as they are
+        @param kwargs: further keyword arguments for clone_fn, need to be picklable
+        @return: a ZygoteChild instance
+        @raise ValueError: if the arguments cannot be passed to the zygote process
+        """
+        passed_fds = {}
+        for name, fd in fds.items():
+            if fd is None or (isinstance(fd, int) and fd < 0):
+                kwargs[name] = fd
+            else:
+                passed_fds[name] = fd if isinstance(fd, int) else fd.fileno()
+        fds = passed_fds
+        try:
+            request = pickle.dumps((list(fds.keys()), kwargs))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(f"Cannot pass arguments to zygote process: {e}")
+        if len(request) > _MAX_MESSAGE_SIZE or len(fds) >= _MAX_FDS:
+            raise ValueError("Arguments for zygote process are too large.")
+
+        # The zygote answers on a separate socket for each child,
+        # such that several threads can use the zygote concurrently.
+        result_socket, zygote_result_socket = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_SEQPACKET
+        )
+        try:
+            try:
+                _send_with_fds(
+                    self._socket,
+                    request,
+                    [zygote_result_socket.fileno()] + list(fds.values()),
+                )
+            finally:
+                zygote_result_socket.close()
+            pid = _receive_result(result_socket)
+        except BaseException:
+            result_socket.close()
+            raise
+        return ZygoteChild(pid, result_socket)
+
+    def close(self):
+        """Let the zygote process terminate after all its children have terminated."""
+        self._socket.close()
+
+
+class ZygoteChild(object):
+    """A child process that was started by a zygote."""
+
+    def __init__(self, pid, result_socket):
+        self.pid = pid
+        self._result_socket = result_socket
+
+    def wait(self):
+        """
+        Wait for the child process to terminate.
+        @return: a tuple of exit code and resource usage, like from os.wait4()
+        """
+        try:
+            return _receive_result(self._result_socket)
+        finally:
+            self._result_socket.close()
+
+
+def _send_with_fds(sock, data, fds):
+    sock.sendmsg(
+        [data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+    )
+
+
+def _receive_result(sock):
+    """Receive a pickled value and raise it if it is an exception."""
+    data = sock.recv(_MAX_MESSAGE_SIZE)
+    if not data:
+        raise OSError(errno.ECHILD, "Zygote process terminated unexpectedly")
+    result = pickle.loads(data)
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _send_result(sock, result):
+    try:
+        data = pickle.dumps(result)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        data = pickle.dumps(OSError(0, str(result)))
+    try:
+        sock.send(data)
+    except OSError as e:
+        # caller is no longer interested
+        logging.debug("Zygote process could not send result: %s", e)
+
+
+def _serve(sock, clone_fn, keep_files):
+    """Main loop of the zygote process."""
+    # Ctrl+C is handled by the parent. We block the signal instead of ignoring it,
+    # because ignored signals would stay ignored in the executed tools.
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT})
+    container.close_open_fds(
+        keep_files={sys.stdin, sys.stdout, sys.stderr, sock}.union(keep_files)
+    )
+
+    # We get notified of terminated children via a pipe and SIGCHLD.
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    result_sockets = {}  # PID of child -> socket for result
+    poller = select.poll()
+    poller.register(sock, select.POLLIN)
+    poller.register(wakeup_read, select.POLLIN)
+    while True:
+        for fd, unused_event in poller.poll():
+            if fd == wakeup_read:
+                os.read(wakeup_read, 1024)
+                _reap_children(result_sockets)
+            elif _handle_request(sock, clone_fn, result_sockets, wakeup_write):
+                # SIGCHLD for children that terminated quickly could have been missed
+                _reap_children(result_sockets)
+            else:
+                # Parent has closed the socket, so nobody is waiting for results
+                # of the remaining children anymore.
+                return
+
+
+def _handle_request(sock, clone_fn, result_sockets, wakeup_fd):
+    data, ancdata, flags, unused_address = sock.recvmsg(
+        _MAX_MESSAGE_SIZE, socket.CMSG_SPACE(_MAX_FDS * array.array("i").itemsize)
+    )
+    if not data:
+        return False
+
+    fds = array.array("i")
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[: len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    result_socket = socket.socket(fileno=fds[0])
+    request_fds = fds[1:]
+
+    try:
+        if flags & (socket.MSG_TRUNC | socket.MSG_CTRUNC):
+            raise OSError(errno.EMSGSIZE, "Request for zygote process is too large")
+        fd_names, kwargs = pickle.loads(data)
+        kwargs.update(zip(fd_names, request_fds))
+        # The child must not inherit our wakeup fd,
+        # the same file descriptor number could be something else there.
+        signal.set_wakeup_fd(-1)
+        try:
+            pid = clone_fn(**kwargs)
+        finally:
+            signal.set_wakeup_fd(wakeup_fd)
+    except Exception as e:
+        _send_result(result_socket, e)
+        result_socket.close()
+    else:
+        result_sockets[pid] = result_socket
+        _send_result(result_socket, pid)
+    finally:
+        # The child has its own copies of the file descriptors now.
+        for fd in request_fds:
+            os.close(fd)
+    return True
+
+
+def _reap_children(result_sockets):
+    while True:
+        try:
+            pid, exitcode, ru_child = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        result_socket = result_sockets.pop(pid, None)
+        if result_socket is not None:
+            _send_result(result_socket, (exitcode, ru_child))
+            result_socket.close()